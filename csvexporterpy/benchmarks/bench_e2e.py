@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Uçtan uca benchmark: downloader -> (NDJSON ->) consumer -> Influx, yerel sahte sunucularla.
+- Sahte OpenC3 websocket'i (FakeCableServer) sentetik kayıtları batch'ler halinde akıtır
+- Sahte Influx (FakeInfluxServer) gelen point'leri sayar; tümü gelince süre durur
+- --mode file: dump_decom_ndjson -> NDJSON dosyası -> consumer'ın dosya işleme yolu
+  --mode pipeline: dump_decom_ndjson -> InfluxPipeline (dosya yok)
+- IDLE_TIMEOUT beklemesi (--idle) dump süresinden ayrı raporlanır
+- --json / --output ile makine tarafından okunabilir sonuç
+
+Kullanım:
+    python3 benchmarks/bench_e2e.py --records 50000 --mode file --json
+    python3 benchmarks/bench_e2e.py --records 50000 --mode pipeline --form items --output e2e.json
+"""
+
+import os, sys, json, time, platform, tempfile, argparse
+from typing import Any, Dict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "dbprocesses"))
+from synthetic import CFS_PACKETS, make_records
+from fake_servers import FakeCableServer, FakeInfluxServer
+
+def run(args, workdir: str) -> Dict[str, Any]:
+    # consumer/downloader modül seviyesinde env okur: import'tan önce ayarlanmalı
+    # ölçüm adaptive yazıcıyla: batching WriteApi'nin zaman/sayı penceresi yarışı son point'leri kaybedebildiğinden
+    # "tüm point'ler geldi" ölçütü güvenilmez olur
+    os.environ.update(SPOOL_ENABLED="0", OFFSETS_PATH=os.path.join(workdir, ".offsets.json"),
+                      NDJSON_DIR=workdir, INFLUX_WRITER="adaptive")
+    import download_all_cfs_debug as dl
+    import influx_consumer_simple as consumer
+
+    recs = make_records(args.form, args.records, fields=args.fields, rate_hz=args.rate)
+    cable = FakeCableServer(lambda keys, data: recs, batch_size=args.batch).start()
+    influx = FakeInfluxServer(latency_sec=args.influx_latency).start()
+    dl.HOST = cable.host
+    dl.IDLE_TIMEOUT_SEC = args.idle
+    consumer.INFLUX_URL = influx.url
+    label = f"BENCH_{args.form.upper()}"
+    keys = [f"DECOM__TLM__CFS_DEBUG__{p}" for p in CFS_PACKETS]
+
+    try:
+        t0 = time.perf_counter()
+        if args.mode == "pipeline":
+            pipeline = dl.InfluxPipeline()
+            dl.dump_decom_ndjson(keys, 60, None, label, pipeline=pipeline)
+            t_dump = time.perf_counter()
+            pipeline.close()
+        else:
+            outfile = os.path.join(workdir, f"{label}.ndjson")
+            dl.dump_decom_ndjson(keys, 60, outfile, label)
+            t_dump = time.perf_counter()
+            consumer.init_influx()
+            handler = consumer.NDJSONHandler()
+            handler._process_once(outfile)
+            handler.close()
+            consumer.close_influx()  # döndüğünde tüm batch'ler gönderilmiş (batching: callback'ler beklenir)
+        complete = influx.wait_for(args.records, timeout=args.timeout)
+        t_end = time.perf_counter()
+    finally:
+        cable.stop()
+        influx.stop()
+
+    busy = (t_end - t0) - args.idle  # son veriden sonraki IDLE_TIMEOUT beklemesi hariç
+    return {
+        "bench": "e2e", "mode": args.mode, "form": args.form, "writer": consumer.INFLUX_WRITER,
+        "records": args.records, "fields": args.fields, "ws_batch": args.batch,
+        "points_received": influx.points, "influx_requests": influx.requests, "lp_bytes": influx.bytes,
+        "complete": complete,
+        "dump_sec": t_dump - t0 - args.idle, "idle_sec": args.idle,
+        "ingest_sec": t_end - t_dump, "e2e_sec": busy,
+        "rec_per_sec": args.records / busy if busy > 0 else None,
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", type=int, default=20000)
+    ap.add_argument("--fields", type=int, default=40)
+    ap.add_argument("--form", choices=["flat", "items"], default="flat")
+    ap.add_argument("--rate", type=float, default=100.0, help="kayıt zaman damgaları arası frekans (Hz)")
+    ap.add_argument("--batch", type=int, default=100, help="ws mesajı başına kayıt")
+    ap.add_argument("--mode", choices=["file", "pipeline"], default="file")
+    ap.add_argument("--idle", type=float, default=0.5, help="downloader IDLE_TIMEOUT_SEC")
+    ap.add_argument("--influx-latency", type=float, default=0.0, help="sahte Influx istek gecikmesi (s)")
+    ap.add_argument("--timeout", type=float, default=30.0, help="tüm point'lerin gelmesi için üst sınır")
+    ap.add_argument("--json", action="store_true", help="sonucu JSON olarak bas")
+    ap.add_argument("--output", help="sonucu bu dosyaya JSON olarak yaz")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        res = run(args, workdir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        print(f"{res['mode']}/{res['form']}: {res['records']} kayıt -> {res['points_received']} point "
+              f"({res['influx_requests']} istek) | dump {res['dump_sec']:.2f}s + idle {res['idle_sec']:.1f}s, "
+              f"ingest {res['ingest_sec']:.2f}s | {res['rec_per_sec'] or 0:,.0f} kayıt/s"
+              + ("" if res["complete"] else " | EKSİK: zaman aşımı"))
+    if not res["complete"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
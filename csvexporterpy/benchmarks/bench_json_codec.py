@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ndjson_codec arka uçlarının (json / orjson / simdjson) karşılaştırması.
+- --input verilirse kayıtlı bir NDJSON dökümü (ör. logs/TM_CFS_DEBUG.ndjson) kullanılır,
+  yoksa CFS_DEBUG biçiminde sentetik flat kayıtlar üretilir
+- Her arka uç için satır parse (loads) ve NDJSON serileştirme (dumps_lines) hızı ölçülür
+- --json ile sonuç makine tarafından okunabilir JSON olarak basılır
+
+Kullanım:
+    python3 benchmarks/bench_json_codec.py --input dbprocesses/logs/TM_CFS_DEBUG.ndjson
+    python3 benchmarks/bench_json_codec.py --records 50000 --json
+"""
+
+import os, sys, json, time, argparse
+from typing import Any, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "dbprocesses"))
+import ndjson_codec
+from synthetic import flat_records, to_lines
+
+def synthetic_cfs_debug(n: int, fields: int = 40, seed: int = 1) -> List[bytes]:
+    """DECOM__TLM__CFS_DEBUG__* flat kayıtlarına benzeyen n adet NDJSON satırı."""
+    return to_lines(flat_records(n, fields, seed=seed))
+
+def read_lines(path: str) -> List[bytes]:
+    with open(path, "rb") as f:
+        return [s for s in (line.strip() for line in f) if s]
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def bench(lines: List[bytes], repeat: int) -> List[Dict[str, Any]]:
+    total_bytes = sum(len(s) for s in lines)
+    results = []
+    for name in ndjson_codec.available_backends():
+        loads, dumps = ndjson_codec.load_backend(name)
+        recs = [loads(s) for s in lines]
+
+        t_loads = _best(lambda: [loads(s) for s in lines], repeat)
+        t_dumps = _best(lambda: b"\n".join(dumps(r) for r in recs), repeat)
+        results.append({
+            "backend": name,
+            "records": len(lines),
+            "bytes": total_bytes,
+            "loads_sec": t_loads,
+            "loads_rec_per_sec": len(lines) / t_loads,
+            "loads_mb_per_sec": total_bytes / t_loads / 1e6,
+            "dumps_sec": t_dumps,
+            "dumps_rec_per_sec": len(recs) / t_dumps,
+        })
+    base = next((r for r in results if r["backend"] == "json"), None)
+    for r in results:
+        r["loads_speedup"] = base["loads_sec"] / r["loads_sec"] if base else None
+        r["dumps_speedup"] = base["dumps_sec"] / r["dumps_sec"] if base else None
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--input", help="kayıtlı NDJSON dosyası (yoksa sentetik CFS_DEBUG)")
+    ap.add_argument("--records", type=int, default=20000, help="sentetik kayıt sayısı")
+    ap.add_argument("--fields", type=int, default=40, help="sentetik kayıt başına alan sayısı")
+    ap.add_argument("--repeat", type=int, default=5, help="her ölçüm için tekrar (en iyisi alınır)")
+    ap.add_argument("--json", action="store_true", help="sonucu JSON olarak bas")
+    args = ap.parse_args()
+
+    lines = read_lines(args.input) if args.input else synthetic_cfs_debug(args.records, args.fields)
+    results = bench(lines, args.repeat)
+
+    if args.json:
+        print(json.dumps({"source": args.input or "synthetic", "selected": ndjson_codec.NAME, "results": results}, indent=2))
+        return
+    print(f"kaynak: {args.input or 'sentetik CFS_DEBUG'} | {len(lines)} satır | varsayılan codec: {ndjson_codec.NAME}")
+    print(f"{'backend':<10} {'loads rec/s':>14} {'MB/s':>8} {'x':>6} {'dumps rec/s':>14} {'x':>6}")
+    for r in results:
+        print(f"{r['backend']:<10} {r['loads_rec_per_sec']:>14,.0f} {r['loads_mb_per_sec']:>8.1f} "
+              f"{r['loads_speedup'] or 0:>6.2f} {r['dumps_rec_per_sec']:>14,.0f} {r['dumps_speedup'] or 0:>6.2f}")
+
+if __name__ == "__main__":
+    main()
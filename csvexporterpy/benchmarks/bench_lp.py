@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Consumer'ın sıcak yolu (lp_convert) için throughput ve bellek ölçümü.
+- flat ve items formunda sentetik kayıtlar (benchmarks/synthetic.py)
+- extract_meta, to_line_protocol ve ndjson_file_to_lp için kayıt/s ve tracemalloc tepe belleği
+- --json / --output ile makine tarafından okunabilir sonuç; --compare ile önceki bir sonuca göre
+  gerileme kontrolü (tolerans aşılırsa çıkış kodu 1)
+
+Kullanım:
+    python3 benchmarks/bench_lp.py --records 50000 --output lp_baseline.json
+    python3 benchmarks/bench_lp.py --records 50000 --compare lp_baseline.json --tolerance 0.15
+"""
+
+import os, sys, json, time, platform, tempfile, argparse, tracemalloc
+from typing import Any, Callable, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "dbprocesses"))
+import ndjson_codec
+import lp_convert
+from synthetic import make_records, write_ndjson
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _peak_kb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def _extract_all(recs: List[Dict[str, Any]]):
+    extract_meta = lp_convert.extract_meta
+    return [extract_meta(rec) for rec in recs]
+
+def _lp_all(metas: List[Any]):
+    to_line_protocol = lp_convert.to_line_protocol
+    return [to_line_protocol(tgt, pkt, kind, fields, t_ns) for t_ns, tgt, pkt, kind, fields in metas if t_ns is not None]
+
+def bench_form(form: str, n: int, fields: int, repeat: int, workdir: str) -> List[Dict[str, Any]]:
+    recs = make_records(form, n, fields=fields)
+    path = os.path.join(workdir, f"bench_{form}.ndjson")
+    size = write_ndjson(path, recs)
+    metas = _extract_all(recs)
+    ops = [
+        ("extract_meta", lambda: _extract_all(recs)),
+        ("to_line_protocol", lambda: _lp_all(metas)),
+        ("ndjson_file_to_lp", lambda: lp_convert.ndjson_file_to_lp(path)),
+    ]
+    out = []
+    for op, fn in ops:
+        sec = _best(fn, repeat)
+        out.append({
+            "form": form, "op": op, "records": n, "fields": fields,
+            "sec": sec, "rec_per_sec": n / sec,
+            "mb_per_sec": size / sec / 1e6 if op == "ndjson_file_to_lp" else None,
+            "peak_kb": _peak_kb(fn),
+        })
+    return out
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Önceki sonuca göre tolerance oranından fazla yavaşlayan (form, op) çiftleri."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {(r["form"], r["op"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        b = base.get((r["form"], r["op"]))
+        if not b:
+            continue
+        r["baseline_rec_per_sec"] = b["rec_per_sec"]
+        r["change"] = r["rec_per_sec"] / b["rec_per_sec"] - 1
+        if r["change"] < -tolerance:
+            regressions.append(f"{r['form']}/{r['op']}: {b['rec_per_sec']:,.0f} -> {r['rec_per_sec']:,.0f} rec/s "
+                               f"({r['change'] * 100:+.1f}%)")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", type=int, default=20000, help="form başına kayıt sayısı")
+    ap.add_argument("--fields", type=int, default=40, help="kayıt başına alan sayısı")
+    ap.add_argument("--forms", default="flat,items", help="virgülle ayrılmış: flat,items")
+    ap.add_argument("--repeat", type=int, default=5, help="her ölçüm için tekrar (en iyisi alınır)")
+    ap.add_argument("--json", action="store_true", help="sonucu JSON olarak bas")
+    ap.add_argument("--output", help="sonucu bu dosyaya JSON olarak yaz")
+    ap.add_argument("--compare", help="önceki --output dosyası; gerileme varsa çıkış kodu 1")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="izin verilen yavaşlama oranı")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = []
+        for form in args.forms.split(","):
+            results.extend(bench_form(form.strip(), args.records, args.fields, args.repeat, workdir))
+    regressions = compare(results, args.compare, args.tolerance) if args.compare else []
+    doc = {
+        "bench": "lp_convert",
+        "python": platform.python_version(), "codec": ndjson_codec.NAME,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results, "regressions": regressions,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    if args.json:
+        print(json.dumps(doc, indent=2))
+    else:
+        print(f"{args.records} kayıt x {args.fields} alan | codec: {ndjson_codec.NAME}")
+        print(f"{'form':<6} {'op':<18} {'rec/s':>12} {'MB/s':>7} {'peak KB':>10} {'değişim':>8}")
+        for r in results:
+            mbs = f"{r['mb_per_sec']:.1f}" if r["mb_per_sec"] else "-"
+            chg = f"{r['change'] * 100:+.1f}%" if "change" in r else "-"
+            print(f"{r['form']:<6} {r['op']:<18} {r['rec_per_sec']:>12,.0f} {mbs:>7} {r['peak_kb']:>10,.0f} {chg:>8}")
+        for line in regressions:
+            print(f"GERİLEME: {line}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
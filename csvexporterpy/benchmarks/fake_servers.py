@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark için yerel sahte sunucular (yalnızca stdlib).
+- FakeCableServer: OpenC3 /openc3-api/cable websocket'i (RFC 6455, metin çerçeveleri) ve StreamingChannel
+  protokolü: welcome -> subscribe/confirm_subscription -> "add" ile istenen kayıtlar batch'ler halinde akar
+- FakeInfluxServer: InfluxDB v2 /api/v2/write ucu; gelen line protocol satırlarını sayar (gzip destekli)
+"""
+
+import gzip, json, time, base64, socket, struct, hashlib, threading, socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# ===================== Websocket çerçeveleri =====================
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("bağlantı kapandı")
+        buf += chunk
+    return buf
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    """(opcode, payload); istemci çerçeveleri maskelidir. Parçalı (fragmented) mesajlar birleştirilir."""
+    data, first_op = b"", None
+    while True:
+        b1, b2 = _recv_exact(sock, 2)
+        fin, op = b1 & 0x80, b1 & 0x0F
+        n = b2 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", _recv_exact(sock, 2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", _recv_exact(sock, 8))[0]
+        mask = _recv_exact(sock, 4) if b2 & 0x80 else None
+        payload = _recv_exact(sock, n)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        if op >= 0x8:  # kontrol çerçeveleri parçalanmaz
+            return op, payload
+        if first_op is None:
+            first_op = op
+        data += payload
+        if fin:
+            return first_op, data
+
+def send_frame(sock: socket.socket, op: int, payload: bytes) -> None:
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | op, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | op, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | op, 127, n)
+    sock.sendall(head + payload)
+
+def read_http_head(sock: socket.socket, buf: bytes = b"") -> Tuple[str, str, str, Dict[str, str], bytes]:
+    """Bir HTTP istek başlığını okur: (method, path, sürüm, headers (küçük harf), başlıktan sonra gelmiş byte'lar)."""
+    while b"\r\n\r\n" not in buf:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("istek yarıda kaldı")
+        buf += chunk
+    head, rest = buf.split(b"\r\n\r\n", 1)
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, version = (lines[0].split(" ") + ["HTTP/1.0"])[:3]
+    headers = {k.strip().lower(): v.strip() for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)}
+    return method, path, version, headers, rest
+
+def accept_websocket(sock: socket.socket, headers: Dict[str, str]) -> None:
+    accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + _WS_GUID).encode()).digest()).decode()
+    sock.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+
+def _handshake(sock: socket.socket) -> str:
+    """HTTP upgrade isteğini okur, 101 yanıtını yollar; istek yolunu döner."""
+    _, path, _, headers, _ = read_http_head(sock)
+    accept_websocket(sock, headers)
+    return path
+
+# ===================== Action Cable / StreamingChannel =====================
+# (paket anahtarları, subscribe "add" verisi) -> gönderilecek kayıtlar
+RecordSource = Callable[[List[str], Dict[str, Any]], Iterable[Dict[str, Any]]]
+
+class _CableHandler(socketserver.BaseRequestHandler):
+    server: "FakeCableServer"
+
+    def setup(self):
+        self._send_lock = threading.Lock()
+        self._streams: Dict[int, threading.Event] = {}
+
+    def send_json(self, obj: Any):
+        with self._send_lock:
+            send_frame(self.request, OP_TEXT, json.dumps(obj).encode("utf-8"))
+
+    def handle(self):
+        try:
+            _handshake(self.request)
+        except (ConnectionError, OSError, KeyError):
+            return
+        self.serve_cable()
+
+    def serve_cable(self):
+        """Handshake'ten sonra: welcome gönderir, istemci komutlarını bağlantı kapanana kadar işler."""
+        sock = self.request
+        try:
+            self.send_json({"type": "welcome"})
+            while True:
+                op, payload = recv_frame(sock)
+                if op == OP_CLOSE:
+                    with self._send_lock:
+                        send_frame(sock, OP_CLOSE, payload[:2])
+                    return
+                if op == OP_PING:
+                    with self._send_lock:
+                        send_frame(sock, OP_PONG, payload)
+                    continue
+                if op != OP_TEXT:
+                    continue
+                self.on_command(json.loads(payload))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            for stop in self._streams.values():
+                stop.set()
+
+    def on_command(self, cmd: Dict[str, Any]):
+        identifier = cmd.get("identifier")
+        if cmd.get("command") == "subscribe":
+            self.send_json({"identifier": identifier, "type": "confirm_subscription"})
+            return
+        if cmd.get("command") != "message":
+            return
+        data = json.loads(cmd.get("data") or "{}")
+        if data.get("action") == "add":
+            stop = threading.Event()
+            self._streams[len(self._streams)] = stop
+            threading.Thread(target=self._stream, args=(identifier, data, stop), daemon=True).start()
+
+    def _stream(self, identifier: str, data: Dict[str, Any], stop: threading.Event):
+        batch: List[Dict[str, Any]] = []
+        try:
+            for rec in self.server.source(list(data.get("packets") or []), data):
+                if stop.is_set():
+                    return
+                batch.append(rec)
+                if len(batch) >= self.server.batch_size:
+                    self.send_json({"identifier": identifier, "message": batch})
+                    batch = []
+            if batch:
+                self.send_json({"identifier": identifier, "message": batch})
+        except (ConnectionError, OSError):
+            pass
+
+class FakeCableServer(socketserver.ThreadingTCPServer):
+    """
+    source: her "add" aboneliği için kayıt üreten fonksiyon; kayıtlar batch_size'lık mesajlarla gönderilir.
+    Ardından sunucu susar (downloader IDLE_TIMEOUT ile dump'ı bitirir).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, source: RecordSource, batch_size: int = 100, host: str = "127.0.0.1", port: int = 0,
+                 handler=_CableHandler):
+        super().__init__((host, port), handler)
+        self.source = source
+        self.batch_size = batch_size
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-cable", daemon=True)
+
+    @property
+    def host(self) -> str:
+        """downloader'ın HOST biçimi: "127.0.0.1:port"."""
+        return f"{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> "FakeCableServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+# ===================== Influx =====================
+class _InfluxHandler(BaseHTTPRequestHandler):
+    server: "FakeInfluxServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        if self.server.latency_sec:
+            time.sleep(self.server.latency_sec)
+        if self.path.startswith("/api/v2/write"):
+            self.server.record(body)
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):  # /ping, /health
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeInfluxServer(ThreadingHTTPServer):
+    """Yazımları kabul eder (204); toplam point/byte/istek sayısını tutar. latency_sec her isteği geciktirir."""
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_sec: float = 0.0):
+        super().__init__((host, port), _InfluxHandler)
+        self.latency_sec = latency_sec
+        self.points = 0
+        self.bytes = 0
+        self.requests = 0
+        self._cv = threading.Condition()
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-influx", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def record(self, body: bytes):
+        n = sum(1 for line in body.split(b"\n") if line.strip())
+        with self._cv:
+            self.points += n
+            self.bytes += len(body)
+            self.requests += 1
+            self._cv.notify_all()
+
+    def wait_for(self, points: int, timeout: float = 60.0) -> bool:
+        """En az points kadar point gelene kadar bekler."""
+        deadline = time.time() + timeout
+        with self._cv:
+            while self.points < points:
+                left = deadline - time.time()
+                if left <= 0:
+                    return False
+                self._cv.wait(left)
+        return True
+
+    def start(self) -> "FakeInfluxServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
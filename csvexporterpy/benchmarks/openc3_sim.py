@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yerel OpenC3 streaming-API simülatörü (downloader yük testi için; yalnızca stdlib).
+Tek port üzerinden gerçek sunucunun downloader'ın kullandığı iki ucunu taklit eder:
+- POST /openc3-api/api: JSON-RPC 2.0 (get_all_telemetry_names, get_all_command_names; batch istekleri)
+- /openc3-api/cable: Action Cable StreamingChannel websocket'i
+  "add" {packets, start_time, end_time}: pencere kayıtları akar, sonra sunucu susar
+  "add" end_time'sız: canlı akış (kayıtlar gerçek zamanda --rate ile üretilir), "remove" ile durur
+Kayıtlar sentetik (flat form) ya da --replay ile verilen NDJSON dökümlerinden yeniden zaman damgalanarak gelir.
+Hız/yük ayarları:
+- --rate: paket anahtarı başına saniyedeki kayıt (uçuş hızının 10-100 katı için büyütün)
+- --burst: ws mesajı başına kayıt, --send-rate: bağlantı başına üst sınır (kayıt/s, 0: sınırsız)
+- --latency: RPC yanıtı ve akış başlangıcı öncesi gecikme, --jitter: mesaj başına rastgele ek gecikme
+İstemci yavaş okursa sendall bloklar; bu süre "send_blocked_sec" olarak raporlanır (backpressure).
+
+Kullanım:
+    python3 benchmarks/openc3_sim.py --port 2900 --rate 1000 --burst 200
+    python3 benchmarks/openc3_sim.py --port 2900 --replay dbprocesses/logs/TM_CFS_DEBUG.ndjson --rate 50
+    # downloader tarafı: HOST=localhost:2900 (varsayılan) ile çalıştırılır
+"""
+
+import os, sys, json, time, random, threading, argparse, socketserver
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "dbprocesses"))
+from fake_servers import OP_TEXT, _CableHandler, accept_websocket, read_http_head, send_frame
+from synthetic import CFS_PACKETS, flat_record
+
+# ===================== Katalog & kayıt kaynağı =====================
+DEFAULT_CATALOG: Dict[str, Dict[str, List[str]]] = {
+    "CFS_DEBUG": {"TLM": list(CFS_PACKETS), "CMD": ["CFE_ES_NOOP", "CFE_EVS_NOOP", "SC_NOOP"]},
+}
+
+def record_packet_key(rec: Dict[str, Any]) -> Optional[str]:
+    if rec.get("__packet"):
+        return str(rec["__packet"])
+    if "target" in rec and "packet" in rec:
+        return f"DECOM__TLM__{rec['target']}__{rec['packet']}"
+    return None
+
+class PacketSource:
+    """
+    Hedef -> paket adları kataloğu ve (paket anahtarı, zaman) -> kayıt üretimi.
+    Katalogda olmayan hedefler için packets_per_target adet sentetik paket adı uydurulur.
+    replay verilmişse o anahtarın kayıtları döngüyle yeniden kullanılır, zaman alanları değiştirilir.
+    """
+    def __init__(self, fields: int = 40, packets_per_target: int = 4, seed: int = 1,
+                 replay: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.fields = fields
+        self.packets_per_target = packets_per_target
+        self.catalog = {t: {k: list(v) for k, v in d.items()} for t, d in DEFAULT_CATALOG.items()}
+        self.replay = replay or {}
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        for key in self.replay:
+            parts = key.split("__")
+            if len(parts) >= 4:
+                names = self.catalog.setdefault(parts[2], {"TLM": [], "CMD": []})[parts[1]]
+                if parts[3] not in names:
+                    names.append(parts[3])
+
+    def packet_names(self, target: str, kind: str) -> List[str]:
+        with self._lock:
+            tgt = self.catalog.setdefault(target, {})
+            if not tgt.get(kind):
+                base = ["HK", "STATUS", "EVENT", "DIAG", "CONFIG", "POWER", "TEMPS", "STATS"]
+                if kind == "CMD":
+                    base = ["NOOP", "RESET", "SET_MODE", "CONFIG"]
+                n = self.packets_per_target
+                tgt[kind] = [f"{target}_{base[i % len(base)]}{'' if i < len(base) else i}" for i in range(n)]
+            return list(tgt[kind])
+
+    def record(self, key: str, t_ns: int, seq: int) -> Dict[str, Any]:
+        recs = self.replay.get(key)
+        if recs:
+            rec = dict(recs[seq % len(recs)])
+            if "items" in rec and "time" in rec:
+                rec["time"] = t_ns
+            else:
+                rec["__time"] = t_ns
+                if "PACKET_TIMESECONDS" in rec:
+                    rec["PACKET_TIMESECONDS"] = t_ns / 1e9
+            return rec
+        parts = key.split("__")
+        kind, target, pkt = (parts[1], parts[2], parts[3]) if len(parts) >= 4 else ("TLM", "SIM", key)
+        with self._lock:
+            return flat_record(target, pkt, t_ns, seq, self.fields, self._rnd, kind=kind)
+
+def load_replay(paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """NDJSON dökümlerini (gz/zst dahil, passthrough dizi satırları dahil) paket anahtarına göre gruplar."""
+    from lp_convert import open_ndjson
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for path in paths:
+        with open_ndjson(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    continue
+                for rec in (obj if isinstance(obj, list) else [obj]):
+                    key = record_packet_key(rec) if isinstance(rec, dict) else None
+                    if key:
+                        out.setdefault(key, []).append(rec)
+    return out
+
+# ===================== Sunucu =====================
+class _Stream:
+    def __init__(self, keys: List[str]):
+        self.keys: Set[str] = set(keys)
+        self.stop = threading.Event()
+
+class _SimHandler(_CableHandler):
+    server: "OpenC3Simulator"
+
+    def setup(self):
+        super().setup()
+        self._subs: List[_Stream] = []
+
+    def handle(self):
+        sock = self.request
+        buf = b""
+        try:
+            while True:
+                method, path, version, headers, rest = read_http_head(sock, buf)
+                if headers.get("upgrade", "").lower() == "websocket" and path.startswith("/openc3-api/cable"):
+                    accept_websocket(sock, headers)
+                    self.server.stats_add(connections=1)
+                    self.serve_cable()
+                    return
+                n = int(headers.get("content-length") or 0)
+                while len(rest) < n:
+                    chunk = sock.recv(n - len(rest))
+                    if not chunk:
+                        return
+                    rest += chunk
+                body, buf = rest[:n], rest[n:]
+                keep = self._http(method, path, version, headers, body)
+                if not keep:
+                    return
+        except (ConnectionError, OSError, ValueError, KeyError):
+            return
+
+    # ---------- JSON-RPC ----------
+    def _http(self, method: str, path: str, version: str, headers: Dict[str, str], body: bytes) -> bool:
+        if method == "POST" and path.startswith("/openc3-api/api"):
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            try:
+                req = json.loads(body)
+                resp = [self._rpc(r) for r in req] if isinstance(req, list) else self._rpc(req)
+                status, data = "200 OK", json.dumps(resp).encode("utf-8")
+            except ValueError:
+                status, data = "400 Bad Request", b'{"error":"invalid json"}'
+        else:
+            status, data = "404 Not Found", b""
+        keep = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+        self.request.sendall((f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep else 'close'}\r\n\r\n"
+                              ).encode() + data)
+        return keep
+
+    def _rpc(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        self.server.stats_add(rpc_calls=1)
+        rid, m, params = req.get("id"), req.get("method"), req.get("params") or []
+        if m in ("get_all_telemetry_names", "get_all_command_names") and params:
+            kind = "TLM" if m == "get_all_telemetry_names" else "CMD"
+            return {"jsonrpc": "2.0", "id": rid, "result": self.server.source.packet_names(str(params[0]), kind)}
+        return {"jsonrpc": "2.0", "id": rid, "error": {"code": -32601, "message": f"method not found: {m}"}}
+
+    # ---------- StreamingChannel ----------
+    def on_command(self, cmd: Dict[str, Any]):
+        if cmd.get("command") != "message":
+            return super().on_command(cmd)
+        data = json.loads(cmd.get("data") or "{}")
+        keys = list(data.get("packets") or [])
+        if data.get("action") == "remove":
+            for sub in self._subs:
+                if sub.keys & set(keys):
+                    sub.stop.set()
+            return
+        if data.get("action") == "add" and keys:
+            sub = _Stream(keys)
+            self._subs.append(sub)
+            self._streams[len(self._streams)] = sub.stop
+            threading.Thread(target=self._stream_sim, args=(cmd.get("identifier"), keys, data, sub.stop),
+                             daemon=True).start()
+
+    def _records(self, keys: List[str], start: int, end: Optional[int], stop: threading.Event) -> Iterator[Optional[Dict[str, Any]]]:
+        """Zaman sırasıyla (anahtarlar arası serpiştirilmiş) kayıtlar; canlıda gerçek zamanı geçmez."""
+        step = max(1, int(1e9 / self.server.rate))
+        src = self.server.source
+        t, seq = start, 0
+        while not stop.is_set():
+            if end is not None and t > end:
+                return
+            if end is None:
+                ahead = (t - time.time_ns()) / 1e9
+                if ahead > 0:
+                    yield None  # bekleyen batch'i şimdi gönder
+                    if stop.wait(ahead):
+                        return
+            for key in keys:
+                yield src.record(key, t, seq)
+            t += step
+            seq += 1
+
+    def _stream_sim(self, identifier: str, keys: List[str], data: Dict[str, Any], stop: threading.Event):
+        srv = self.server
+        start = int(data.get("start_time") or time.time_ns())
+        end = data.get("end_time")
+        if srv.latency and stop.wait(srv.latency):
+            return
+        t0 = time.time()
+        sent = 0
+        batch: List[Dict[str, Any]] = []
+        try:
+            for rec in self._records(keys, start, int(end) if end is not None else None, stop):
+                if rec is not None:
+                    batch.append(rec)
+                if batch and (rec is None or len(batch) >= srv.burst):
+                    self._send_batch(identifier, batch)
+                    sent += len(batch)
+                    batch = []
+                    if srv.send_rate > 0:
+                        ahead = sent / srv.send_rate - (time.time() - t0)
+                        if ahead > 0 and stop.wait(ahead):
+                            return
+            if batch and not stop.is_set():
+                self._send_batch(identifier, batch)
+        except (ConnectionError, OSError):
+            pass
+
+    def _send_batch(self, identifier: str, batch: List[Dict[str, Any]]):
+        srv = self.server
+        if srv.jitter:
+            time.sleep(random.random() * srv.jitter)
+        payload = json.dumps({"identifier": identifier, "message": batch}).encode("utf-8")
+        t0 = time.time()
+        with self._send_lock:
+            send_frame(self.request, OP_TEXT, payload)
+        srv.stats_add(records=len(batch), messages=1, bytes=len(payload), send_blocked_sec=time.time() - t0)
+
+class OpenC3Simulator(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, source: PacketSource, host: str = "127.0.0.1", port: int = 2900, rate: float = 10.0,
+                 burst: int = 100, send_rate: float = 0.0, latency: float = 0.0, jitter: float = 0.0):
+        super().__init__((host, port), _SimHandler)
+        self.source = source
+        self.rate = rate
+        self.burst = burst
+        self.send_rate = send_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.stats: Dict[str, float] = {"connections": 0, "rpc_calls": 0, "records": 0, "messages": 0,
+                                        "bytes": 0, "send_blocked_sec": 0.0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def host(self) -> str:
+        return f"{self.server_address[0]}:{self.server_address[1]}"
+
+    def stats_add(self, **kw):
+        with self._stats_lock:
+            for k, v in kw.items():
+                self.stats[k] += v
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def start(self) -> "OpenC3Simulator":
+        threading.Thread(target=self.serve_forever, name="openc3-sim", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=2900)
+    ap.add_argument("--rate", type=float, default=10.0, help="paket anahtarı başına kayıt/s (zaman yoğunluğu)")
+    ap.add_argument("--burst", type=int, default=100, help="ws mesajı başına en fazla kayıt")
+    ap.add_argument("--send-rate", type=float, default=0.0, help="bağlantı başına gönderim üst sınırı (kayıt/s)")
+    ap.add_argument("--latency", type=float, default=0.0, help="RPC yanıtı / akış başlangıcı gecikmesi (s)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="mesaj başına 0..jitter s rastgele gecikme")
+    ap.add_argument("--fields", type=int, default=40, help="sentetik kayıt başına alan")
+    ap.add_argument("--packets-per-target", type=int, default=4, help="bilinmeyen hedefler için paket sayısı")
+    ap.add_argument("--replay", nargs="*", default=[], help="yeniden oynatılacak NDJSON dökümleri")
+    ap.add_argument("--stats-sec", type=float, default=5.0, help="istatistik satırı aralığı (0: kapalı)")
+    ap.add_argument("--json", action="store_true", help="istatistikleri JSON satırı olarak bas")
+    args = ap.parse_args()
+
+    source = PacketSource(fields=args.fields, packets_per_target=args.packets_per_target,
+                          replay=load_replay(args.replay) if args.replay else None)
+    sim = OpenC3Simulator(source, args.host, args.port, rate=args.rate, burst=args.burst, send_rate=args.send_rate,
+                          latency=args.latency, jitter=args.jitter).start()
+    print(f"OpenC3 simülatörü: http://{sim.host}/openc3-api/api, ws://{sim.host}/openc3-api/cable "
+          f"(rate={args.rate}/s/paket, burst={args.burst}, replay={len(source.replay)} paket)")
+    last, t_last = sim.snapshot(), time.time()
+    try:
+        while True:
+            time.sleep(args.stats_sec or 3600)
+            if not args.stats_sec:
+                continue
+            cur, now = sim.snapshot(), time.time()
+            dt = now - t_last
+            rate = {"rec_per_sec": (cur["records"] - last["records"]) / dt,
+                    "msg_per_sec": (cur["messages"] - last["messages"]) / dt,
+                    "mb_per_sec": (cur["bytes"] - last["bytes"]) / dt / 1e6}
+            if args.json:
+                print(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **cur, **rate}), flush=True)
+            else:
+                print(f"[{time.strftime('%X')}] {rate['rec_per_sec']:,.0f} kayıt/s, {rate['msg_per_sec']:,.0f} msg/s, "
+                      f"{rate['mb_per_sec']:.1f} MB/s | toplam {cur['records']:,.0f} kayıt, "
+                      f"{cur['connections']:.0f} ws, {cur['rpc_calls']:.0f} rpc, "
+                      f"send bloklanma {cur['send_blocked_sec']:.1f}s", flush=True)
+            last, t_last = cur, now
+    except KeyboardInterrupt:
+        print("Kapanıyor…")
+    finally:
+        sim.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark'lar için sentetik OpenC3 decom kayıtları.
+- flat form:  {"__type","__packet":"DECOM__TLM__TGT__PKT","__time",PACKET_TIMESECONDS,...alanlar}
+- items form: {"time","target","packet","items":[{"name","raw","converted","formatted"}, ...]}
+- rate_hz: ardışık kayıtlar arasındaki zaman aralığını belirler (1e9 / rate_hz ns)
+Aynı seed ile her zaman aynı kayıtlar üretilir.
+"""
+
+import json, random
+from typing import Any, Dict, List, Sequence
+
+CFS_PACKETS = ["CFE_ES_HKPACKET", "CFE_EVS_PACKET", "CFE_SB_HKMSG", "CFE_TIME_HKPACKET", "SC_HKTLM", "TO_HKPACKET"]
+T0_NS = 1_700_000_000_000_000_000
+
+def _field_value(j: int, rnd: random.Random) -> Any:
+    r = j % 4
+    if r == 0: return rnd.randint(0, 1 << 31)
+    if r == 1: return rnd.random() * 1000
+    if r == 2: return rnd.choice(["ENABLED", "DISABLED", "NOMINAL"])
+    return rnd.random() < 0.5
+
+def flat_record(target: str, pkt: str, t_ns: int, i: int, fields: int, rnd: random.Random,
+                kind: str = "TLM") -> Dict[str, Any]:
+    """Tek flat decom kaydı; kind: TLM | CMD (paket anahtarındaki ikinci parça)."""
+    rec: Dict[str, Any] = {
+        "__type": "DECOM", "__packet": f"DECOM__{kind}__{target}__{pkt}",
+        "__time": t_ns,
+        "PACKET_TIMESECONDS": t_ns / 1e9,
+        "RECEIVED_TIMESECONDS": t_ns / 1e9 + 0.001,
+        "CCSDS_STREAMID": 2048 + i % 16, "CCSDS_SEQUENCE": i % 16384, "CCSDS_LENGTH": 120,
+    }
+    for j in range(fields):
+        rec[f"FIELD_{j}"] = _field_value(j, rnd)
+    return rec
+
+def flat_records(n: int, fields: int = 40, rate_hz: float = 100.0, target: str = "CFS_DEBUG",
+                 packets: Sequence[str] = CFS_PACKETS, seed: int = 1) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    step = int(1e9 / rate_hz)
+    return [flat_record(target, packets[i % len(packets)], T0_NS + i * step, i, fields, rnd) for i in range(n)]
+
+def items_records(n: int, fields: int = 40, rate_hz: float = 100.0, target: str = "CFS_DEBUG",
+                  packets: Sequence[str] = CFS_PACKETS, seed: int = 1) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    step = int(1e9 / rate_hz)
+    out = []
+    for i in range(n):
+        items = []
+        for j in range(fields):
+            v = _field_value(j, rnd)
+            items.append({"name": f"FIELD_{j}", "raw": v, "converted": v, "formatted": str(v)})
+        out.append({"time": T0_NS + i * step, "target": target, "packet": packets[i % len(packets)], "items": items})
+    return out
+
+def make_records(form: str, n: int, **kw) -> List[Dict[str, Any]]:
+    if form == "flat":
+        return flat_records(n, **kw)
+    if form == "items":
+        return items_records(n, **kw)
+    raise ValueError(f"bilinmeyen form: {form}")
+
+def to_lines(recs: List[Dict[str, Any]]) -> List[bytes]:
+    return [json.dumps(rec).encode("utf-8") for rec in recs]
+
+def write_ndjson(path: str, recs: List[Dict[str, Any]]) -> int:
+    """Kayıtları NDJSON olarak yazar; dosya boyunu döner."""
+    data = b"\n".join(to_lines(recs)) + b"\n"
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kolonlu arşiv sink'i (Parquet / Arrow IPC) — InfluxDB'nin yanında, uzun koşuların çevrimdışı analizi için.
+- extract_meta çıktısı (t_ns, target, packet, kind, fields) seri ve saat başına bellekte kolonlar halinde birikir;
+  consumer'da DOWNSAMPLE açıksa toplanan hedefler de seyreltilmeden (ham, tam çözünürlükte) gelir
+- Dizin düzeni (hive): DIR/target=T/packet=P/date=YYYY-MM-DD/hour=HH/part-<ilk t_ns>-<pid>-<seq>.parquet|.arrow
+- Kolonlar: time (timestamp[ns, UTC]), kind & host (dictionary), alanlar değerlerine göre tipli
+  (int64 / double / bool / string / list); bir kolonun tipi seri için ilk yazılan part'ta sabitlenir,
+  sonraki part'larda uymayan kolon string'e çevrilir
+- Part dosyası: buffer flush_rows'a ulaşınca, seri yeni bir saate geçince, buffer max_age_sec'i aşınca
+  (flush_due) veya close()'da yazılır; toplam buffer max_rows'u aşarsa en büyük buffer erkenden yazılır
+- Dosyalar tmp + rename ile yayınlanır (okuyucu yarım dosya görmez); Arrow IPC dosyaları sıkıştırılmaz
+  (pyarrow.memory_map ile sıfır kopya okunabilir)
+- Yazılamayan part loglanıp atlanır: arşiv hatası Influx yazımını durdurmaz. Buffer'daki (henüz yazılmamış)
+  satırlar süreç çökerse kaybolur; NDJSON arşivinden yeniden üretilebilir
+- pyarrow yalnızca sink kurulurken import edilir; kurulu değilse ColumnarSink() ImportError verir
+
+Okuma örneği:
+    import pyarrow.dataset as ds
+    d = ds.dataset("archive/", format="parquet", partitioning="hive")
+    t = d.to_table(columns=["time", "POSITION_X"], filter=(ds.field("target") == "SIM_42_TRUTH"))
+"""
+
+import os, re, time, logging, platform, threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+log = logging.getLogger("columnar")
+
+HOUR_NS = 3600 * 10**9
+HOST = os.environ.get("HOSTNAME") or platform.node()
+_PART_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+def partition_dir(root: str, tgt: str, pkt: str, hour: int) -> str:
+    """hour: epoch saat numarası (t_ns // HOUR_NS)."""
+    dt = datetime.fromtimestamp(hour * 3600, tz=timezone.utc)
+    return os.path.join(root, f"target={_PART_UNSAFE.sub('_', tgt)}", f"packet={_PART_UNSAFE.sub('_', pkt)}",
+                        f"date={dt:%Y-%m-%d}", f"hour={dt:%H}")
+
+class _SeriesBuffer:
+    """Tek (target, packet, kind, saat) için satır hizalı kolon listeleri."""
+    __slots__ = ("times", "cols", "created")
+
+    def __init__(self):
+        self.times: List[int] = []
+        self.cols: Dict[str, List[Any]] = {}
+        self.created = time.monotonic()
+
+    def add(self, t_ns: int, fields: Dict[str, Any]) -> None:
+        n = len(self.times)
+        cols = self.cols
+        for k, v in fields.items():
+            col = cols.get(k)
+            if col is None:
+                col = cols[k] = [None] * n
+            col.append(v)
+        self.times.append(t_ns)
+        if len(fields) != len(cols):  # bu kayıtta olmayan kolonlar
+            for col in cols.values():
+                if len(col) == n:
+                    col.append(None)
+
+class ColumnarSink:
+    def __init__(self, directory: str, fmt: str = "parquet", flush_rows: int = 100_000,
+                 max_rows: int = 2_000_000, max_age_sec: float = 300.0, compression: str = "zstd"):
+        import pyarrow as pa
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._pq = pq
+        elif fmt != "arrow":
+            raise ValueError(f"bilinmeyen kolonlu format: {fmt} (parquet|arrow)")
+        self._pa = pa
+        self.directory = directory
+        self.fmt = fmt
+        self.flush_rows = flush_rows
+        self.max_rows = max_rows
+        self.max_age_sec = max_age_sec
+        self.compression = None if compression in ("", "none") else compression
+        self._bufs: Dict[Tuple[str, str, str, int], _SeriesBuffer] = {}
+        self._hour: Dict[Tuple[str, str, str], int] = {}  # seri -> en son açılan saat
+        self._types: Dict[Tuple[str, str, str], Dict[str, Any]] = {}  # seri -> kolon -> arrow tipi
+        self._rows = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.stats = {"rows": 0, "files": 0, "bytes": 0, "errors": 0}
+
+    # lp_convert.Tap imzası
+    def add(self, t_ns: int, tgt: str, pkt: str, kind: str, fields: Dict[str, Any]) -> None:
+        series = (tgt, pkt, kind)
+        hour = t_ns // HOUR_NS
+        key = (tgt, pkt, kind, hour)
+        with self._lock:
+            buf = self._bufs.get(key)
+            if buf is None:
+                last = self._hour.get(series)
+                if last is not None and last < hour:  # seri yeni saate geçti: eski saatler tamamlandı
+                    for old in [k for k in self._bufs if k[:3] == series and k[3] < hour]:
+                        self._flush_key(old)
+                if last is None or hour > last:
+                    self._hour[series] = hour
+                buf = self._bufs[key] = _SeriesBuffer()
+            buf.add(t_ns, fields)
+            self._rows += 1
+            if len(buf.times) >= self.flush_rows:
+                self._flush_key(key)
+            elif self._rows > self.max_rows:
+                self._flush_key(max(self._bufs, key=lambda k: len(self._bufs[k].times)))
+
+    def buffered_rows(self) -> int:
+        return self._rows
+
+    def flush_due(self) -> None:
+        """max_age_sec'ten uzun süredir bekleyen buffer'ları yazar (her dosya geçişinden sonra çağrılır)."""
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, b in self._bufs.items() if now - b.created >= self.max_age_sec]:
+                self._flush_key(key)
+
+    def flush(self) -> None:
+        with self._lock:
+            for key in list(self._bufs):
+                self._flush_key(key)
+
+    def close(self) -> None:
+        self.flush()
+
+    # ---------- yazım (çağıran self._lock'u tutar) ----------
+    def _column(self, series: Tuple[str, str, str], name: str, vals: List[Any]):
+        pa = self._pa
+        types = self._types.setdefault(series, {})
+        want = types.get(name)
+        try:
+            arr = pa.array(vals, type=want)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            arr = pa.array([None if v is None else str(v) for v in vals], type=pa.string())
+        if want is None and arr.type != pa.null():
+            types[name] = arr.type
+        return arr
+
+    def _table(self, series: Tuple[str, str, str], buf: _SeriesBuffer):
+        pa = self._pa
+        n = len(buf.times)
+        names = ["time", "kind", "host"]
+        arrays = [pa.array(buf.times, type=pa.timestamp("ns", tz="UTC")),
+                  pa.DictionaryArray.from_arrays(pa.array([0] * n, type=pa.int8()), pa.array([series[2]])),
+                  pa.DictionaryArray.from_arrays(pa.array([0] * n, type=pa.int8()), pa.array([HOST]))]
+        for name, vals in buf.cols.items():
+            if name in ("time", "kind", "host", "target", "packet", "date", "hour"):
+                continue  # sabit/partition kolonlarıyla çakışan alan adları
+            names.append(name)
+            arrays.append(self._column(series, name, vals))
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def _flush_key(self, key: Tuple[str, str, str, int]) -> None:
+        buf = self._bufs.pop(key, None)
+        if buf is None or not buf.times:
+            return
+        self._rows -= len(buf.times)
+        tgt, pkt, kind, hour = key
+        d = partition_dir(self.directory, tgt, pkt, hour)
+        self._seq += 1
+        path = os.path.join(d, f"part-{buf.times[0]}-{os.getpid()}-{self._seq:06d}.{self.fmt}")
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(d, exist_ok=True)
+            table = self._table((tgt, pkt, kind), buf)
+            if self.fmt == "parquet":
+                self._pq.write_table(table, tmp, compression=self.compression or "none")
+            else:
+                pa = self._pa
+                with pa.OSFile(tmp, "wb") as f, pa.ipc.new_file(f, table.schema) as w:
+                    w.write_table(table)
+            os.replace(tmp, path)
+        except Exception as e:
+            self.stats["errors"] += 1
+            log.error(f"kolonlu part yazılamadı ({path}): {e} — {len(buf.times)} satır atlandı")
+            try: os.remove(tmp)
+            except OSError: pass
+            return
+        self.stats["rows"] += len(buf.times)
+        self.stats["files"] += 1
+        self.stats["bytes"] += os.path.getsize(path)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Influx'a yazmadan önce akış halinde seyreltme / toplama (extract_meta ile to_line_protocol arasında).
+- Hedef başına politika: raw (olduğu gibi), last:N (N sn'lik pencerenin son değerleri),
+  stats:N (sayısal alanlar F_min / F_max / F_mean, diğer alanlar son değer)
+    DOWNSAMPLE="GENERIC_*=stats:10,GENERIC_IMU_DEBUG=stats:1,GENERIC_REACTION_WHEEL_DEBUG=stats:1,GENERIC_EPS_DEBUG=raw"
+  (hızlı sensörler seyreltilir; güç HK'sı ve CFS_DEBUG gibi eşleşmeyen düşük hızlı hedefler raw kalır)
+  Hedef adları fnmatch desenleridir; tam ad her zaman önceliklidir, eşleşen desenlerden sonra yazılan
+  geçerlidir (genel kural başa); hiçbiri eşleşmeyen hedef raw kalır
+- Seri (kind, target, packet) başına tek açık pencere: bellek seri/alan sayısıyla sınırlı, point sayısından bağımsız
+- Pencere, aynı serinin sonraki bir penceresine düşen ilk point'le kapanır ve pencere başlangıcı timestamp'iyle
+  tek point olarak yazılır; kapanmış pencereye düşen geç point'ler sayılıp atlanır
+- flush_idle(): idle_sec (duvar saati) boyunca point gelmeyen serilerin penceresini yazıp kapatır (akış durunca
+  son pencere beklemez); aynı pencereye sonradan gelen point'ler geç sayılır: her pencere tek kez, tek timestamp'le
+  yazılır (HWM kapısı aynı timestamp'in ikinci yazımını zaten atlardı). flush() tümünü yazıp kapatır
+- Açık penceredeki değerler yalnızca bellektedir: süreç çökerse kaybolur (ham veri NDJSON'da kalır)
+- Dönüşüm worker'larında (spawn) DeferStage kullanılır: toplanacak point'ler ana sürece taşınır, pencereler
+  tek bir Downsampler'da sırayla işlenir
+
+Kullanım:
+    python3 downsample.py "GENERIC_REACTION_WHEEL_DEBUG=stats:1" logs/TM_GENERIC_REACTION_WHEEL_DEBUG.ndjson
+"""
+
+import os, sys, time, fnmatch, threading
+from typing import Any, Dict, List, Optional, Tuple
+
+RAW, LAST, STATS = "raw", "last", "stats"
+_MODES = (RAW, LAST, STATS)
+
+# (t_ns, target, packet, kind, fields) — extract_meta çıktısı / lp_convert.Tap argümanları
+Meta = Tuple[int, str, str, str, Dict[str, Any]]
+
+class Policy:
+    __slots__ = ("mode", "interval_ns")
+
+    def __init__(self, mode: str, interval_sec: float = 0.0):
+        if mode not in _MODES:
+            raise ValueError(f"bilinmeyen seyreltme politikası: {mode} (raw|last:N|stats:N)")
+        if mode != RAW and interval_sec <= 0:
+            raise ValueError(f"{mode} politikası pozitif bir aralık ister (ör. {mode}:10)")
+        self.mode = mode
+        self.interval_ns = int(interval_sec * 1e9) if mode != RAW else 0
+
+    def __repr__(self) -> str:
+        return self.mode if self.mode == RAW else f"{self.mode}:{self.interval_ns / 1e9:g}"
+
+def parse_policy(s: str) -> Policy:
+    mode, _, sec = s.strip().partition(":")
+    try:
+        return Policy(mode.strip().lower(), float(sec) if sec else 0.0)
+    except ValueError as e:
+        raise ValueError(f"geçersiz politika '{s}': {e}") from None
+
+def parse_spec(spec: str) -> List[Tuple[str, Policy]]:
+    """'desen=politika' öğeleri (virgül/boşlukla ayrılmış) -> [(desen, Policy)]."""
+    rules: List[Tuple[str, Policy]] = []
+    for item in spec.replace(",", " ").split():
+        pat, eq, pol = item.partition("=")
+        if not eq or not pat:
+            raise ValueError(f"geçersiz DOWNSAMPLE öğesi '{item}' (beklenen: HEDEF=politika)")
+        rules.append((pat, parse_policy(pol)))
+    return rules
+
+_RAW = Policy(RAW)
+
+class PolicyTable:
+    """Hedef -> Policy; sonuçlar önbelleklenir (hedef kümesi küçük ve sabit). Worker'lara pickle ile gider."""
+    __slots__ = ("rules", "_exact", "_patterns", "_cache")
+
+    def __init__(self, rules: List[Tuple[str, Policy]]):
+        self.rules = list(rules)
+        self._exact = {p: pol for p, pol in rules if not any(c in p for c in "*?[")}
+        self._patterns = [(p, pol) for p, pol in reversed(rules) if p not in self._exact]  # son yazılan önce
+        self._cache: Dict[str, Policy] = {}
+
+    def lookup(self, tgt: str) -> Policy:
+        pol = self._cache.get(tgt)
+        if pol is None:
+            pol = self._exact.get(tgt)
+            if pol is None:
+                pol = next((p for pat, p in self._patterns if fnmatch.fnmatchcase(tgt, pat)), _RAW)
+            self._cache[tgt] = pol
+        return pol
+
+    def active(self) -> bool:
+        return any(pol.mode != RAW for _, pol in self.rules)
+
+    def __getstate__(self):
+        return self.rules
+
+    def __setstate__(self, rules):
+        self.__init__(rules)
+
+    def __repr__(self) -> str:
+        return ",".join(f"{p}={pol!r}" for p, pol in self.rules)
+
+class _Window:
+    """Tek serinin açık penceresi. stats: alan -> [min, max, toplam, adet]; last / sayısal olmayan: alan -> değer."""
+    __slots__ = ("bucket", "stats", "last", "touched")
+
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self.stats: Dict[str, List[Any]] = {}
+        self.last: Dict[str, Any] = {}
+        self.touched = time.monotonic()
+
+    def add(self, mode: str, fields: Dict[str, Any]) -> None:
+        if mode == LAST:
+            self.last.update(fields)
+            return
+        stats, last = self.stats, self.last
+        for k, v in fields.items():
+            t = type(v)
+            if t is float or t is int:  # bool hariç
+                if v != v:
+                    continue  # NaN
+                s = stats.get(k)
+                if s is None:
+                    stats[k] = [v, v, v, 1]
+                else:
+                    if v < s[0]: s[0] = v
+                    if v > s[1]: s[1] = v
+                    s[2] += v
+                    s[3] += 1
+            elif v is not None:
+                last[k] = v
+
+    def fields(self) -> Dict[str, Any]:
+        out = dict(self.last)
+        for k, (lo, hi, total, n) in self.stats.items():
+            out[k + "_min"] = lo
+            out[k + "_max"] = hi
+            out[k + "_mean"] = total / n
+        return out
+
+class Downsampler:
+    """
+    feed(): toplanmayan (raw) point için None, aksi halde şimdi yazılacak (kapanan) pencerelerin listesi.
+    Birden fazla ingest thread'inden çağrılabilir.
+    """
+
+    def __init__(self, table: PolicyTable, idle_sec: float = 30.0):
+        self.table = table
+        self.idle_sec = idle_sec
+        self._open: Dict[Tuple[str, str, str], _Window] = {}
+        self._closed: Dict[Tuple[str, str, str], int] = {}  # flush_idle ile kapanan son pencere (seri başına)
+        self._lock = threading.Lock()
+        self.stats = {"in": 0, "out": 0, "late": 0}
+
+    def feed(self, t_ns: int, tgt: str, pkt: str, kind: str, fields: Dict[str, Any]) -> Optional[List[Meta]]:
+        pol = self.table.lookup(tgt)
+        if pol.mode == RAW:
+            return None
+        bucket = t_ns // pol.interval_ns
+        key = (tgt, pkt, kind)
+        out: List[Meta] = []
+        with self._lock:
+            self.stats["in"] += 1
+            w = self._open.get(key)
+            if w is None:
+                closed = self._closed.get(key)
+                if closed is not None and bucket <= closed:
+                    self.stats["late"] += 1
+                    return out
+                w = self._open[key] = _Window(bucket)
+            elif bucket > w.bucket:
+                self._emit(key, w, pol, out)
+                w = self._open[key] = _Window(bucket)
+            elif bucket < w.bucket:
+                self.stats["late"] += 1
+                return out
+            w.add(pol.mode, fields)
+            w.touched = time.monotonic()
+        return out
+
+    def _emit(self, key: Tuple[str, str, str], w: _Window, pol: Policy, out: List[Meta]) -> None:
+        fields = w.fields()
+        if fields:
+            tgt, pkt, kind = key
+            out.append((w.bucket * pol.interval_ns, tgt, pkt, kind, fields))
+            self.stats["out"] += 1
+
+    def flush_idle(self, idle_sec: Optional[float] = None) -> List[Meta]:
+        """idle_sec boyunca point almamış pencereleri yazar ve kapatır."""
+        cutoff = time.monotonic() - (self.idle_sec if idle_sec is None else idle_sec)
+        out: List[Meta] = []
+        with self._lock:
+            for key in [k for k, w in self._open.items() if w.touched <= cutoff]:
+                w = self._open.pop(key)
+                self._emit(key, w, self.table.lookup(key[0]), out)
+                self._closed[key] = w.bucket
+        return out
+
+    def flush(self) -> List[Meta]:
+        """Tüm açık pencereleri yazar ve kapatır (kapanışta)."""
+        out: List[Meta] = []
+        with self._lock:
+            for key, w in self._open.items():
+                self._emit(key, w, self.table.lookup(key[0]), out)
+            self._open.clear()
+        return out
+
+    def open_windows(self) -> int:
+        return len(self._open)
+
+class DeferStage:
+    """
+    Worker süreci tarafı: raw point'ler olduğu gibi LP'ye geçer, toplanacaklar recs'e alınır
+    (ana süreç bunları sırayla Downsampler.feed'e verir).
+    """
+    __slots__ = ("table", "recs")
+
+    def __init__(self, table: PolicyTable):
+        self.table = table
+        self.recs: List[Meta] = []
+
+    def feed(self, t_ns: int, tgt: str, pkt: str, kind: str, fields: Dict[str, Any]) -> Optional[List[Meta]]:
+        if self.table.lookup(tgt).mode == RAW:
+            return None
+        self.recs.append((t_ns, tgt, pkt, kind, fields))
+        return []
+
+    def __getstate__(self):
+        return self.table, self.recs
+
+    def __setstate__(self, state):
+        self.table, self.recs = state
+
+def main(argv: List[str]) -> int:
+    """Bir NDJSON dosyasında politikanın point/LP byte oranını gösterir (Influx'a yazmaz)."""
+    if len(argv) < 2:
+        print(__doc__.strip().split("Kullanım:")[1].rstrip(), file=sys.stderr)
+        return 2
+    from lp_convert import iter_lp_batches, emit_lp
+    ds = Downsampler(PolicyTable(parse_spec(argv[0])))
+    for path in argv[1:]:
+        n_raw = b_raw = 0
+        for rows, _ in iter_lp_batches(path):
+            n_raw += len(rows)
+            b_raw += sum(len(r) + 1 for r in rows)
+        n = b = 0
+        for rows, _ in iter_lp_batches(path, agg=ds):
+            n += len(rows)
+            b += sum(len(r) + 1 for r in rows)
+        tail: List[str] = []
+        emit_lp(ds.flush(), tail)
+        n += len(tail)
+        b += sum(len(r) + 1 for r in tail)
+        print(f"{os.path.basename(path)}: {n_raw} -> {n} point, {b_raw}B -> {b}B"
+              + (f" (x{b_raw / b:.1f} küçük)" if b else "") + f", geç={ds.stats['late']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
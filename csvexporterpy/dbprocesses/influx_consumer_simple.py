@@ -1,19 +1,50 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-NDJSON -> InfluxDB v2 consumer (ESKİ SADE HAL)
-- dbprocesses/logs içindeki *.ndjson dosyalarını izler
-- HWM / dedupe YOK
+NDJSON -> InfluxDB v2 consumer: checkpoint'li kuyruk izleme, uyarlamalı yazım, spool, HWM, seyreltme, kolonlu arşiv
+- dbprocesses/logs içindeki *.ndjson dosyalarını ve downloader'ın kapanmış
+  segmentlerini (*.ndjson.gz / *.ndjson.zst, atomik rename ile gelir) izler
+- Dosya başına byte-offset checkpoint: her olayda sadece yeni eklenen satırlar işlenir
+  (inode değişimi / truncate / baştan yeniden yazım algılanır -> offset 0)
+- Influx'a yazım varsayılan olarak influx_writer.AdaptiveWriter ile: batch boyu, gzip ve eşzamanlı istek sayısı
+  gecikme ve 429/503'lere göre ayarlanır; kuyruk dolunca yazım bloklar (INFLUX_WRITER=batching: eski WriteApi)
+- Influx'a yazılamayan batch'ler diskteki spool'a alınır, Influx dönünce hız sınırıyla yeniden gönderilir
+- Offset (ve hwm) yalnızca Influx'un onayladığı ya da spool'a alınmış batch'lere kadar ilerler: çökmede
+  yazıcı tamponundaki / uçuştaki veri bir sonraki açılışta yeniden okunur
+- HWM_ENABLED=1: seri (target, packet) başına high-water mark; yalnızca hwm'den yeni point'ler yazılır
+  (DEDUPE_MAX>0: hwm ile aynı timestamp'li point'ler sınırlı bir imza kümesiyle ayıklanır)
+- COLUMNAR_DIR doluysa point'ler ayrıca (target, packet) başına saatlik Parquet/Arrow dosyalarına arşivlenir
+  (columnar_sink; pyarrow gerekir). DOWNSAMPLE'la toplanan hedefler arşive seyreltilmeden (tam çözünürlükte,
+  HWM'ye bakılmadan) gider; raw hedefler Influx'a yazılanla aynıdır
+- DOWNSAMPLE doluysa hedef başına seyreltme/toplama (downsample): raw, last:N veya stats:N (min/max/mean);
+  ör. DOWNSAMPLE="GENERIC_IMU_DEBUG=stats:1,GENERIC_REACTION_WHEEL_DEBUG=stats:1,SIM_42_TRUTH=last:1"
+  (yüksek hızlı sensörler seyreltilir; eşleşmeyen HK / düşük hızlı hedefler raw kalır)
 - Flat & items’lı kayıtlar dinamik işlenir
 - measurement = target, tags: packet, kind=TM/TC
 """
 
-import os, platform, sys, json, math, logging, time, threading
-from typing import Any, Dict, List, Optional, Tuple
+import os, sys, json, logging, shutil, time, threading, zlib, multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from influxdb_client import InfluxDBClient, WriteOptions
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+import ndjson_codec as codec  # downloader ile ortak JSON codec (orjson > simdjson > json)
+from lp_convert import (
+    esc_measurement, esc_tag, norm_field_key, format_field_value, series_prefix,
+    split_packet_key, extract_meta, to_line_protocol,
+    is_compressed, open_ndjson, ndjson_file_to_lp, ndjson_tail_to_lp, iter_lp_batches,
+    complete_end, chunk_ranges, convert_range, emit_lp, HwmGate, Tap, SEGMENT_RE, stats as lp_stats,
+)
+from influx_spool import LPSpool, SpoolBusy, SpoolReplayer
+from influx_writer import AdaptiveWriter
+from columnar_sink import ColumnarSink
+from downsample import Downsampler, DeferStage, PolicyTable, parse_spec
+import metrics
 
 # ===================== ENV & LOG =====================
 INFLUX_URL    = "10.1.208.88:8086"
@@ -27,7 +58,42 @@ if not all([INFLUX_URL, INFLUX_ORG, INFLUX_BUCKET, INFLUX_TOKEN]):
 BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
 NDJSON_DIR  = os.path.join(BASE_DIR, "logs")
 LOG_LEVEL       = os.getenv("LOG_LEVEL", "INFO").upper()
-DEBOUNCE_SEC    = float(os.getenv("DEBOUNCE_SEC", "2.0"))
+DEBOUNCE_SEC    = float(os.getenv("DEBOUNCE_SEC", "2.0"))     # son olaydan sonra beklenen sessizlik (min gecikme)
+MAX_LATENCY_SEC = float(os.getenv("MAX_LATENCY_SEC", "10.0"))  # sürekli yazılan dosya en geç bu kadar bekler
+INGEST_WORKERS  = int(os.getenv("INGEST_WORKERS", "1"))        # aynı anda işlenen dosya sayısı (1: sırayla)
+OFFSETS_PATH    = os.getenv("OFFSETS_PATH", os.path.join(NDJSON_DIR, ".ndjson_offsets.json"))
+HEAD_CHECK_LEN  = 256  # baştan yeniden yazımı yakalamak için imzası tutulan ilk byte sayısı
+ARCHIVE_DIR     = os.getenv("ARCHIVE_DIR", "")  # doluysa işlenen kapalı segmentler buraya taşınır
+CONVERT_WORKERS     = int(os.getenv("CONVERT_WORKERS", "0"))  # >0: NDJSON->LP dönüşümü süreç havuzunda (HWM_ENABLED=1 iken kullanılmaz)
+CONVERT_CHUNK_BYTES = int(os.getenv("CONVERT_CHUNK_BYTES", str(4 * 1024 * 1024)))  # worker başına parça
+HWM_ENABLED         = os.getenv("HWM_ENABLED", "0") == "1"  # seri başına hwm: yalnızca yeni point'ler yazılır
+HWM_PATH            = os.getenv("HWM_PATH", os.path.join(NDJSON_DIR, ".series_hwm.json"))
+DEDUPE_MAX          = int(os.getenv("DEDUPE_MAX", "0"))  # >0: hwm ile aynı timestamp'li point'ler için imza kümesi
+SPOOL_ENABLED       = os.getenv("SPOOL_ENABLED", "1") == "1"  # Influx'a yazılamayan batch'ler diske
+SPOOL_DIR           = os.getenv("SPOOL_DIR", os.path.join(BASE_DIR, "spool"))
+SPOOL_MAX_BYTES     = int(os.getenv("SPOOL_MAX_BYTES", str(1024 * 1024 * 1024)))  # aşılırsa en eski segment silinir
+SPOOL_SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+SPOOL_FSYNC         = os.getenv("SPOOL_FSYNC", "0") == "1"
+SPOOL_REPLAY_PPS    = float(os.getenv("SPOOL_REPLAY_PPS", "50000"))  # geri gelen Influx'u boğmamak için
+METRICS_PORT        = int(os.getenv("CONSUMER_METRICS_PORT", "0"))  # >0: http://METRICS_ADDR:port/metrics
+INFLUX_WRITER       = os.getenv("INFLUX_WRITER", "adaptive")  # adaptive | batching (influxdb-client WriteApi)
+INFLUX_GZIP         = os.getenv("INFLUX_GZIP", "auto")  # auto | on | off (adaptive)
+INFLUX_BATCH_MIN    = int(os.getenv("INFLUX_BATCH_MIN", "500"))
+INFLUX_BATCH_MAX    = int(os.getenv("INFLUX_BATCH_MAX", "50000"))
+INFLUX_INFLIGHT_MAX = int(os.getenv("INFLUX_INFLIGHT_MAX", "8"))  # eşzamanlı yazım isteği üst sınırı
+INFLUX_TARGET_LATENCY = float(os.getenv("INFLUX_TARGET_LATENCY", "0.5"))  # istek başına hedef gecikme (s)
+INFLUX_BUFFER_BYTES = int(os.getenv("INFLUX_BUFFER_BYTES", str(64 * 1024 * 1024)))  # aşılırsa yazım bloklar
+INFLUX_FLUSH_SEC    = float(os.getenv("INFLUX_FLUSH_SEC", "1.0"))  # eksik batch en geç bu kadar bekler
+COLUMNAR_DIR         = os.getenv("COLUMNAR_DIR", "")  # doluysa Parquet/Arrow arşivi (boş: kapalı)
+COLUMNAR_FORMAT      = os.getenv("COLUMNAR_FORMAT", "parquet")  # parquet | arrow (IPC, mmap'lenebilir)
+COLUMNAR_COMPRESSION = os.getenv("COLUMNAR_COMPRESSION", "zstd")  # yalnızca parquet; none: sıkıştırmasız
+COLUMNAR_FLUSH_ROWS  = int(os.getenv("COLUMNAR_FLUSH_ROWS", "100000"))  # seri-saat buffer'ı başına part boyu
+COLUMNAR_MAX_ROWS    = int(os.getenv("COLUMNAR_MAX_ROWS", "2000000"))  # bellekteki toplam satır üst sınırı
+COLUMNAR_MAX_AGE_SEC = float(os.getenv("COLUMNAR_MAX_AGE_SEC", "300"))  # buffer en geç bu kadar bekler
+DOWNSAMPLE           = os.getenv("DOWNSAMPLE", "")  # hedef=politika listesi (boş: kapalı, her şey raw)
+DOWNSAMPLE_IDLE_SEC  = float(os.getenv("DOWNSAMPLE_IDLE_SEC", "30"))  # point gelmeyen seri penceresi bu kadar sonra yazılır
+
+NDJSON_SUFFIXES = (".ndjson", ".ndjson.gz", ".ndjson.zst")
 
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL, logging.INFO),
@@ -36,144 +102,602 @@ logging.basicConfig(
 )
 log = logging.getLogger("consumer")
 
+# ===================== Metrics =====================
+M_POINTS    = metrics.counter("nos3_ingest_points_total", "Influx'a verilen point sayısı", ["source"])
+M_LP_BYTES  = metrics.counter("nos3_ingest_lp_bytes_total", "Influx'a verilen line protocol boyutu (byte)", ["source"])
+M_DUPES     = metrics.counter("nos3_ingest_duplicates_total", "HWM/dedupe ile atlanan point sayısı", ["source"])
+M_PASS_SEC  = metrics.histogram("nos3_ingest_pass_seconds", "Bir dosya geçişinin süresi", ["source"])
+M_PPS       = metrics.gauge("nos3_ingest_points_per_second", "Son dosya geçişindeki point/s", ["source"])
+M_WRITE_SEC = metrics.histogram("nos3_influx_write_seconds",
+                                "Influx yazım süresi (batch: HTTP isteği — batching modunda kuyruğa alma, "
+                                "replay: HTTP isteği)", ["path"])
+M_BATCHES   = metrics.counter("nos3_influx_batches_total", "Influx yazım batch sonuçları", ["result"])
+metrics.counter("nos3_ingest_parse_errors_total", "Parse edilemeyen NDJSON satırı").set_function(
+    lambda: lp_stats["parse_errors"])
+
+def source_of(path: str) -> str:
+    """Metrik etiketi: dosya adının ilk noktaya kadarki kısmı (TM_CFS_DEBUG.2025...ndjson -> TM_CFS_DEBUG)."""
+    return os.path.basename(path).split(".", 1)[0]
+
 # ===================== Influx =====================
-client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG, enable_gzip=True)
-write_api = client.write_api(write_options=WriteOptions(batch_size=10_000, flush_interval=1_000))
-
-# ===================== LP helpers =====================
-def esc_measurement(s: str) -> str:
-    return s.replace(",", r"\,").replace(" ", r"\ ")
-
-def esc_tag(s: str) -> str:
-    return s.replace(",", r"\,").replace(" ", r"\ ").replace("=", r"\=")
-
-def norm_field_key(s: str) -> str:
-    out = []
-    for ch in s:
-        out.append(ch if (ch.isalnum() or ch in ("_", ".", "-", ":")) else "_")
-    return "".join(out)
-
-def format_field_value(v: Any) -> Optional[str]:
-    if v is None: return None
-    if isinstance(v, bool):  return "true" if v else "false"
-    if isinstance(v, int):   return f"{v}i"
-    if isinstance(v, float):
-        if math.isnan(v) or math.isinf(v): return None
-        return str(v)
-    s = str(v).replace("\\", "\\\\").replace("\"", "\\\"")
-    return f"\"{s}\""
-
-# ===================== Meta extraction =====================
-def split_packet_key(pktkey: str) -> Tuple[Optional[str], Optional[str], str]:
-    # "DECOM__TLM__CFS_DEBUG__SC_HKTLM" -> ("CFS_DEBUG","SC_HKTLM","TM")
-    # "DECOM__CMD__CFS_DEBUG__SC_CMD"   -> ("CFS_DEBUG","SC_CMD","TC")
-    parts = str(pktkey).split("__")
-    if len(parts) >= 4:
-        kind = "TC" if parts[1] == "CMD" else "TM"
-        return parts[2], parts[3], kind
-    return None, None, "TM"
-
-def extract_meta(rec: Dict[str, Any]):
+# İstemci import anında değil init_influx() ile kurulur: dönüşüm worker'ları (spawn) bu modülü
+# yeniden import ettiğinde Influx bağlantısı/yazıcı thread'leri açılmasın.
+client: Optional[InfluxDBClient] = None  # yalnızca INFLUX_WRITER=batching
+write_api = None  # AdaptiveWriter ya da batching WriteApi
+spool: Optional[LPSpool] = None
+_replayer: Optional[SpoolReplayer] = None
+
+# batching modunda yazım onayı: WriteApi batch'leri tek tek, sırayla gönderdiğinden callback'lerde sonuçlanan
+# point sayısı sıralı bir konumdur (AdaptiveWriter.acked karşılığı)
+# WriteApi'nin zaman/sayı penceresi yarışında bir batch hiç gönderilmeyebilir (callback de gelmez): onay en fazla
+# bu kadar beklenir, gelmeyen kısmın offset'i ilerlemez ve dosyanın sonraki olayında yeniden okunur
+BATCH_ACK_TIMEOUT_SEC = 60.0
+_batch_enq = 0
+_batch_acked = 0
+_batch_cv = threading.Condition()
+# WriteApi.write ile close aynı anda çalışmamalı: kapanırken verilen kayıt sessizce kaybolur
+# (callback'ler _batch_cv'yi aldığından close bu kilitle değil _batch_write_lock ile korunur)
+_batch_write_lock = threading.Lock()
+
+def _batch_done(data) -> None:
+    global _batch_acked
+    n = data.count(b"\n" if isinstance(data, bytes) else "\n") + 1 if data else 0
+    with _batch_cv:
+        _batch_acked += n
+        _batch_cv.notify_all()
+
+def _spool_failed(data, exception) -> None:
+    M_BATCHES.inc(result="error")
+    log.error(f"Influx batch yazılamadı ({exception})" + ("; spool'a alınıyor" if spool else ""))
+    if spool:
+        spool.append(data)
+
+def _on_write_success(conf, data):
+    M_BATCHES.inc(result="ok")
+    _batch_done(data)
+
+def _on_write_retry(conf, data, exception):
+    M_BATCHES.inc(result="retry")
+
+def _on_write_error(conf, data, exception):
+    # batching write_api retry'ları tükettiğinde çağrılır; data gönderilemeyen LP gövdesidir
+    _spool_failed(data, exception)
+    _batch_done(data)
+
+def _on_adaptive_success(n: int, sec: float):
+    M_BATCHES.inc(result="ok")
+    M_WRITE_SEC.observe(sec, path="batch")
+
+def _on_adaptive_retry(n: int, exception: Exception):
+    M_BATCHES.inc(result="retry")
+
+def _on_adaptive_error(body: bytes, exception: Exception):
+    _spool_failed(body, exception)
+
+def init_influx():
+    global client, write_api, spool, _replayer
+    if write_api is None:
+        if INFLUX_WRITER == "batching":
+            client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG, enable_gzip=True)
+            write_api = client.write_api(write_options=WriteOptions(batch_size=10_000, flush_interval=1_000),
+                                         success_callback=_on_write_success, error_callback=_on_write_error,
+                                         retry_callback=_on_write_retry)
+        else:
+            write_api = AdaptiveWriter(INFLUX_URL, INFLUX_TOKEN, INFLUX_ORG, INFLUX_BUCKET, gzip_mode=INFLUX_GZIP,
+                                       min_batch=INFLUX_BATCH_MIN, max_batch=INFLUX_BATCH_MAX,
+                                       max_inflight=INFLUX_INFLIGHT_MAX, target_latency=INFLUX_TARGET_LATENCY,
+                                       max_buffer_bytes=INFLUX_BUFFER_BYTES, flush_interval=INFLUX_FLUSH_SEC,
+                                       on_success=_on_adaptive_success, on_retry=_on_adaptive_retry,
+                                       on_error=_on_adaptive_error)
+        if SPOOL_ENABLED:
+            try:
+                spool = LPSpool(SPOOL_DIR, segment_bytes=SPOOL_SEGMENT_BYTES, max_bytes=SPOOL_MAX_BYTES,
+                                fsync=SPOOL_FSYNC)
+            except SpoolBusy as e:
+                # aynı dizini paylaşan iki süreç birbirinin segmentlerini gönderip silerdi
+                print(f"Hata: {e}; bu süreç için farklı bir SPOOL_DIR verin (ya da SPOOL_ENABLED=0)",
+                      file=sys.stderr)
+                sys.exit(1)
+            if client is not None:
+                replay_api = client.write_api(write_options=SYNCHRONOUS)
+                send = lambda body: replay_api.write(bucket=INFLUX_BUCKET, org=INFLUX_ORG, record=body)
+            else:
+                send = write_api.send
+
+            def replay_write(body: bytes):
+                t0 = time.time()
+                send(body)
+                M_WRITE_SEC.observe(time.time() - t0, path="replay")
+
+            _replayer = SpoolReplayer(spool, replay_write, rate_pps=SPOOL_REPLAY_PPS)
+            _replayer.start()
+            depth_bytes, segments = spool.depth()
+            if segments:
+                log.info(f"spool'da bekleyen veri: {segments} segment, {depth_bytes}B — yeniden gönderilecek")
+    return write_api
+
+def spool_depth() -> Tuple[int, int]:
+    """(byte, segment) — Influx'a henüz ulaşmamış spool'daki veri."""
+    return spool.depth() if spool else (0, 0)
+
+metrics.gauge("nos3_spool_bytes", "Influx'a henüz ulaşmamış spool verisi (byte)").set_function(
+    lambda: spool_depth()[0])
+metrics.gauge("nos3_spool_segments", "Spool'daki segment sayısı").set_function(lambda: spool_depth()[1])
+metrics.counter("nos3_spool_replayed_points_total", "Spool'dan yeniden gönderilen point").set_function(
+    lambda: _replayer.stats["replayed_points"] if _replayer else 0)
+metrics.counter("nos3_spool_quarantined_points_total",
+                "Influx'un kalıcı olarak reddettiği, .bad dosyasına alınan spool point'i").set_function(
+    lambda: _replayer.stats["quarantined_points"] if _replayer else 0)
+
+def _adaptive() -> Optional[AdaptiveWriter]:
+    return write_api if isinstance(write_api, AdaptiveWriter) else None
+
+metrics.gauge("nos3_influx_batch_points", "Adaptive yazıcının güncel batch boyu").set_function(
+    lambda: _adaptive().batch_points if _adaptive() else 0)
+metrics.gauge("nos3_influx_inflight_limit", "Adaptive yazıcının eşzamanlı istek sınırı").set_function(
+    lambda: _adaptive().inflight_limit if _adaptive() else 0)
+metrics.gauge("nos3_influx_gzip", "Adaptive yazıcı gzip kullanıyor mu (0/1)").set_function(
+    lambda: int(_adaptive().gzip) if _adaptive() else 0)
+metrics.gauge("nos3_influx_buffer_bytes", "Influx'a gönderilmeyi bekleyen LP (byte)").set_function(
+    lambda: _adaptive().buffered()[0] if _adaptive() else 0)
+metrics.gauge("nos3_influx_backpressure", "Yazım kuyruğu doluluğu (0..1; 1'de ingestion bloklar)").set_function(
+    lambda: _adaptive().pressure() if _adaptive() else 0)
+metrics.counter("nos3_influx_blocked_seconds_total", "Kuyruk dolu olduğu için yazımın beklediği süre").set_function(
+    lambda: _adaptive().stats["blocked_sec"] if _adaptive() else 0)
+
+def write_points(rows: List[Any], source: str = "", n: Optional[int] = None) -> int:
+    """
+    write_api'ye verir; istemci tarafında hemen hata olursa (kuyruk/serileştirme) batch spool'a alınır.
+    n: point sayısı (rows hazır LP buffer'ıysa verilmeli; yoksa len(rows)).
+    Adaptive yazıcıda kuyruk doluysa yer açılana kadar bloklar (backpressure).
+    Dönüş: yazım konumu; durable(konum) True olunca bu ve önceki batch'ler Influx'ta ya da spool'dadır.
+    """
+    global _batch_enq
+    k = len(rows) if n is None else n
+    M_POINTS.inc(k, source=source)
+    M_LP_BYTES.inc(sum(len(r) for r in rows), source=source)
+    t0 = time.time()
+    try:
+        if _adaptive():
+            return write_api.write(rows, n)
+        with _batch_write_lock:
+            if write_api is None:
+                raise RuntimeError("Influx yazıcısı kapalı")
+            write_api.write(bucket=INFLUX_BUCKET, org=INFLUX_ORG, record=rows)
+            with _batch_cv:
+                _batch_enq += k
+                pos = _batch_enq
+        M_WRITE_SEC.observe(time.time() - t0, path="batch")
+        return pos
+    except Exception as e:
+        if not spool:
+            raise
+        log.error(f"Influx yazım hatası ({e}); {len(rows)} kayıt spool'a alınıyor")
+        spool.append(rows)
+        return 0  # spool'da: hemen kalıcı
+
+def durable(pos: int) -> bool:
+    if write_api is None:  # kapanmış yazıcı: verilen her şey gönderildi ya da spool'da
+        return True
+    if _adaptive():
+        return write_api.acked >= pos
+    return _batch_acked >= pos
+
+def wait_durable(pos: int) -> bool:
+    """
+    pos'a kadarki tüm batch'ler sonuçlanana kadar bekler (yazıcı, retry'lar tükenince spool'a alır).
+    batching modunda en fazla BATCH_ACK_TIMEOUT_SEC; False: onay gelmedi.
+    """
+    if write_api is None:
+        return True
+    if _adaptive():
+        return write_api.wait_acked(pos)
+    with _batch_cv:
+        return _batch_cv.wait_for(lambda: _batch_acked >= pos, timeout=BATCH_ACK_TIMEOUT_SEC)
+
+def close_influx() -> None:
+    """
+    Yazıcıyı boşaltıp kapatır; döndüğünde verilmiş tüm batch'ler Influx'ta ya da spool'dadır.
+    batching: yeni yazımlarla aynı kilit altında tüm callback'ler beklenip kapatılır.
+    """
+    global write_api, client, spool, _replayer
+    if write_api is None:
+        return
+    if _adaptive():
+        write_api.close()  # kuyruğu boşaltıp uçuştaki istekleri bekler
+        write_api = None
+    else:
+        # WriteApi.close() son tamponu gönderilmeden atabilir: önce tüm batch'lerin callback'i (flush_interval
+        # ile gönderilir) beklenir, sonra kapatılır; arada yeni yazım girmez
+        with _batch_write_lock:
+            with _batch_cv:
+                if not _batch_cv.wait_for(lambda: _batch_acked >= _batch_enq, timeout=BATCH_ACK_TIMEOUT_SEC):
+                    log.warning(f"kapanışta {_batch_enq - _batch_acked} point'in sonucu alınamadı")
+            try: write_api.close()
+            except Exception as e: log.warning(f"Influx yazıcısı kapatılamadı: {e}")
+            write_api = None
+    if _replayer:
+        _replayer.stop()
+    if spool:
+        spool.close()
+    if client is not None:
+        client.close()
+    client = spool = _replayer = None
+
+# ===================== Kolonlu arşiv =====================
+_columnar: Optional[ColumnarSink] = None
+
+def init_columnar() -> Optional[ColumnarSink]:
+    global _columnar
+    if COLUMNAR_DIR and _columnar is None:
+        try:
+            _columnar = ColumnarSink(COLUMNAR_DIR, fmt=COLUMNAR_FORMAT, flush_rows=COLUMNAR_FLUSH_ROWS,
+                                     max_rows=COLUMNAR_MAX_ROWS, max_age_sec=COLUMNAR_MAX_AGE_SEC,
+                                     compression=COLUMNAR_COMPRESSION)
+        except ImportError as e:
+            log.error(f"COLUMNAR_DIR ayarlı ama pyarrow yok ({e}); kolonlu arşiv kapalı")
+    return _columnar
+
+def close_columnar() -> None:
+    if _columnar:
+        _columnar.close()
+
+metrics.counter("nos3_columnar_rows_total", "Kolonlu arşive yazılan satır").set_function(
+    lambda: _columnar.stats["rows"] if _columnar else 0)
+metrics.counter("nos3_columnar_files_total", "Yazılan Parquet/Arrow part dosyası").set_function(
+    lambda: _columnar.stats["files"] if _columnar else 0)
+metrics.gauge("nos3_columnar_buffered_rows", "Kolonlu arşivde henüz diske yazılmamış satır").set_function(
+    lambda: _columnar.buffered_rows() if _columnar else 0)
+
+# ===================== Seyreltme / toplama =====================
+_downsampler: Optional[Downsampler] = None
+
+def init_downsample() -> Optional[Downsampler]:
+    global _downsampler
+    if DOWNSAMPLE and _downsampler is None:
+        try:
+            table = PolicyTable(parse_spec(DOWNSAMPLE))
+        except ValueError as e:
+            print(f"Hata: DOWNSAMPLE: {e}", file=sys.stderr)
+            sys.exit(1)
+        if table.active():
+            _downsampler = Downsampler(table, idle_sec=DOWNSAMPLE_IDLE_SEC)
+    return _downsampler
+
+def flush_downsample(final: bool = False) -> None:
+    """Uzun süredir point almamış (final=True: tüm) pencereleri Influx'a (ve kolonlu arşive) yazar."""
+    if _downsampler is None:
+        return
+    metas = _downsampler.flush() if final else _downsampler.flush_idle()
+    if not metas:
+        return
+    rows: List[str] = []
+    gate = hwm_gate()
+    emit_lp(metas, rows, gate)  # ham point'ler kolonlu arşive feed sırasında verildi
+    if rows:
+        write_points(rows, "downsample")
+    commit_hwm(gate)
+
+metrics.counter("nos3_downsample_in_points_total", "Toplama penceresine giren point").set_function(
+    lambda: _downsampler.stats["in"] if _downsampler else 0)
+metrics.counter("nos3_downsample_out_points_total", "Pencerelerden üretilen point").set_function(
+    lambda: _downsampler.stats["out"] if _downsampler else 0)
+metrics.counter("nos3_downsample_late_points_total", "Kapanmış pencereye düştüğü için atlanan point").set_function(
+    lambda: _downsampler.stats["late"] if _downsampler else 0)
+metrics.gauge("nos3_downsample_open_windows", "Açık toplama penceresi (seri) sayısı").set_function(
+    lambda: _downsampler.open_windows() if _downsampler else 0)
+
+# ===================== Dönüşüm havuzu =====================
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+def start_convert_pool(workers: int = CONVERT_WORKERS) -> None:
+    global _pool, _pool_workers
+    if workers > 0 and _pool is None:
+        if HWM_ENABLED:
+            log.warning("HWM_ENABLED=1: hwm kapısı sırayla işlenmeli, dönüşüm havuzu kullanılmayacak")
+            return
+        _pool_workers = workers
+        # thread'li süreçte fork güvenli değil; worker'lar yalnızca lp_convert'i kullanır
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def stream_tail(path: str, start: int, gate: Optional[HwmGate] = None,
+                tap: Optional[Tap] = None) -> Iterator[Tuple[List[Any], int, int]]:
     """
-    Her kayıttan (t_ns, target, packet, kind, fields) çıkar.
-    t_ns: PACKET_TIMESECONDS(ns) > __time > time
+    path'in start'tan sonraki tam satırlarını akış halinde LP'ye çevirir.
+    Üretilen öğe: (write_api'ye verilecek kayıtlar, point sayısı, bu öğeden sonra commit edilebilecek offset).
+    Havuz yoksa LP_BATCH_SIZE'lık batch'ler, varsa satır hizalı parçaların worker'lardan gelen
+    hazır LP buffer'ları (bytes) sırayla gelir; aynı anda en fazla 2*worker parça bellekte tutulur.
+    gate verilirse her öğe üretildiğinde o öğeye kadarki hwm'yi taşır. gate ile havuz kullanılmaz: worker'lara
+    giden anlık hwm kopyası önceki parçaların sonucunu görmediğinden parçalar arası tekrarlar kaçardı.
+    tap, öğedeki (seyreltme açıksa toplanan) point'lerin extract_meta çıktılarıyla öğe üretilmeden önce çağrılır
+    (havuzda worker'lar bu çıktıları toplayıp döner, tap ana süreçte parça sırasıyla çağrılır).
+    Seyreltme açıksa toplanacak point'ler havuzda worker'lardan ham gelir, pencereler ana süreçte işlenir.
     """
-    # items'lı form
-    if "items" in rec and ("time" in rec and "target" in rec and "packet" in rec):
-        t_ns = rec.get("time")
-        items = rec.get("items") or []
-        if t_ns is None or not items: return None, None, None, "TM", {}
-        fields: Dict[str, Any] = {}
-        for it in items:
-            name = it.get("name")
-            if not name: continue
-            val = it.get("converted")
-            if val is None: val = it.get("formatted")
-            if val is None: val = it.get("raw")
-            if val is None: val = it.get("value")
-            fields[str(name)] = val
-        return int(t_ns), str(rec["target"]), str(rec["packet"]), "TM", fields
-
-    # flat form
-    t_ns: Optional[int] = None
-    if "PACKET_TIMESECONDS" in rec:
-        try: t_ns = int(float(rec["PACKET_TIMESECONDS"]) * 1e9)
-        except Exception: t_ns = None
-    if t_ns is None: t_ns = rec.get("__time") or rec.get("time")
-    if t_ns is None: return None, None, None, "TM", {}
-
-    tgt = pkt = None
-    kind = "TM"
-    pktkey = rec.get("__packet")
-    if pktkey:
-        tgt, pkt, kind = split_packet_key(pktkey)
-    if tgt is None: tgt = rec.get("target")
-    if pkt is None: pkt = rec.get("packet")
-    if tgt is None or pkt is None: return None, None, None, "TM", {}
-
-    skip_keys = {"__time","__packet","__type","target","packet","time"}
-    fields: Dict[str, Any] = {}
-    for k, v in rec.items():
-        if isinstance(k, str) and (k in skip_keys or k.startswith("__")):
-            continue
-        fields[str(k)] = v
-
-    return int(t_ns), str(tgt), str(pkt), kind, fields
-
-def to_line_protocol(tgt: str, pkt: str, kind: str, fields: Dict[str, Any], t_ns: int) -> Optional[str]:
-    pairs = []
-    for k, v in fields.items():
-        fv = format_field_value(v)
-        if fv is None: continue
-        pairs.append(f"{norm_field_key(k)}={fv}")
-    if not pairs: return None
-    meas = esc_measurement(tgt)  # measurement = target
-    host = os.environ.get("HOSTNAME") or platform.node()  # yeni ek: host adı ortam değişkeninden
-    tag_part = f"packet={esc_tag(pkt)},kind={kind},host={esc_tag(host)}"
-    return f"{meas},{tag_part} {','.join(pairs)} {t_ns}"
-# ===================== NDJSON -> LP =====================
-def ndjson_file_to_lp(path: str) -> List[str]:
-    lp: List[str] = []
-    total = parsed = 0
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s: continue
-            total += 1
+    agg = _downsampler
+    if _pool is None or gate is not None:
+        for rows, end in iter_lp_batches(path, start, gate=gate, tap=tap, agg=agg):
+            yield rows, len(rows), end
+        return
+    end = complete_end(path, start)
+    if end <= start:
+        yield [], 0, start
+        return
+    ranges = iter(chunk_ranges(path, start, end, CONVERT_CHUNK_BYTES))
+    pending: "deque[Tuple[int, Any]]" = deque()
+
+    def submit_next():
+        r = next(ranges, None)
+        if r is not None:
+            defer = DeferStage(agg.table) if agg else None
+            pending.append((r[1], _pool.submit(convert_range, path, r[0], r[1], None, tap is not None, defer)))
+
+    for _ in range(2 * _pool_workers):
+        submit_next()
+    while pending:  # parça sırası korunur
+        b, fut = pending.popleft()
+        buf, k, _, recs, defer = fut.result()
+        if tap and recs:
+            for meta in recs: tap(*meta)
+        out = [buf] if k else []
+        if defer and defer.recs:
+            rows: List[str] = []
+            for meta in defer.recs:
+                closed = agg.feed(*meta)
+                if closed: emit_lp(closed, rows)  # ham hali worker'da recs'e (tap) alındı
+            if rows:
+                out.append("\n".join(rows).encode("utf-8"))
+                k += len(rows)
+        submit_next()
+        yield out, k, b
+
+# ===================== Tail checkpoint =====================
+# dosya adı -> {"dev","ino","offset","head_len","head_crc"}
+_offsets: Dict[str, Dict[str, int]] = {}
+_offsets_lock = threading.Lock()
+
+def _head_crc(path: str, n: int) -> int:
+    with open(path, "rb") as f:
+        return zlib.crc32(f.read(n))
+
+def load_offsets() -> None:
+    try:
+        with open(OFFSETS_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        log.warning(f"offset dosyası okunamadı ({OFFSETS_PATH}): {e} — baştan başlanıyor")
+        return
+    if isinstance(data, dict):
+        # artık var olmayan (arşivlenmiş/silinmiş) dosyaların checkpoint'leri taşınmaz
+        live = {k: v for k, v in data.items()
+                if isinstance(v, dict) and os.path.exists(os.path.join(NDJSON_DIR, k))}
+        with _offsets_lock:
+            _offsets.update(live)
+
+def _save_offsets() -> None:
+    # çağıran _offsets_lock'u tutar; atomik yazım (tmp + rename)
+    tmp = OFFSETS_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_offsets, f)
+    os.replace(tmp, OFFSETS_PATH)
+
+def resume_offset(path: str, st: os.stat_result) -> int:
+    """Kayıtlı checkpoint hâlâ geçerliyse offset'i, değilse 0 döner."""
+    base = os.path.basename(path)
+    with _offsets_lock:
+        cp = _offsets.get(base)
+    if not cp:
+        return 0
+    if cp.get("dev") != st.st_dev or cp.get("ino") != st.st_ino:
+        log.info(f"{base} -> inode değişti, baştan okunuyor")
+        return 0
+    off = int(cp.get("offset", 0))
+    if st.st_size < off:
+        log.info(f"{base} -> truncate algılandı ({st.st_size}B < {off}B), baştan okunuyor")
+        return 0
+    head_len = int(cp.get("head_len", 0))
+    if head_len:
+        try:
+            if _head_crc(path, head_len) != cp.get("head_crc"):
+                log.info(f"{base} -> dosya baştan yeniden yazılmış, baştan okunuyor")
+                return 0
+        except FileNotFoundError:
+            return 0
+    return off
+
+def drop_offset(path: str) -> None:
+    with _offsets_lock:
+        if _offsets.pop(os.path.basename(path), None) is not None:
             try:
-                obj = json.loads(s); parsed += 1
-            except Exception:
-                continue
-            recs = obj if isinstance(obj, list) else [obj]
-            for rec in recs:
-                if not isinstance(rec, dict): continue
-                t_ns, tgt, pkt, kind, fields = extract_meta(rec)
-                if (t_ns is None) or (tgt is None) or (pkt is None) or not fields:
-                    continue
-                row = to_line_protocol(tgt, pkt, kind, fields, t_ns)
-                if row: lp.append(row)
-    return lp
-
-# ===================== Watcher (timer-debounce) =====================
-_pending_timers: Dict[str, threading.Timer] = {}
+                _save_offsets()
+            except Exception as e:
+                log.warning(f"offset dosyası yazılamadı ({OFFSETS_PATH}): {e}")
+
+def archive_segment(path: str) -> None:
+    """Tamamen işlenmiş kapalı segmenti ARCHIVE_DIR'e taşır."""
+    if not ARCHIVE_DIR or not SEGMENT_RE.search(path):
+        return
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    shutil.move(path, os.path.join(ARCHIVE_DIR, os.path.basename(path)))
+    drop_offset(path)
+
+def commit_offset(path: str, st: os.stat_result, offset: int) -> None:
+    base = os.path.basename(path)
+    head_len = min(offset, HEAD_CHECK_LEN)
+    cp = {
+        "dev": st.st_dev, "ino": st.st_ino, "offset": offset,
+        "head_len": head_len, "head_crc": _head_crc(path, head_len) if head_len else 0,
+    }
+    with _offsets_lock:
+        _offsets[base] = cp
+        try:
+            _save_offsets()
+        except Exception as e:
+            log.warning(f"offset dosyası yazılamadı ({OFFSETS_PATH}): {e}")
+
+def commit_durable(path: str, st: os.stat_result,
+                   pending: "deque[Tuple[int, int, Optional[HwmGate]]]", wait: bool = False) -> bool:
+    """
+    pending: dosya sırasıyla (yazım konumu, sonrasındaki offset, o ana kadarki hwm kopyası).
+    Baştan itibaren kalıcı olan (Influx'ta ya da spool'da) en uzun önek için offset ve hwm commit edilir.
+    wait=True: önce tümünün sonuçlanması beklenir (dosya geçişinin sonu). Dönüş: pending boşaldı mı.
+    """
+    if wait and pending:
+        wait_durable(max(p[0] for p in pending))
+    last = None
+    while pending and durable(pending[0][0]):
+        last = pending.popleft()
+    if last is not None:
+        commit_offset(path, st, last[1])
+        commit_hwm(last[2])
+    return not pending
+
+# ===================== Seri HWM =====================
+# "kind|target|packet" -> yazılmış en yeni timestamp (ns). Üst üste binen pencerelerle yeniden
+# dump edilen dosyalardaki eski point'ler Influx'a tekrar gönderilmez. İmza kümesi yalnızca bellekte.
+_hwm = HwmGate(dedupe_max=DEDUPE_MAX)
+_hwm_lock = threading.Lock()
+
+def load_hwm() -> None:
+    try:
+        with open(HWM_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        log.warning(f"hwm dosyası okunamadı ({HWM_PATH}): {e} — boş başlanıyor")
+        return
+    if isinstance(data, dict):
+        with _hwm_lock:
+            _hwm.hwm.update({k: int(v) for k, v in data.items()})
+
+def _save_hwm() -> None:
+    # çağıran _hwm_lock'u tutar; atomik yazım (tmp + rename)
+    tmp = HWM_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_hwm.hwm, f)
+    os.replace(tmp, HWM_PATH)
+
+def hwm_gate() -> Optional[HwmGate]:
+    """Bir dosya geçişi için hwm'nin anlık kopyası; HWM kapalıysa None."""
+    if not HWM_ENABLED:
+        return None
+    with _hwm_lock:
+        return HwmGate(_hwm.hwm, _hwm.seen, _hwm.dedupe_max)
+
+def commit_hwm(gate: Optional[HwmGate]) -> None:
+    """Yazılmış (veya spool'a alınmış) batch'lerin hwm'sini kalıcı hale getirir."""
+    if gate is None:
+        return
+    with _hwm_lock:
+        dropped = _hwm.dropped
+        _hwm.merge(gate)
+        _hwm.dropped = dropped
+        try:
+            _save_hwm()
+        except Exception as e:
+            log.warning(f"hwm dosyası yazılamadı ({HWM_PATH}): {e}")
+
+# ===================== Watcher (olay birleştiren scheduler) =====================
 _last_signature: Dict[str, Tuple[int, int]] = {}
 
+class IngestScheduler:
+    """
+    Tek scheduler thread'i: watchdog olayları dosyayı yalnızca "kirli" işaretler (olay başına thread/timer yok).
+    - Dosya, son olaydan min_latency sn sonra (yazım durulunca) ya da ilk olaydan en geç max_latency sn sonra işlenir
+    - Aynı dosya aynı anda iki kez işlenmez; işlenirken gelen olaylar dosyayı yeniden kirletir, iş bitince sıraya girer
+    - İşleme sabit sayıda worker thread'inde yapılır; kirli dosyalar işaretlenme sırasıyla verilir
+    """
+    def __init__(self, process: Callable[[str], None], min_latency: float = DEBOUNCE_SEC,
+                 max_latency: float = MAX_LATENCY_SEC, workers: int = INGEST_WORKERS):
+        self._process = process
+        self.min_latency = min_latency
+        self.max_latency = max(max_latency, min_latency)
+        self._dirty: Dict[str, List[float]] = {}  # path -> [ilk olay, son olay] (monotonic)
+        self._inflight: Set[str] = set()
+        self._cv = threading.Condition()
+        self._stop = False
+        self._exec = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest")
+        self._thread = threading.Thread(target=self._run, name="ingest-scheduler", daemon=True)
+        self._thread.start()
+
+    def mark(self, path: str) -> None:
+        now = time.monotonic()
+        with self._cv:
+            d = self._dirty.get(path)
+            if d is None:
+                self._dirty[path] = [now, now]
+                self._cv.notify()
+            else:
+                d[1] = now
+
+    def _due(self, now: float) -> Tuple[List[str], Optional[float]]:
+        # çağıran self._cv'yi tutar; (şimdi işlenecekler, bir sonraki uyanma anı)
+        ready: List[str] = []
+        wake: Optional[float] = None
+        for path, (first, last) in self._dirty.items():
+            if path in self._inflight:
+                continue
+            at = min(last + self.min_latency, first + self.max_latency)
+            if at <= now:
+                ready.append(path)
+            elif wake is None or at < wake:
+                wake = at
+        return ready, wake
+
+    def _run(self):
+        with self._cv:
+            while not self._stop:
+                now = time.monotonic()
+                ready, wake = self._due(now)
+                for path in ready:
+                    del self._dirty[path]
+                    self._inflight.add(path)
+                    self._exec.submit(self._run_one, path)
+                self._cv.wait(None if wake is None else wake - now)
+
+    def _run_one(self, path: str):
+        try:
+            self._process(path)
+        except Exception as e:
+            log.error(f"{os.path.basename(path)} işlenemedi: {e}")
+        finally:
+            with self._cv:
+                self._inflight.discard(path)
+                self._cv.notify()
+
+    def close(self):
+        with self._cv:
+            self._stop = True
+            self._cv.notify()
+        self._thread.join()
+        self._exec.shutdown(wait=True)
+
 class NDJSONHandler(FileSystemEventHandler):
+    def __init__(self):
+        super().__init__()
+        self._scheduler = IngestScheduler(self._process_once)
+
     def on_modified(self, event): self._schedule(event)
     def on_created(self, event):  self._schedule(event)
+    def on_moved(self, event):
+        # downloader segmentleri ".part" -> ".ndjson[.gz|.zst]" rename ile yayınlar
+        if not event.is_directory: self.schedule_path(event.dest_path)
 
     def _schedule(self, event):
         if event.is_directory: return
-        path = event.src_path
-        if not path.endswith(".ndjson"): return
-        t = _pending_timers.get(path)
-        if t and t.is_alive(): t.cancel()
-        timer = threading.Timer(DEBOUNCE_SEC, self._process_once, args=(path,))
-        _pending_timers[path] = timer
-        timer.start()
+        self.schedule_path(event.src_path)
+
+    def schedule_path(self, path: str):
+        if not path.endswith(NDJSON_SUFFIXES): return
+        self._scheduler.mark(path)
+
+    def close(self):
+        self._scheduler.close()
 
     def _process_once(self, path: str):
-        time.sleep(0.2)  # üretici yazmayı bitirsin
         try:
             st = os.stat(path)
         except FileNotFoundError:
@@ -182,36 +706,89 @@ class NDJSONHandler(FileSystemEventHandler):
         if _last_signature.get(path) == sig:
             return
         base = os.path.basename(path)
+        src = source_of(path)
+        t0 = time.time()
         try:
-            rows = ndjson_file_to_lp(path)
-            if not rows:
-                log.info(f"{base} -> kayıt yok | size={st.st_size}B")
-                _last_signature[path] = sig
+            start = end = resume_offset(path, st)
+            n_points = 0
+            gate = hwm_gate()
+            pending: "deque[Tuple[int, int, Optional[HwmGate]]]" = deque()
+            # batch'ler üretildikçe yazılır; offset (ve hwm) Influx'un onayladığı batch'lere kadar ilerler
+            # (yarıda kesilirse ya da süreç çökerse onaysız kısım yeniden okunur)
+            for rows, n, end in stream_tail(path, start, gate, _columnar.add if _columnar else None):
+                pos = 0
+                if rows:
+                    pos = write_points(rows, src, n)
+                    n_points += n
+                pending.append((pos, end, HwmGate(gate.hwm, gate.seen, gate.dedupe_max) if gate else None))
+                commit_durable(path, st, pending)
+            if not commit_durable(path, st, pending, wait=True):
+                # imza kaydedilmez: dosyanın sonraki olayında onaylanmamış kısım yeniden okunur
+                log.warning(f"{base} -> Influx onayı gelmedi; offset {resume_offset(path, st)}'te bırakıldı")
                 return
-            write_api.write(bucket=INFLUX_BUCKET, org=INFLUX_ORG, record=rows)
-            log.info(f"{base} -> kayıt yazdırıldı ({len(rows)} point) | size={st.st_size}B mtime_ns={st.st_mtime_ns}")
+            dt = time.time() - t0
+            M_PASS_SEC.observe(dt, source=src)
+            if n_points and dt > 0:
+                M_PPS.set(n_points / dt, source=src)
+            if gate and gate.dropped:
+                M_DUPES.inc(gate.dropped, source=src)
+            skipped = f", {gate.dropped} tekrar atlandı" if gate and gate.dropped else ""
+            if n_points:
+                log.info(f"{base} -> kayıt yazdırıldı ({n_points} point, {end - start}B yeni{skipped}) | size={st.st_size}B offset={end}")
+            else:
+                log.info(f"{base} -> yeni kayıt yok{skipped} | size={st.st_size}B offset={end}")
             _last_signature[path] = sig
+            if _columnar: _columnar.flush_due()
+            flush_downsample()
+            self._finish_segment(path, st, end)
         except Exception as e:
             log.error(f"{base} yazım hatası: {e}")
 
+    def _finish_segment(self, path: str, st: os.stat_result, end: int):
+        if end < st.st_size or not SEGMENT_RE.search(path):
+            return
+        try:
+            archive_segment(path)
+        except Exception as e:
+            log.warning(f"{os.path.basename(path)} arşivlenemedi: {e}")
+        _last_signature.pop(path, None)
+
 # ===================== Main =====================
 def main():
     os.makedirs(NDJSON_DIR, exist_ok=True)
-    log.info(f"Watching: {NDJSON_DIR} (*.ndjson) — debounce={DEBOUNCE_SEC}s")
+    init_influx()
+    init_columnar()
+    init_downsample()
+    load_offsets()
+    if HWM_ENABLED: load_hwm()
+    start_convert_pool()
+    if metrics.start_http_server(METRICS_PORT):
+        log.info(f"Metrics: http://{metrics.METRICS_ADDR}:{METRICS_PORT}/metrics")
+    log.info(f"Watching: {NDJSON_DIR} (*.ndjson) — latency={DEBOUNCE_SEC}..{MAX_LATENCY_SEC}s, json={codec.NAME}, "
+             f"ingest={INGEST_WORKERS}, workers={_pool_workers if _pool else 'thread'}"
+             + (f", columnar={COLUMNAR_FORMAT}:{COLUMNAR_DIR}" if _columnar else "")
+             + (f", downsample={_downsampler.table!r}" if _downsampler else ""))
     obs = Observer()
     handler = NDJSONHandler()
     obs.schedule(handler, NDJSON_DIR, recursive=False)
     obs.start()
+    # consumer kapalıyken gelen segmentler/dosyalar (checkpoint'i olanlar yalnızca kalan kısım)
+    for name in sorted(os.listdir(NDJSON_DIR)):
+        handler.schedule_path(os.path.join(NDJSON_DIR, name))
     try:
         while True:
-            time.sleep(3600)
+            # kaynak dururken açık kalan toplama pencereleri de idle süresinden sonra yazılsın
+            time.sleep(DOWNSAMPLE_IDLE_SEC if _downsampler else 3600)
+            flush_downsample()
     except KeyboardInterrupt:
         log.info("Kapanıyor…")
     finally:
         obs.stop(); obs.join()
-        try: write_api.flush()
-        except Exception: pass
-        client.close()
+        handler.close()
+        if _pool: _pool.shutdown()
+        flush_downsample(final=True)
+        close_columnar()
+        close_influx()
 
 if __name__ == "__main__":
     main()
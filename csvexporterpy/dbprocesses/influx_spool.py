@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+InfluxDB kesintileri için diskte kalıcı line-protocol spool'u (write-ahead).
+- Gönderilemeyen LP batch'leri append-only segment dosyalarına yazılır (spool-000000000001.lp, ...)
+- SpoolReplayer, Influx geri geldiğinde en eski segmentten başlayarak hız sınırıyla yeniden gönderir;
+  tamamı gönderilen segment silinir
+- Aynı series+timestamp'e yeniden yazım Influx'ta aynı point'i ezer; yarıda kalan segmentin
+  baştan tekrar gönderilmesi veri tekrarına yol açmaz
+- Dizin tek bir sürece aittir: açılışta <dizin>/.lock üzerinde özel kilit alınır, başka bir süreç tutuyorsa
+  SpoolBusy fırlatılır (iki spool'un sıra numaraları çakışır, replayer'lar aynı segmentleri gönderip silerdi)
+- Kalıcı olarak reddedilen parçalar (400/422 gibi 4xx) segmentin yanına <segment>.bad dosyasına alınır ve
+  gönderime devam edilir: tek hatalı satır sonraki segmentleri bekletmez. 5xx, 429, zaman aşımı / bağlantı
+  hataları ve yapılandırma kaynaklı 401/403/404 tekrar denenir
+"""
+
+import os, time, logging, threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: kilit yok
+    fcntl = None
+
+log = logging.getLogger("spool")
+
+LPData = Union[bytes, str, List[Any]]
+
+# 4xx olsa da tekrar denenenler: yetki/bucket yapılandırması düzelince ya da istek hızı düşünce geçer
+RETRYABLE_4XX = frozenset({401, 403, 404, 408, 429})
+BAD_SUFFIX = ".bad"
+LOCK_NAME = ".lock"
+
+class SpoolBusy(RuntimeError):
+    """Spool dizini başka bir sürecin kilidinde."""
+
+def is_retryable(e: Exception) -> bool:
+    """Yazım hatası tekrar denenmeli mi? status'u olmayan hatalar (bağlantı, zaman aşımı) denenir."""
+    status = getattr(e, "status", None)
+    if not isinstance(status, int) or not 400 <= status < 500:
+        return True
+    return status in RETRYABLE_4XX
+
+def _to_bytes(data: LPData) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return b"\n".join(d if isinstance(d, bytes) else str(d).encode("utf-8") for d in data)
+
+class LPSpool:
+    """
+    Append-only segmentlerden oluşan LP kuyruğu. Yazma ve okuma aynı anda farklı thread'lerden yapılabilir:
+    append() aktif segmente ekler, take_oldest() yeniden gönderilecek kapalı segmenti verir.
+    Toplam boyut max_bytes'ı aşarsa en eski segmentler (uyarıyla) silinir; segment boyları bellekte tutulur
+    (append başına dizin taraması yok).
+    """
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024,
+                 max_bytes: int = 1024 * 1024 * 1024, fsync: bool = False):
+        self.dir = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._active: Optional[str] = None
+        self._active_f = None
+        self._active_bytes = 0
+        self.stats = {"spooled_batches": 0, "spooled_bytes": 0, "dropped_segments": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = self._acquire_dir()
+        # segment adı -> byte, sıra numarasıyla artan (ekleme sırası = ad sırası)
+        self._sizes: Dict[str, int] = {n: os.path.getsize(os.path.join(directory, n)) for n in self._segment_names()}
+        self._total = sum(self._sizes.values())
+        self._seq = max((self._seq_of(n) for n in self._sizes), default=0)
+
+    def _acquire_dir(self) -> Optional[int]:
+        if fcntl is None:
+            return None
+        fd = os.open(os.path.join(self.dir, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            owner = os.read(fd, 32).decode("ascii", errors="replace").strip() or "?"
+            os.close(fd)
+            raise SpoolBusy(f"spool dizini {self.dir} başka bir süreç (pid {owner}) tarafından kullanılıyor") from None
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode("ascii"))
+        return fd
+
+    @staticmethod
+    def _seq_of(name: str) -> int:
+        return int(name[len("spool-"):-len(".lp")])
+
+    def _segment_names(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.dir) if n.startswith("spool-") and n.endswith(".lp"))
+
+    def _close_active(self):
+        # çağıran self._lock'u tutar
+        if self._active_f is not None:
+            self._active_f.close()
+        self._active = self._active_f = None
+        self._active_bytes = 0
+
+    def append(self, data: LPData) -> None:
+        body = _to_bytes(data)
+        if not body:
+            return
+        if not body.endswith(b"\n"):
+            body += b"\n"
+        with self._lock:
+            if self._active_f is None:
+                self._seq += 1
+                self._active = os.path.join(self.dir, f"spool-{self._seq:012d}.lp")
+                self._active_f = open(self._active, "ab")
+                self._sizes[os.path.basename(self._active)] = 0
+            self._active_f.write(body)
+            self._active_f.flush()
+            if self.fsync:
+                os.fsync(self._active_f.fileno())
+            self._active_bytes += len(body)
+            self._sizes[os.path.basename(self._active)] += len(body)
+            self._total += len(body)
+            self.stats["spooled_batches"] += 1
+            self.stats["spooled_bytes"] += len(body)
+            if self._active_bytes >= self.segment_bytes:
+                self._close_active()
+            self._enforce_limit()
+
+    def _enforce_limit(self):
+        # çağıran self._lock'u tutar
+        while self._total > self.max_bytes and self._sizes:
+            n = next(iter(self._sizes))
+            path = os.path.join(self.dir, n)
+            if path == self._active:
+                break
+            self._discard(n)
+            self.stats["dropped_segments"] += 1
+            log.warning(f"spool sınırı ({self.max_bytes}B) aşıldı, en eski segment silindi: {n}")
+
+    def _discard(self, name: str) -> None:
+        # çağıran self._lock'u tutar
+        try:
+            os.remove(os.path.join(self.dir, name))
+        except FileNotFoundError:
+            pass
+        self._total -= self._sizes.pop(name, 0)
+
+    def depth(self) -> Tuple[int, int]:
+        """(toplam byte, segment sayısı)"""
+        with self._lock:
+            return self._total, len(self._sizes)
+
+    def take_oldest(self) -> Optional[str]:
+        """Yeniden gönderilecek en eski segment; yalnızca aktif segment varsa o kapatılıp verilir."""
+        with self._lock:
+            if not self._sizes:
+                return None
+            path = os.path.join(self.dir, next(iter(self._sizes)))
+            if path == self._active:
+                self._close_active()
+            return path
+
+    def quarantine(self, segment: str, lines: List[bytes]) -> str:
+        """Reddedilen satırları segment'in .bad dosyasına ekler (yeniden gönderilmez, elle incelenir)."""
+        bad = segment + BAD_SUFFIX
+        with self._lock:
+            with open(bad, "ab") as f:
+                f.write(b"\n".join(lines) + b"\n")
+        return bad
+
+    def remove(self, path: str) -> None:
+        with self._lock:
+            self._discard(os.path.basename(path))
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_active()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)  # kilit de bırakılır
+                self._lock_fd = None
+
+class SpoolReplayer(threading.Thread):
+    """
+    Spool'daki segmentleri write_fn ile (senkron; hata fırlatmalı) yeniden gönderir.
+    - rate_pps: saniyede en fazla bu kadar point (0: sınırsız)
+    - Tekrar denenebilir hatada (is_retryable) aynı parça retry_sec'ten başlayıp max_retry_sec'e kadar artan
+      aralıklarla denenir; kalıcı retlerde parça karantinaya (.bad) alınır ve segmentin geri kalanıyla devam edilir
+    """
+    def __init__(self, spool: LPSpool, write_fn: Callable[[bytes], Any], batch_lines: int = 5000,
+                 rate_pps: float = 50_000, retry_sec: float = 5.0, max_retry_sec: float = 60.0):
+        super().__init__(name="spool-replay", daemon=True)
+        self.spool = spool
+        self.write_fn = write_fn
+        self.batch_lines = batch_lines
+        self.rate_pps = rate_pps
+        self.retry_sec = retry_sec
+        self.max_retry_sec = max_retry_sec
+        self.stats = {"replayed_points": 0, "replayed_segments": 0, "replay_errors": 0, "quarantined_points": 0}
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _send(self, lines: List[bytes], segment: str) -> Optional[int]:
+        """Gönderilen point sayısı (karantinaya alındıysa 0); durdurulduysa None."""
+        delay = self.retry_sec
+        while not self._stop.is_set():
+            try:
+                self.write_fn(b"\n".join(lines))
+                return len(lines)
+            except Exception as e:
+                self.stats["replay_errors"] += 1
+                if not is_retryable(e):
+                    bad = self.spool.quarantine(segment, lines)
+                    self.stats["quarantined_points"] += len(lines)
+                    log.error(f"Influx {len(lines)} point'i kalıcı olarak reddetti ({e}); "
+                              f"{os.path.basename(bad)} dosyasına alındı")
+                    return 0
+                log.warning(f"spool yeniden gönderimi başarısız ({e}); {delay:.0f}s sonra tekrar")
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_retry_sec)
+        return None
+
+    def _replay(self, path: str) -> bool:
+        sent = 0
+        with open(path, "rb") as f:
+            batch: List[bytes] = []
+            for line in f:
+                line = line.rstrip(b"\n")
+                if not line:
+                    continue
+                batch.append(line)
+                if len(batch) >= self.batch_lines:
+                    n = self._send_rated(batch, path)
+                    if n is None:
+                        return False
+                    sent += n
+                    batch = []
+            if batch:
+                n = self._send_rated(batch, path)
+                if n is None:
+                    return False
+                sent += n
+        self.stats["replayed_points"] += sent
+        log.info(f"spool segmenti yeniden gönderildi: {os.path.basename(path)} ({sent} point)")
+        return True
+
+    def _send_rated(self, lines: List[bytes], segment: str) -> Optional[int]:
+        t0 = time.time()
+        n = self._send(lines, segment)
+        if n is not None and self.rate_pps > 0:
+            self._stop.wait(max(0.0, len(lines) / self.rate_pps - (time.time() - t0)))
+        return n
+
+    def run(self):
+        while not self._stop.is_set():
+            path = self.spool.take_oldest()
+            if path is None:
+                self._stop.wait(self.retry_sec)
+                continue
+            if self._replay(path):
+                self.spool.remove(path)
+                self.stats["replayed_segments"] += 1
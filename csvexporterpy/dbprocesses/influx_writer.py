@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+InfluxDB v2 /api/v2/write için kendini ayarlayan (adaptive) yazıcı — influxdb-client'ın batching WriteApi'sinin yerine.
+- write(): LP satırları/buffer'ları bellekteki kuyruğa alınır; kuyruk max_buffer_bytes'ı aşarsa write() yer açılana
+  kadar bloklar (ingestion'a backpressure). pressure(): kuyruk doluluğu (0..1)
+- Gönderici thread'ler kuyruğu batch'ler halinde keep-alive http.client bağlantılarıyla POST eder:
+  - batch boyu: istek gecikmesi target_latency'nin altındaysa ve batch dolu gittiyse büyür, üstündeyse küçülür
+  - eşzamanlı istek sınırı: gecikme hedefin altındayken ve kuyrukta bekleyen iş varken yavaşça artar,
+    429/503/5xx/zaman aşımı/bağlantı hatasında yarıya iner (AIMD); Retry-After süresince hiç istek atılmaz
+  - gzip=auto: gzip'li ve gzip'siz isteklerin ham byte başına maliyeti (sıkıştırma + istek süresi) ayrı ayrı
+    ölçülür, ucuz olan kullanılır; diğeri her GZIP_PROBE_EVERY istekte bir yeniden denenir
+    (yavaş bağlantıda açık, hızlı ağda ya da CPU'su kısıtlı istemcide kapalı kalır)
+- Tekrar denenebilir hatalar üstel beklemeyle max_retries kez denenir, sonra on_error(gövde) çağrılır (consumer:
+  spool'a alır); 401/403/404 da on_error'a gider (yapılandırma düzelince spool'dan gönderilir).
+  413'te batch ikiye bölünür, diğer 4xx (ör. 400 hatalı satır) loglanıp atlanır
+- write() kümülatif bir konum döner; acked: önündeki tüm point'leri sonuçlanmış (Influx onayladı, on_error'a
+  verildi ya da kalıcı olarak reddedildi) en büyük konum. wait_acked(pos) o konuma kadar bekler; consumer
+  offset'leri yalnızca bu noktaya kadar ilerletir (batch'ler sıra dışı bitebilir, acked sıralıdır)
+- send(): tek senkron istek (spool replay'i için); başarısızsa WriteError fırlatır
+"""
+
+import gzip, http.client, logging, random, threading, time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+log = logging.getLogger("influx-writer")
+
+RETRYABLE = frozenset({429, 500, 502, 503, 504})
+THROTTLE = frozenset({0, 429, 503})  # 0: bağlantı hatası / zaman aşımı
+GZIP_MIN_BYTES = 1024
+GZIP_PROBE_EVERY = 16  # seçilmeyen gzip modu her N istekte bir yeniden ölçülür
+
+class WriteError(Exception):
+    def __init__(self, msg: str, status: int = 0, retry_after: Optional[float] = None):
+        super().__init__(msg)
+        self.status = status
+        self.retry_after = retry_after
+
+def _lines(data: Any) -> Tuple[bytes, int]:
+    """write() girdisi -> (LP gövdesi, satır sayısı)."""
+    if isinstance(data, bytes):
+        return data, data.count(b"\n") + 1 if data else 0
+    if isinstance(data, str):
+        return data.encode("utf-8"), data.count("\n") + 1 if data else 0
+    if data and isinstance(data[0], bytes):
+        body = b"\n".join(d for d in data if d)
+        return body, body.count(b"\n") + 1 if body else 0
+    return "\n".join(str(d) for d in data).encode("utf-8"), len(data)
+
+def _split_at(body: bytes, k: int) -> Tuple[bytes, bytes]:
+    """İlk k satır ve geri kalanı."""
+    pos = -1
+    for _ in range(k):
+        pos = body.find(b"\n", pos + 1)
+        if pos < 0:
+            return body, b""
+    return body[:pos], body[pos + 1:]
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+class AdaptiveWriter:
+    def __init__(self, url: str, token: str, org: str, bucket: str, precision: str = "ns",
+                 gzip_mode: str = "auto", min_batch: int = 500, max_batch: int = 50_000, max_inflight: int = 8,
+                 target_latency: float = 0.5, max_buffer_bytes: int = 64 * 1024 * 1024, flush_interval: float = 1.0,
+                 max_retries: int = 5, timeout: float = 30.0,
+                 on_success: Optional[Callable[[int, float], None]] = None,
+                 on_retry: Optional[Callable[[int, Exception], None]] = None,
+                 on_error: Optional[Callable[[bytes, Exception], None]] = None):
+        u = urlsplit(url if "://" in url else "http://" + url)
+        self._conn_cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+        self._host, self._port = u.hostname, u.port
+        self._path = (u.path.rstrip("/") + "/api/v2/write?"
+                      + urlencode({"org": org, "bucket": bucket, "precision": precision}))
+        self._headers = {"Authorization": f"Token {token}", "Content-Type": "text/plain; charset=utf-8"}
+        self.gzip_mode = gzip_mode
+        self.min_batch, self.max_batch = min_batch, max(min_batch, max_batch)
+        self.max_inflight = max(1, max_inflight)
+        self.target_latency = target_latency
+        self.max_buffer_bytes = max_buffer_bytes
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.on_success, self.on_retry, self.on_error = on_success, on_retry, on_error
+
+        # ayarlanan değerler
+        self.batch_points = min(max(5000, self.min_batch), self.max_batch)
+        self._limit = float(min(2, self.max_inflight))
+        self.gzip = gzip_mode == "on"
+        self.latency = 0.0                      # EWMA (s)
+        self._cost: Dict[bool, Optional[float]] = {False: None, True: None}  # gzip -> EWMA s / ham byte
+        self._since_probe = 0
+
+        # kuyruk
+        self._q: "deque[Tuple[bytes, int]]" = deque()
+        self._q_bytes = 0
+        self._q_points = 0
+        self._oldest = 0.0
+        self._inflight = 0
+        self._flushing = 0
+        self._closed = False
+        self._backoff_until = 0.0
+        self._enq = 0                      # write()'a verilmiş toplam point (konum)
+        self._taken = 0                    # gönderici thread'lere verilmiş toplam point
+        self._acked = 0                    # bu konuma kadar her şey sonuçlandı
+        self._done: Dict[int, int] = {}    # sıra dışı biten batch'ler: başlangıç -> bitiş
+        self._cv = threading.Condition()
+        self.stats = {"points": 0, "requests": 0, "bytes_sent": 0, "retries": 0, "errors": 0,
+                      "dropped": 0, "throttled": 0, "blocked_sec": 0.0}
+        self._threads = [threading.Thread(target=self._worker, name=f"influx-writer-{i}", daemon=True)
+                         for i in range(self.max_inflight)]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def inflight_limit(self) -> int:
+        return max(1, int(self._limit))
+
+    # ---------- ingestion tarafı ----------
+    def write(self, data: Any, n: Optional[int] = None) -> int:
+        """
+        LP satırları (str listesi), hazır LP buffer'ları (bytes listesi) ya da tek gövde; kuyruk doluysa bloklar.
+        Dönüş: bu verinin son point'inin konumu (acked bu değere ulaşınca sonuçlanmıştır).
+        """
+        body, k = _lines(data)
+        k = k if n is None else n
+        if not body:
+            with self._cv:
+                return self._enq
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("AdaptiveWriter kapalı")
+            if self._q_bytes and self._q_bytes + len(body) > self.max_buffer_bytes:
+                t0 = time.monotonic()
+                while self._q_bytes and self._q_bytes + len(body) > self.max_buffer_bytes and not self._closed:
+                    self._cv.wait(1.0)
+                self.stats["blocked_sec"] += time.monotonic() - t0
+                if self._closed:  # beklerken kapatıldı: kuyruğa eklenirse hiç gönderilmez
+                    raise RuntimeError("AdaptiveWriter kapalı")
+            if not self._q:
+                self._oldest = time.monotonic()
+            self._q.append((body, k))
+            self._q_bytes += len(body)
+            self._q_points += k
+            self._enq += k
+            self._cv.notify_all()
+            return self._enq
+
+    @property
+    def acked(self) -> int:
+        return self._acked
+
+    def wait_acked(self, pos: int, timeout: Optional[float] = None) -> bool:
+        """acked >= pos olana kadar bekler (bekleyen kısmi batch'ler hemen gönderilir)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cv:
+            if self._acked >= pos:
+                return True
+            self._flushing += 1
+            self._cv.notify_all()
+            try:
+                while self._acked < pos:
+                    left = None if deadline is None else deadline - time.monotonic()
+                    if left is not None and left <= 0:
+                        return False
+                    self._cv.wait(left)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def pressure(self) -> float:
+        return min(1.0, self._q_bytes / self.max_buffer_bytes) if self.max_buffer_bytes else 0.0
+
+    def buffered(self) -> Tuple[int, int]:
+        """(byte, point) — kuyrukta bekleyen."""
+        return self._q_bytes, self._q_points
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Kuyruk boşalıp uçuştaki istekler bitene kadar bekler (kısmi batch'ler hemen gönderilir)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cv:
+            self._flushing += 1
+            self._cv.notify_all()
+            try:
+                while self._q or self._inflight:
+                    left = None if deadline is None else deadline - time.monotonic()
+                    if left is not None and left <= 0:
+                        return False
+                    self._cv.wait(left)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self) -> None:
+        self.flush()
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        for t in self._threads:
+            t.join()
+
+    # ---------- gönderici thread'ler ----------
+    def _take(self, k: int) -> Tuple[bytes, int]:
+        # çağıran self._cv'yi tutar; kuyruğun başından en fazla k point
+        parts: List[bytes] = []
+        n = 0
+        while self._q and n < k:
+            body, m = self._q.popleft()
+            if n + m > k:
+                head, rest = _split_at(body, k - n)
+                if rest:
+                    self._q.appendleft((rest, m - (k - n)))
+                    self._q_bytes -= len(body) - len(rest)
+                    self._q_points -= k - n
+                    parts.append(head)
+                    n = k
+                    break
+            self._q_bytes -= len(body)
+            self._q_points -= m
+            parts.append(body)
+            n += m
+        if self._q:
+            self._oldest = time.monotonic()
+        return b"\n".join(parts), n
+
+    def _ready(self, now: float) -> Optional[float]:
+        # çağıran self._cv'yi tutar; 0: şimdi gönder, >0: bu kadar sonra tekrar bak, None: iş yok
+        if not self._q:
+            return None
+        if now < self._backoff_until:
+            return self._backoff_until - now
+        if self._inflight >= self.inflight_limit:
+            return None
+        if self._q_points >= self.batch_points or self._flushing or self._closed:
+            return 0.0
+        due = self._oldest + self.flush_interval - now
+        return 0.0 if due <= 0 else due
+
+    def _worker(self):
+        conn = None
+        while True:
+            with self._cv:
+                while True:
+                    if self._closed and not self._q:
+                        if conn is not None:
+                            conn.close()
+                        return
+                    wait = self._ready(time.monotonic())
+                    if wait == 0.0:
+                        break
+                    self._cv.wait(wait)
+                body, n = self._take(self.batch_points)
+                start = self._taken
+                self._taken += n
+                self._inflight += 1
+                self._cv.notify_all()  # write()'ta bekleyenler
+            try:
+                conn = self._deliver(conn, body, n)
+            except Exception as e:  # beklenmeyen hata: veri kaybolmasın
+                log.error(f"Influx yazıcı hatası: {e}")
+                self._fail(body, n, e)
+                conn = None
+            finally:
+                with self._cv:
+                    self._inflight -= 1
+                    self._done[start] = start + n
+                    while self._acked in self._done:
+                        self._acked = self._done.pop(self._acked)
+                    self._cv.notify_all()
+
+    def _deliver(self, conn, body: bytes, n: int):
+        """Batch'i tekrar denemelerle gönderir; bağlantıyı (ya da None) döner."""
+        attempt = 0
+        while True:
+            try:
+                conn, dt = self._post(conn, body, n)
+                if self.on_success:
+                    self.on_success(n, dt)
+                return conn
+            except WriteError as e:
+                conn = None if e.status == 0 else conn
+                if e.status == 413 and n > 1:
+                    half = n // 2
+                    a, b = _split_at(body, half)
+                    with self._cv:
+                        self.batch_points = max(self.min_batch, min(self.batch_points, half))
+                    conn = self._deliver(conn, a, half)
+                    return self._deliver(conn, b, n - half)
+                if e.status and e.status not in RETRYABLE:
+                    if e.status in (401, 403, 404):
+                        self._fail(body, n, e)
+                    else:
+                        self.stats["dropped"] += n
+                        log.error(f"Influx {n} point'i reddetti: {e}")
+                    return conn
+                self._throttle(e)
+                attempt += 1
+                if attempt > self.max_retries or self._closed:
+                    self._fail(body, n, e)
+                    return conn
+                self.stats["retries"] += 1
+                if self.on_retry:
+                    self.on_retry(n, e)
+                delay = e.retry_after if e.retry_after is not None else min(30.0, 0.5 * 2 ** attempt)
+                time.sleep(delay * (0.75 + random.random() / 2))
+
+    def _fail(self, body: bytes, n: int, e: Exception):
+        self.stats["errors"] += 1
+        if self.on_error:
+            self.on_error(body, e)
+        else:
+            self.stats["dropped"] += n
+
+    # ---------- HTTP ----------
+    def _use_gzip(self, size: int) -> bool:
+        if self.gzip_mode != "auto":
+            return self.gzip
+        if size < GZIP_MIN_BYTES:
+            return False
+        for mode in (True, False):
+            if self._cost[mode] is None:
+                return mode
+        self._since_probe += 1
+        if self._since_probe >= GZIP_PROBE_EVERY:
+            self._since_probe = 0
+            return not self.gzip
+        return self.gzip
+
+    def _post(self, conn, body: bytes, n: int):
+        """Tek istek; başarıda (bağlantı, gecikme), aksi halde WriteError."""
+        headers = dict(self._headers)
+        payload = body
+        gz = self._use_gzip(len(body))
+        t_start = time.monotonic()
+        if gz:
+            payload = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        t0 = time.monotonic()
+        try:
+            if conn is None:
+                conn = self._conn_cls(self._host, self._port, timeout=self.timeout)
+            conn.request("POST", self._path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            if conn is not None:
+                conn.close()
+            raise WriteError(f"bağlantı hatası: {e!r}", 0) from e
+        dt = time.monotonic() - t0
+        if resp.will_close:
+            conn.close()
+            conn = None
+        if resp.status >= 300:
+            msg = data.decode("utf-8", errors="replace")[:300]
+            raise WriteError(f"HTTP {resp.status}: {msg}", resp.status, _retry_after(resp.getheader("Retry-After")))
+        self._observe_ok(n, len(payload), dt)
+        if len(body) >= GZIP_MIN_BYTES:
+            self._observe_cost(gz, (time.monotonic() - t_start) / len(body))
+        return conn, dt
+
+    # ---------- ayar ----------
+    def _observe_cost(self, gz: bool, sec_per_byte: float):
+        with self._cv:
+            c = self._cost[gz]
+            self._cost[gz] = sec_per_byte if c is None else 0.7 * c + 0.3 * sec_per_byte
+            if self.gzip_mode == "auto" and None not in self._cost.values():
+                self.gzip = self._cost[True] < self._cost[False]
+
+    def _observe_ok(self, n: int, wire: int, dt: float):
+        with self._cv:
+            self.stats["points"] += n
+            self.stats["requests"] += 1
+            self.stats["bytes_sent"] += wire
+            self.latency = dt if not self.latency else 0.8 * self.latency + 0.2 * dt
+            if dt < self.target_latency:
+                if n >= 0.9 * self.batch_points:
+                    self.batch_points = min(self.max_batch, int(self.batch_points * 1.25) + 1)
+                if self._q_points > self.batch_points and self._limit < self.max_inflight:
+                    self._limit = min(float(self.max_inflight), self._limit + 1.0 / self._limit)
+            elif dt > 2 * self.target_latency:
+                self.batch_points = max(self.min_batch, int(self.batch_points * 0.7))
+
+    def _throttle(self, e: WriteError):
+        if e.status not in THROTTLE and e.retry_after is None:
+            return
+        with self._cv:
+            self.stats["throttled"] += 1
+            self._limit = max(1.0, self._limit / 2)
+            if e.retry_after:
+                self._backoff_until = max(self._backoff_until, time.monotonic() + e.retry_after)
+            if e.status == 0:  # zaman aşımı: daha küçük istekler
+                self.batch_points = max(self.min_batch, self.batch_points // 2)
+
+    # ---------- senkron ----------
+    def send(self, body: bytes) -> None:
+        """Spool replay'i için tek senkron istek (tekrar denemesiz); başarısızsa WriteError."""
+        body, n = _lines(body)
+        conn, _ = self._post(None, body, n)
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NDJSON -> InfluxDB line protocol dönüşümü (yan etkisiz; Influx/watchdog bağımlılığı yok).
+- influx_consumer_simple, downloader'ın pipeline modu ve dönüşüm worker süreçleri ortak kullanır
+- Flat & items’lı kayıtlar dinamik işlenir
+- measurement = target, tags: packet, kind=TM/TC, host
+"""
+
+import os, re, math, gzip, mmap, time, zlib, platform
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import ndjson_codec as codec  # downloader ile ortak JSON codec (orjson > simdjson > json)
+
+LP_CACHE_MAX  = int(os.getenv("LP_CACHE_MAX", "4096"))   # series prefix / field key LRU boyutu
+LP_BATCH_SIZE = int(os.getenv("LP_BATCH_SIZE", "5000"))  # akış halinde yazıcıya verilen batch (point)
+SCAN_BLOCK_BYTES = int(os.getenv("SCAN_BLOCK_BYTES", str(4 * 1024 * 1024)))  # satır taramasında blok boyu
+MMAP_STABLE_SEC  = float(os.getenv("MMAP_STABLE_SEC", "0"))  # >0: bu kadar süredir değişmeyen dosyalar da mmap'lenir
+
+# downloader segment adı: TM_CFS_DEBUG.20250101T120000-0001.ndjson[.gz|.zst] (kapandıktan sonra değişmez)
+SEGMENT_RE = re.compile(r"\.\d{8}T\d{6}-\d{4}\.ndjson(\.gz|\.zst)?$")
+
+# ===================== LP helpers =====================
+_MEAS_ESC = str.maketrans({",": r"\,", " ": r"\ "})
+_TAG_ESC  = str.maketrans({",": r"\,", " ": r"\ ", "=": r"\="})
+# ASCII alan adları için tek translate; izin verilmeyen her karakter "_" olur
+_FIELD_KEY_OK  = ("_", ".", "-", ":")
+_FIELD_KEY_TBL = {i: "_" for i in range(128) if not (chr(i).isalnum() or chr(i) in _FIELD_KEY_OK)}
+
+def esc_measurement(s: str) -> str:
+    return s.translate(_MEAS_ESC)
+
+def esc_tag(s: str) -> str:
+    return s.translate(_TAG_ESC)
+
+@lru_cache(maxsize=LP_CACHE_MAX)
+def norm_field_key(s: str) -> str:
+    if s.isascii():
+        return s.translate(_FIELD_KEY_TBL)
+    return "".join(ch if (ch.isalnum() or ch in _FIELD_KEY_OK) else "_" for ch in s)
+
+@lru_cache(maxsize=LP_CACHE_MAX)
+def _field_key_eq(s: str) -> str:
+    return norm_field_key(s) + "="
+
+HOST_TAG = esc_tag(os.environ.get("HOSTNAME") or platform.node())  # host adı süreç boyunca sabit
+
+@lru_cache(maxsize=LP_CACHE_MAX)
+def series_prefix(tgt: str, pkt: str, kind: str) -> str:
+    """'measurement,tags ' öneki; (target, packet, kind) kümesi küçük ve sabit olduğundan önbelleklenir."""
+    return f"{esc_measurement(tgt)},packet={esc_tag(pkt)},kind={kind},host={HOST_TAG} "
+
+def format_field_value(v: Any) -> Optional[str]:
+    t = type(v)  # sık görülen tam float/int tipleri için hızlı yol
+    if t is float:
+        if v != v or v in (math.inf, -math.inf): return None
+        return repr(v)
+    if t is int:  return f"{v}i"
+    if v is None: return None
+    if isinstance(v, bool):  return "true" if v else "false"
+    if isinstance(v, int):   return f"{v}i"
+    if isinstance(v, float):
+        if math.isnan(v) or math.isinf(v): return None
+        return str(v)
+    s = str(v).replace("\\", "\\\\").replace("\"", "\\\"")
+    return f"\"{s}\""
+
+# ===================== Meta extraction =====================
+def split_packet_key(pktkey: str) -> Tuple[Optional[str], Optional[str], str]:
+    # "DECOM__TLM__CFS_DEBUG__SC_HKTLM" -> ("CFS_DEBUG","SC_HKTLM","TM")
+    # "DECOM__CMD__CFS_DEBUG__SC_CMD"   -> ("CFS_DEBUG","SC_CMD","TC")
+    parts = str(pktkey).split("__")
+    if len(parts) >= 4:
+        kind = "TC" if parts[1] == "CMD" else "TM"
+        return parts[2], parts[3], kind
+    return None, None, "TM"
+
+_META_NONE = (None, None, None, "TM", {})
+_SKIP_KEYS = frozenset({"__time","__packet","__type","target","packet","time"})
+
+def _item_value(it: Dict[str, Any]) -> Any:
+    val = it.get("converted")
+    if val is None: val = it.get("formatted")
+    if val is None: val = it.get("raw")
+    if val is None: val = it.get("value")
+    return val
+
+def _extract_meta_generic(rec: Dict[str, Any]):
+    """extract_meta'nın şemadan bağımsız (her kaydı baştan inceleyen) yolu."""
+    # items'lı form
+    if "items" in rec and ("time" in rec and "target" in rec and "packet" in rec):
+        t_ns = rec.get("time")
+        items = rec.get("items") or []
+        if t_ns is None or not items: return None, None, None, "TM", {}
+        fields: Dict[str, Any] = {}
+        for it in items:
+            name = it.get("name")
+            if not name: continue
+            fields[str(name)] = _item_value(it)
+        return int(t_ns), str(rec["target"]), str(rec["packet"]), "TM", fields
+
+    # flat form
+    t_ns: Optional[int] = None
+    if "PACKET_TIMESECONDS" in rec:
+        try: t_ns = int(float(rec["PACKET_TIMESECONDS"]) * 1e9)
+        except Exception: t_ns = None
+    if t_ns is None: t_ns = rec.get("__time") or rec.get("time")
+    if t_ns is None: return None, None, None, "TM", {}
+
+    tgt = pkt = None
+    kind = "TM"
+    pktkey = rec.get("__packet")
+    if pktkey:
+        tgt, pkt, kind = split_packet_key(pktkey)
+    if tgt is None: tgt = rec.get("target")
+    if pkt is None: pkt = rec.get("packet")
+    if tgt is None or pkt is None: return None, None, None, "TM", {}
+
+    fields: Dict[str, Any] = {}
+    for k, v in rec.items():
+        if isinstance(k, str) and (k in _SKIP_KEYS or k.startswith("__")):
+            continue
+        fields[str(k)] = v
+
+    return int(t_ns), str(tgt), str(pkt), kind, fields
+
+# ===================== Şemaya göre derlenmiş extractor'lar =====================
+class _FlatExtractor:
+    """
+    Bir __packet anahtarının ilk kaydından derlenir: target/packet/kind ve alan listesi sabittir.
+    Kayıt aynı anahtar kümesine sahip değilse None döner (çağıran genel yola düşer ve yeniden derler).
+    """
+    __slots__ = ("tgt", "pkt", "kind", "field_keys", "keyset")
+
+    def __init__(self, rec: Dict[str, Any], tgt: str, pkt: str, kind: str):
+        self.tgt, self.pkt, self.kind = tgt, pkt, kind
+        self.field_keys = tuple(k for k in rec if not (k in _SKIP_KEYS or k.startswith("__")))
+        self.keyset = frozenset(rec)
+
+    def __call__(self, rec: Dict[str, Any]):
+        if rec.keys() != self.keyset:
+            return None
+        fields = {k: rec[k] for k in self.field_keys}
+        t_ns: Optional[int] = None
+        pts = fields.get("PACKET_TIMESECONDS")
+        if pts is not None:
+            try: t_ns = int(float(pts) * 1e9)
+            except Exception: t_ns = None
+        if t_ns is None: t_ns = rec.get("__time") or rec.get("time")
+        if t_ns is None: return _META_NONE
+        return int(t_ns), self.tgt, self.pkt, self.kind, fields
+
+class _ItemsExtractor:
+    """items'lı form için: target/packet ve öğe adlarının sırası sabittir."""
+    __slots__ = ("tgt", "pkt", "names")
+
+    def __init__(self, rec: Dict[str, Any]):
+        self.tgt, self.pkt = str(rec["target"]), str(rec["packet"])
+        self.names = tuple(it.get("name") for it in rec["items"])
+
+    def __call__(self, rec: Dict[str, Any]):
+        if "time" not in rec:
+            return None
+        items = rec.get("items")
+        t_ns = rec["time"]
+        if t_ns is None or not items: return _META_NONE
+        names = self.names
+        if len(items) != len(names):
+            return None
+        fields: Dict[str, Any] = {}
+        for name, it in zip(names, items):
+            if it.get("name") != name:
+                return None
+            if not name: continue
+            val = it.get("converted")
+            if val is None: val = _item_value(it)
+            fields[name if type(name) is str else str(name)] = val
+        return int(t_ns), self.tgt, self.pkt, "TM", fields
+
+_extractors: Dict[Any, Any] = {}
+
+def _compile_extractor(rec: Dict[str, Any], pktkey: Optional[str], out) -> None:
+    if len(_extractors) >= LP_CACHE_MAX:
+        _extractors.clear()
+    if pktkey is None:
+        if "items" in rec and ("time" in rec and "target" in rec and "packet" in rec):
+            _extractors[("items", rec["target"], rec["packet"])] = _ItemsExtractor(rec)
+        return
+    if "items" in rec:
+        return
+    tgt, pkt, kind = split_packet_key(pktkey)
+    if tgt is not None and (tgt, pkt, kind) == out[1:4]:
+        _extractors[pktkey] = _FlatExtractor(rec, tgt, pkt, kind)
+
+def extract_meta(rec: Dict[str, Any]):
+    """
+    Her kayıttan (t_ns, target, packet, kind, fields) çıkar.
+    t_ns: PACKET_TIMESECONDS(ns) > __time > time
+    (target, packet) başına ilk görülen kayıttan derlenen extractor kullanılır;
+    şema değişirse genel yoldan işlenip yeniden derlenir.
+    """
+    pktkey = rec.get("__packet") or None
+    ex = None
+    try:
+        if pktkey is not None:
+            ex = _extractors.get(pktkey)
+        elif "items" in rec:
+            ex = _extractors.get(("items", rec.get("target"), rec.get("packet")))
+    except TypeError:  # hashlenemeyen anahtar: genel yol
+        pktkey = None
+    if ex is not None:
+        out = ex(rec)
+        if out is not None:
+            return out
+    out = _extract_meta_generic(rec)
+    if out[1] is not None and out[4]:
+        try:
+            _compile_extractor(rec, pktkey, out)
+        except Exception:
+            pass
+    return out
+
+def to_line_protocol(tgt: str, pkt: str, kind: str, fields: Dict[str, Any], t_ns: int) -> Optional[str]:
+    # measurement = target; tags: packet, kind, host (önbellekli önek)
+    pairs = []
+    for k, v in fields.items():
+        fv = format_field_value(v)
+        if fv is None: continue
+        pairs.append(_field_key_eq(k) + fv)
+    if not pairs: return None
+    return f"{series_prefix(tgt, pkt, kind)}{','.join(pairs)} {t_ns}"
+
+# ===================== HWM / dedupe =====================
+class HwmGate:
+    """
+    Seri (kind|target|packet) başına high-water mark: yalnızca hwm'den yeni point'ler geçer.
+    dedupe_max > 0 ise hwm ile aynı timestamp'li point, o timestamp'te görülen satır imzaları
+    (seri başına en fazla dedupe_max) arasında yoksa geçer; dedupe kapalıysa aynı timestamp düşer.
+    Düz dict'lerden oluşur: worker süreçlerine pickle ile gönderilip sonucu merge() ile birleştirilir.
+    """
+    __slots__ = ("hwm", "seen", "dedupe_max", "dropped")
+
+    def __init__(self, hwm: Optional[Dict[str, int]] = None, seen: Optional[Dict[str, List[int]]] = None,
+                 dedupe_max: int = 0):
+        self.hwm = dict(hwm or {})
+        self.seen = {k: list(v) for k, v in (seen or {}).items()}
+        self.dedupe_max = dedupe_max
+        self.dropped = 0
+
+    def admit(self, tgt: str, pkt: str, kind: str, t_ns: int, row: str) -> bool:
+        key = f"{kind}|{tgt}|{pkt}"
+        h = self.hwm.get(key)
+        if h is None or t_ns > h:
+            self.hwm[key] = t_ns
+            if self.dedupe_max:
+                self.seen[key] = [zlib.crc32(row.encode("utf-8"))]
+            return True
+        if t_ns == h and self.dedupe_max:
+            fps = self.seen.setdefault(key, [])
+            fp = zlib.crc32(row.encode("utf-8"))
+            if fp not in fps:
+                if len(fps) < self.dedupe_max: fps.append(fp)
+                return True
+        self.dropped += 1
+        return False
+
+    def merge(self, other: "HwmGate") -> None:
+        for key, t in other.hwm.items():
+            h = self.hwm.get(key)
+            if h is None or t > h:
+                self.hwm[key] = t
+                if key in other.seen: self.seen[key] = list(other.seen[key])
+            elif t == h and key in other.seen:
+                fps = self.seen.setdefault(key, [])
+                for fp in other.seen[key]:
+                    if fp not in fps and len(fps) < self.dedupe_max: fps.append(fp)
+        self.dropped += other.dropped
+
+# ===================== NDJSON -> LP =====================
+# süreç içi sayaçlar (metrics); worker süreçlerindeki sayımlar ana sürece taşınmaz
+stats = {"parse_errors": 0}
+
+# tap(t_ns, target, packet, kind, fields): LP'ye giren her raw point'in extract_meta çıktısını alır (ör. kolonlu
+# arşiv); toplanan (agg) point'ler seyreltilmeden, agg.feed'den önce ve gate'e bakılmadan verilir
+Tap = Callable[[int, str, str, str, Dict[str, Any]], None]
+# agg: extract_meta ile to_line_protocol arasındaki toplama aşaması (downsample.Downsampler / DeferStage);
+# agg.feed(t_ns, target, packet, kind, fields) -> None: point olduğu gibi geçer, liste: yerine yazılacak point'ler
+
+def emit_lp(metas: List[tuple], lp: List[str], gate: Optional[HwmGate] = None, tap: Optional[Tap] = None) -> None:
+    """(t_ns, target, packet, kind, fields) listesini LP'ye çevirip lp'ye ekler (gate / tap _line_to_lp'deki gibi)."""
+    for t_ns, tgt, pkt, kind, fields in metas:
+        row = to_line_protocol(tgt, pkt, kind, fields, t_ns)
+        if row and (gate is None or gate.admit(tgt, pkt, kind, t_ns, row)):
+            lp.append(row)
+            if tap: tap(t_ns, tgt, pkt, kind, fields)
+
+def _line_to_lp(s: bytes, lp: List[str], gate: Optional[HwmGate] = None, tap: Optional[Tap] = None,
+                agg=None) -> bool:
+    """
+    Tek NDJSON satırını (bytes, UTF-8'e çözülmeden) LP satırlarına çevirip lp'ye ekler; JSON parse edildiyse True.
+    gate verilirse yalnızca gate.admit()'ten geçen point'ler eklenir; tap yalnızca eklenen point'ler için çağrılır.
+    agg verilirse point'ler önce agg.feed()'den geçer; gate agg'nin ürettiği point'leri görür, tap ise
+    toplanan point'lerin kendisini (tam çözünürlükte) görür.
+    """
+    try:
+        obj = codec.loads(s)
+    except Exception:
+        stats["parse_errors"] += 1
+        return False
+    recs = obj if isinstance(obj, list) else [obj]
+    for rec in recs:
+        if not isinstance(rec, dict): continue
+        t_ns, tgt, pkt, kind, fields = extract_meta(rec)
+        if (t_ns is None) or (tgt is None) or (pkt is None) or not fields:
+            continue
+        if agg is not None:
+            out = agg.feed(t_ns, tgt, pkt, kind, fields)
+            if out is not None:
+                if tap: tap(t_ns, tgt, pkt, kind, fields)
+                if out: emit_lp(out, lp, gate)
+                continue
+        row = to_line_protocol(tgt, pkt, kind, fields, t_ns)
+        if row and (gate is None or gate.admit(tgt, pkt, kind, t_ns, row)):
+            lp.append(row)
+            if tap: tap(t_ns, tgt, pkt, kind, fields)
+    return True
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(".gz") or path.endswith(".zst")
+
+def open_ndjson(path: str):
+    """NDJSON dosyasını (gerekirse açarak) binary okuma için döner."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+def mmap_safe(path: str, st: os.stat_result) -> bool:
+    """
+    mmap'lenmiş dosya okunurken kısaltılırsa (downloader'ın "w" ile yeniden dump'ı) sayfaya erişim SIGBUS ile
+    süreci öldürür: yalnızca kapanmış segmentler ve MMAP_STABLE_SEC boyunca değişmemiş dosyalar mmap'lenir.
+    """
+    if SEGMENT_RE.search(path):
+        return True
+    return MMAP_STABLE_SEC > 0 and time.time() - st.st_mtime >= MMAP_STABLE_SEC
+
+def iter_lines(path: str, start: int = 0, end: Optional[int] = None, tail: bool = False,
+               block_bytes: int = SCAN_BLOCK_BYTES) -> Iterator[Tuple[bytes, int]]:
+    """
+    Sıkıştırılmamış NDJSON'un [start, end) aralığındaki satırlarını
+    (satır ('\n' hariç, str'e çözülmeden), satırdan sonraki offset) olarak üretir.
+    Satır sonları blok blok bulunur: blok başına tek kopya + bytes.split (satır başına readline/strip yok).
+    Değişmeyecek dosyalar (mmap_safe) mmap ile, yazılmakta olanlar sabit bir buffer'a readinto ile okunur.
+    end verilmezse dosyanın o anki boyu. '\n' ile bitmemiş son satır yalnızca tail=True ise üretilir.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        end = st.st_size if end is None else min(end, st.st_size)
+        if end <= start:
+            return
+        if not mmap_safe(path, st):
+            yield from _read_lines(f, start, end, tail, block_bytes)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = start
+            while pos < end:
+                cut = mm.rfind(b"\n", pos, min(pos + block_bytes, end))
+                if cut < 0:  # blok boyundan uzun satır
+                    cut = mm.find(b"\n", pos, end)
+                    if cut < 0:
+                        break
+                for line in mm[pos:cut].split(b"\n"):
+                    pos += len(line) + 1
+                    yield line, pos
+            if tail and pos < end:
+                yield mm[pos:end], end
+
+def _read_lines(f, start: int, end: int, tail: bool, block_bytes: int) -> Iterator[Tuple[bytes, int]]:
+    # iter_lines'ın mmap'siz yolu; dosya okunurken kısalırsa okunabilen kısımla biter
+    buf = memoryview(bytearray(block_bytes))
+    f.seek(start)
+    pos, left = start, end - start
+    carry = b""  # önceki bloktan kalan yarım satır
+    while left > 0:
+        n = f.readinto(buf[:min(block_bytes, left)])
+        if not n:
+            break
+        left -= n
+        chunk = carry + buf[:n] if carry else bytes(buf[:n])
+        cut = chunk.rfind(b"\n")
+        if cut < 0:  # blok boyundan uzun satır
+            carry = chunk
+            continue
+        for line in chunk[:cut].split(b"\n"):
+            pos += len(line) + 1
+            yield line, pos
+        carry = chunk[cut + 1:]
+    if tail and carry:
+        yield carry, pos + len(carry)
+
+def _blank(s: bytes) -> bool:
+    return not s or s.isspace()
+
+def ndjson_file_to_lp(path: str, gate: Optional[HwmGate] = None, tap: Optional[Tap] = None,
+                      agg=None) -> List[str]:
+    lp: List[str] = []
+    if not is_compressed(path):
+        for s, _ in iter_lines(path, tail=True):
+            if not _blank(s): _line_to_lp(s, lp, gate, tap, agg)
+        return lp
+    with open_ndjson(path) as f:
+        for line in f:
+            s = line.strip()
+            if not s: continue
+            _line_to_lp(s, lp, gate, tap, agg)
+    return lp
+
+def iter_lp_batches(path: str, offset: int = 0, batch_size: int = LP_BATCH_SIZE,
+                    gate: Optional[HwmGate] = None, tap: Optional[Tap] = None,
+                    agg=None) -> Iterator[Tuple[List[str], int]]:
+    """
+    path dosyasını offset'ten itibaren (iter_lines) okur; yalnızca '\n' ile bitmiş (tam) satırları işler.
+    En fazla batch_size point'lik (LP satırları, bu batch'in bittiği offset) çiftleri üretir;
+    bellek kullanımı dosya boyundan bağımsızdır. Son öğe her zaman okunan son tam satırın offset'iyle gelir
+    (satır yoksa ([], offset)). Yarım kalan son satır bir sonraki olaya bırakılır.
+    Sıkıştırılmış segmentler değişmez: bir kez baştan sona okunur; ara batch'ler offset'i ilerletmez,
+    son batch offset = dosya boyu ile gelir.
+    gate verilirse hwm'yi geçemeyen point'ler atlanır; gate her batch üretildiğinde o ana kadarki hwm'yi taşır.
+    tap, batch'e giren (agg verilirse toplanan) point'ler için batch üretilmeden önce çağrılır.
+    agg verilirse toplanan point'ler yalnızca pencereleri kapandığında batch'e girer (offset yine ilerler).
+    """
+    rows: List[str] = []
+    if is_compressed(path):
+        size = os.path.getsize(path)
+        if offset >= size:
+            yield rows, offset
+            return
+        with open_ndjson(path) as f:
+            for line in f:
+                s = line.strip()
+                if s: _line_to_lp(s, rows, gate, tap, agg)
+                if len(rows) >= batch_size:
+                    yield rows, offset
+                    rows = []
+        yield rows, size
+        return
+    pos = offset
+    for s, pos in iter_lines(path, offset):
+        if not _blank(s): _line_to_lp(s, rows, gate, tap, agg)
+        if len(rows) >= batch_size:
+            yield rows, pos
+            rows = []
+    yield rows, pos
+
+def ndjson_tail_to_lp(path: str, offset: int) -> Tuple[List[str], int]:
+    """
+    iter_lp_batches'in tek listeye toplanmış hali.
+    Dönüş: (LP satırları, yeni offset).
+    """
+    lp: List[str] = []
+    end = offset
+    for rows, end in iter_lp_batches(path, offset):
+        lp.extend(rows)
+    return lp, end
+
+# ===================== Paralel dönüşüm (worker süreçleri) =====================
+def complete_end(path: str, start: int) -> int:
+    """start'tan sonraki son '\n'in hemen arkası (tam satırların sonu); sıkıştırılmışsa dosya boyu."""
+    size = os.path.getsize(path)
+    if is_compressed(path) or size <= start:
+        return max(size, start) if is_compressed(path) else start
+    block = 64 * 1024
+    with open(path, "rb") as f:
+        pos = size
+        while pos > start:
+            lo = max(start, pos - block)
+            f.seek(lo)
+            i = f.read(pos - lo).rfind(b"\n")
+            if i >= 0:
+                return lo + i + 1
+            pos = lo
+    return start
+
+def chunk_ranges(path: str, start: int, end: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """[start, end) aralığını satır sınırlarına hizalı, ~chunk_bytes boyutlu parçalara böler."""
+    if is_compressed(path) or end - start <= chunk_bytes:
+        return [(start, end)]
+    bounds = [start]
+    with open(path, "rb") as f:
+        pos = start + chunk_bytes
+        while pos < end:
+            f.seek(pos)
+            f.readline()
+            pos = f.tell()
+            if pos >= end:
+                break
+            bounds.append(pos)
+            pos += chunk_bytes
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def range_to_lp(path: str, start: int, end: int, gate: Optional[HwmGate] = None,
+                tap: Optional[Tap] = None, agg=None) -> List[str]:
+    """[start, end) aralığındaki tam satırların LP'si; sıkıştırılmış dosyada aralık yok sayılır (tüm dosya)."""
+    if is_compressed(path):
+        return ndjson_file_to_lp(path, gate, tap, agg)
+    rows: List[str] = []
+    for s, _ in iter_lines(path, start, end):
+        if not _blank(s): _line_to_lp(s, rows, gate, tap, agg)
+    return rows
+
+def convert_range(path: str, start: int, end: int, gate: Optional[HwmGate] = None, collect: bool = False,
+                  agg=None) -> Tuple[bytes, int, Optional[HwmGate], Optional[List[tuple]], Any]:
+    """
+    Worker sürecinde çalışır: [start, end) aralığındaki tam satırları LP'ye çevirir.
+    Dönüş: ('\n' ile birleştirilmiş hazır LP buffer'ı, point sayısı, ilerletilmiş gate kopyası veya None,
+    collect=True ise LP'ye giren point'lerin (t_ns, target, packet, kind, fields) listesi, değilse None,
+    agg (downsample.DeferStage: ana sürecin toplayacağı point'leri taşır) veya None).
+    Sıkıştırılmış dosyada aralık yok sayılır, dosya baştan sona işlenir.
+    """
+    recs: Optional[List[tuple]] = [] if collect else None
+    tap = (lambda *meta: recs.append(meta)) if collect else None
+    rows = range_to_lp(path, start, end, gate, tap, agg)
+    return "\n".join(rows).encode("utf-8"), len(rows), gate, recs, agg
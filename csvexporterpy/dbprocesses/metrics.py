@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Downloader ve consumer'ın ortak metrik kayıt defteri + Prometheus metin formatında /metrics uç noktası.
+- Yalnızca stdlib; prometheus_client gerekmez
+- Counter / Gauge / Histogram, etiketli; counter/gauge değeri scrape anında bir fonksiyondan da okunabilir
+- start_http_server(port) ile açılır (port 0: kapalı); varsayılan adres 127.0.0.1 (METRICS_ADDR)
+"""
+
+import os, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _esc(v: Any) -> str:
+    return str(v).replace("\\", r"\\").replace("\"", r"\"").replace("\n", r"\n")
+
+def _fmt_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_esc(v)}"' for n, v in zip(names, values)) + "}"
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"): return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._fn: Optional[Callable[[], Any]] = None
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def set_function(self, fn: Callable[[], Any]) -> None:
+        """Değer scrape anında fn()'den okunur: sayı ya da {etiket değeri (veya tuple'ı): sayı}."""
+        self._fn = fn
+
+    def _samples(self) -> Iterator[Tuple[str, Tuple[str, ...], float]]:
+        if self._fn is not None:
+            v = self._fn()
+            if isinstance(v, dict):
+                for k, x in v.items():
+                    yield "", (k if isinstance(k, tuple) else (k,)), x
+            else:
+                yield "", (), v
+            return
+        with self._lock:
+            items = list(self._values.items())
+        for k, v in items:
+            yield "", k, v
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.type}")
+        for suffix, key, v in self._samples():
+            names = self.labelnames
+            if suffix == "_bucket":
+                names = names + ("le",)
+            out.append(f"{self.name}{suffix}{_fmt_labels(names, key)} {_fmt_value(v)}")
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            st = self._values.get(k)
+            if st is None:
+                st = self._values[k] = [[0] * len(self.buckets), 0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    st[0][i] += 1
+                    break
+            st[1] += value
+            st[2] += 1
+
+    def _samples(self) -> Iterator[Tuple[str, Tuple[str, ...], float]]:
+        with self._lock:
+            items = [(k, list(st[0]), st[1], st[2]) for k, st in self._values.items()]
+        for k, counts, total, n in items:
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                yield "_bucket", k + (_fmt_value(b),), acc
+            yield "_sum", k, total
+            yield "_count", k, n
+
+# ===================== Kayıt defteri =====================
+_registry: Dict[str, _Metric] = {}
+_registry_lock = threading.Lock()
+
+def _get_or_create(cls, name: str, help: str, labelnames: Sequence[str], **kw) -> Any:
+    with _registry_lock:
+        m = _registry.get(name)
+        if m is None:
+            m = _registry[name] = cls(name, help, labelnames, **kw)
+        return m
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _get_or_create(Counter, name, help, labelnames)
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, help, labelnames)
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+def render() -> str:
+    out: List[str] = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for m in metrics:
+        part: List[str] = []
+        try:
+            m.render(part)
+        except Exception:
+            continue  # hatalı fonksiyonlu metrik diğerlerini engellemesin (yarım HELP/TYPE bloğu da yazılmaz)
+        out.extend(part)
+    return "\n".join(out) + "\n"
+
+# ===================== HTTP =====================
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # her scrape'i loglama
+
+def start_http_server(port: int, addr: str = METRICS_ADDR) -> Optional[ThreadingHTTPServer]:
+    """port > 0 ise /metrics'i arka plan thread'inde sunar."""
+    if port <= 0:
+        return None
+    srv = ThreadingHTTPServer((addr, port), _Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, name="metrics-http", daemon=True).start()
+    return srv
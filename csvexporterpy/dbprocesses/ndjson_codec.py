@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Downloader ve consumer'ın ortak JSON codec'i.
+- Kurulu olan en hızlı arka uç seçilir: orjson > simdjson > json (stdlib)
+- JSON_CODEC=json|orjson|simdjson ile zorlanabilir
+- Byte seviyesinde çalışır: loads() bytes kabul eder, dumps()/dumps_lines() bytes döner;
+  NDJSON satırları UTF-8 str'e çözülmeden parse edilir
+- Hızlı arka uçlar standart dışı NaN / Infinity / -Infinity token'larını parse edemez: hata veren satır
+  json.loads ile yeniden denenir (yalnızca o satır yavaşlar, kayıt kaybolmaz)
+- orjson.dumps NaN / Infinity'yi null olarak yazar (stdlib NaN token'ı yazar): orjson seçiliyken downloader'ın
+  NDJSON arşivinde bu değerler null görünür. Influx'a etkisi yok (consumer NaN/Inf alanları zaten yazmaz)
+"""
+
+import os, json
+from typing import Any, Callable, Iterable, List, Tuple
+
+def _stdlib() -> Tuple[Callable[[Any], Any], Callable[[Any], bytes]]:
+    _enc = json.JSONEncoder(ensure_ascii=False, separators=(", ", ": ")).encode
+    return json.loads, lambda obj: _enc(obj).encode("utf-8")
+
+def _orjson() -> Tuple[Callable[[Any], Any], Callable[[Any], bytes]]:
+    import orjson
+    return orjson.loads, orjson.dumps
+
+def _simdjson() -> Tuple[Callable[[Any], Any], Callable[[Any], bytes]]:
+    import simdjson  # pysimdjson: yalnızca parse hızlı, encode stdlib
+    return simdjson.loads, _stdlib()[1]
+
+def _with_fallback(fast: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """fast'in parse edemediği (ör. NaN içeren) girdiyi json.loads'a bırakır; ikisi de başaramazsa json'un hatası."""
+    slow = json.loads
+
+    def loads(s: Any) -> Any:
+        try:
+            return fast(s)
+        except ValueError:
+            return slow(s)
+    return loads
+
+BACKENDS = {"orjson": _orjson, "simdjson": _simdjson, "json": _stdlib}
+
+def load_backend(name: str) -> Tuple[Callable[[Any], Any], Callable[[Any], bytes]]:
+    """İsimle (loads, dumps) çifti döner; kurulu değilse ImportError."""
+    return BACKENDS[name]()
+
+def available_backends() -> List[str]:
+    out = []
+    for name in BACKENDS:
+        try:
+            load_backend(name)
+        except ImportError:
+            continue
+        out.append(name)
+    return out
+
+def _select() -> Tuple[str, Callable[[Any], Any], Callable[[Any], bytes]]:
+    wanted = os.getenv("JSON_CODEC", "").strip().lower()
+    order = [wanted] if wanted in BACKENDS else ["orjson", "simdjson", "json"]
+    for name in order:
+        try:
+            loads, dumps = load_backend(name)
+            return name, (loads if name == "json" else _with_fallback(loads)), dumps
+        except ImportError:
+            continue
+    return ("json",) + _stdlib()
+
+NAME, loads, dumps = _select()
+
+def dumps_lines(recs: Iterable[Any]) -> bytes:
+    """Kayıtları tek bir NDJSON bloğu olarak (her kayıt bir satır, sonda '\\n') serileştirir."""
+    parts = [dumps(rec) for rec in recs]
+    if not parts:
+        return b""
+    parts.append(b"")
+    return b"\n".join(parts)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NDJSON yan indeksi (<dosya>.idx): zaman aralığına taramadan atlamak için blok başına (offset, min t_ns, max t_ns).
+- Satırlar lp_convert.iter_lines ile (kapalı segmentlerde mmap) taranır; bir blok ~INDEX_BLOCK_BYTES'lık tam satırlardan oluşur,
+  zaman extract_meta ile alınır (consumer'ın yazdığı timestamp'in aynısı)
+- Sorgu O(log n): blok max'larının önden kümülatif max'ı ve min'lerinin sondan kümülatif min'i üzerinde bisect;
+  yalnızca [t0, t1] ile kesişebilecek bloklar okunur. Dosya kabaca zaman sıralıysa bu birkaç bloktur;
+  blok içi kayıtlar yine de zamana göre süzülmelidir
+- Dosya büyüdüyse (aktif NDJSON) indeks kaldığı yerden uzatılır; truncate / baştan yeniden yazım
+  (boy küçük ya da baş imzası farklı) algılanırsa yeniden kurulur
+- Sıkıştırılmış segmentler (.gz/.zst) indekslenmez
+
+Kullanım:
+    python3 ndjson_index.py build logs/archive/*.ndjson
+    python3 ndjson_index.py query logs/TM_CFS_DEBUG.ndjson 1700000000000000000 1700000600000000000
+"""
+
+import os, sys, zlib, struct, bisect
+from typing import Iterator, List, Optional, Tuple
+
+import ndjson_codec as codec
+from lp_convert import extract_meta, is_compressed, iter_lines
+
+INDEX_BLOCK_BYTES = int(os.getenv("INDEX_BLOCK_BYTES", str(256 * 1024)))
+INDEX_SUFFIX = ".idx"
+HEAD_CHECK_LEN = 256
+
+_MAGIC = b"NDJIDX01"
+_HEADER = struct.Struct("<8sQII")   # magic, indekslenen son offset, baş imzası uzunluğu, baş imzası crc32
+_BLOCK = struct.Struct("<Qqq")      # blok başlangıç offset'i, min t_ns, max t_ns
+_EMPTY = (2**63 - 1, -2**63)        # zaman bilgisi olmayan blok
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+def _head_crc(path: str, n: int) -> int:
+    with open(path, "rb") as f:
+        return zlib.crc32(f.read(n))
+
+def line_times(s: bytes) -> Iterator[int]:
+    """Satırdaki kayıtların t_ns'leri (passthrough dizi satırında birden fazla)."""
+    try:
+        obj = codec.loads(s)
+    except Exception:
+        return
+    for rec in (obj if isinstance(obj, list) else [obj]):
+        if isinstance(rec, dict):
+            t_ns = extract_meta(rec)[0]
+            if t_ns is not None:
+                yield t_ns
+
+class NDJSONIndex:
+    """Bloklar [offset_i, offset_{i+1}) aralıklarıdır; son blok end'de biter."""
+
+    def __init__(self, path: str, end: int = 0, blocks: Optional[List[Tuple[int, int, int]]] = None,
+                 head_len: int = 0, head_crc: int = 0):
+        self.path = path
+        self.end = end
+        self.blocks: List[Tuple[int, int, int]] = blocks or []
+        self.head_len = head_len
+        self.head_crc = head_crc
+        self._runmax: Optional[List[int]] = None
+        self._sufmin: Optional[List[int]] = None
+
+    # ---------- kalıcılık ----------
+    @classmethod
+    def load(cls, path: str) -> Optional["NDJSONIndex"]:
+        try:
+            with open(index_path(path), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size or (len(data) - _HEADER.size) % _BLOCK.size:
+            return None
+        magic, end, head_len, head_crc = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            return None
+        blocks = list(_BLOCK.iter_unpack(memoryview(data)[_HEADER.size:]))
+        return cls(path, end, blocks, head_len, head_crc)
+
+    def save(self) -> None:
+        tmp = index_path(self.path) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.end, self.head_len, self.head_crc))
+            f.write(b"".join(_BLOCK.pack(*b) for b in self.blocks))
+        os.replace(tmp, index_path(self.path))
+
+    def valid_for(self, st: os.stat_result) -> bool:
+        """İndekslenen kısım hâlâ dosyanın başı mı (truncate / yeniden yazım yok)?"""
+        if st.st_size < self.end:
+            return False
+        try:
+            return not self.head_len or _head_crc(self.path, self.head_len) == self.head_crc
+        except FileNotFoundError:
+            return False
+
+    # ---------- kurma ----------
+    def extend(self, block_bytes: int = INDEX_BLOCK_BYTES) -> int:
+        """end'den sonraki tam satırları indeksler; eklenen blok sayısını döner."""
+        added = 0
+        start, lo, hi = self.end, _EMPTY[0], _EMPTY[1]
+        for s, pos in iter_lines(self.path, self.end):
+            for t in line_times(s):
+                if t < lo: lo = t
+                if t > hi: hi = t
+            if pos - start >= block_bytes:
+                self.blocks.append((start, lo, hi))
+                added += 1
+                start, lo, hi = pos, _EMPTY[0], _EMPTY[1]
+            self.end = pos
+        if self.end > start:
+            self.blocks.append((start, lo, hi))
+            added += 1
+        if added:
+            self.head_len = min(self.end, HEAD_CHECK_LEN)
+            self.head_crc = _head_crc(self.path, self.head_len) if self.head_len else 0
+            self._runmax = self._sufmin = None
+        return added
+
+    # ---------- sorgu ----------
+    def _bounds(self) -> Tuple[List[int], List[int]]:
+        if self._runmax is None:
+            runmax, m = [], _EMPTY[1]
+            for _, _, hi in self.blocks:
+                m = max(m, hi)
+                runmax.append(m)
+            sufmin, m = [0] * len(self.blocks), _EMPTY[0]
+            for i in range(len(self.blocks) - 1, -1, -1):
+                m = min(m, self.blocks[i][1])
+                sufmin[i] = m
+            self._runmax, self._sufmin = runmax, sufmin
+        return self._runmax, self._sufmin
+
+    def ranges(self, t0: Optional[int] = None, t1: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        [t0, t1] (ns, dahil; None: sınırsız) ile kesişebilecek blokların birleştirilmiş byte aralıkları.
+        İlk aday: kümülatif max'ı >= t0 olan ilk blok; son aday: sondan kümülatif min'i <= t1 olan son blok.
+        Aradaki bloklardan min/max'ı aralığı kesmeyenler atlanır.
+        """
+        if not self.blocks:
+            return []
+        runmax, sufmin = self._bounds()
+        i = 0 if t0 is None else bisect.bisect_left(runmax, t0)
+        j = len(self.blocks) if t1 is None else bisect.bisect_right(sufmin, t1)
+        out: List[Tuple[int, int]] = []
+        for k in range(i, j):
+            off, lo, hi = self.blocks[k]
+            if (t0 is not None and hi < t0) or (t1 is not None and lo > t1):
+                continue
+            b = self.blocks[k + 1][0] if k + 1 < len(self.blocks) else self.end
+            if out and out[-1][1] == off:
+                out[-1] = (out[-1][0], b)
+            else:
+                out.append((off, b))
+        return out
+
+    def time_span(self) -> Tuple[Optional[int], Optional[int]]:
+        lo = min((b[1] for b in self.blocks), default=_EMPTY[0])
+        hi = max((b[2] for b in self.blocks), default=_EMPTY[1])
+        return (None, None) if lo > hi else (lo, hi)
+
+def open_index(path: str, build: bool = True, save: bool = True) -> Optional[NDJSONIndex]:
+    """
+    Yan indeksi yükler; geçersizse yeniden, dosya büyüdüyse kaldığı yerden kurar (build=True).
+    Sıkıştırılmış dosyalar için None.
+    """
+    if is_compressed(path):
+        return None
+    st = os.stat(path)
+    idx = NDJSONIndex.load(path)
+    if idx is not None and not idx.valid_for(st):
+        idx = None
+    if idx is None:
+        if not build:
+            return None
+        idx = NDJSONIndex(path)
+    if build and idx.extend() and save:
+        try:
+            idx.save()
+        except OSError:
+            pass  # salt okunur arşiv: indeks yalnızca bellekte kullanılır
+    return idx
+
+def iter_time_range(path: str, t0: Optional[int] = None, t1: Optional[int] = None) -> Iterator[bytes]:
+    """
+    [t0, t1] ile kesişebilecek blokların satırları (blok içinde zaman süzmesi yapılmaz).
+    İndekslenemeyen (sıkıştırılmış) dosyada tüm satırlar.
+    """
+    idx = open_index(path)
+    if idx is None:
+        from lp_convert import open_ndjson
+        with open_ndjson(path) as f:
+            for line in f:
+                yield line.rstrip(b"\r\n")
+        return
+    for a, b in idx.ranges(t0, t1):
+        for s, _ in iter_lines(path, a, b):
+            yield s
+
+def main(argv: List[str]) -> int:
+    if len(argv) >= 2 and argv[0] == "build":
+        for path in argv[1:]:
+            idx = open_index(path)
+            if idx is None:
+                print(f"{path}: sıkıştırılmış, atlandı")
+                continue
+            lo, hi = idx.time_span()
+            print(f"{path}: {len(idx.blocks)} blok, {idx.end}B, t=[{lo}, {hi}]")
+        return 0
+    if len(argv) == 4 and argv[0] == "query":
+        idx = open_index(argv[1])
+        if idx is None:
+            print(f"{argv[1]}: indekslenemez (sıkıştırılmış)")
+            return 1
+        rs = idx.ranges(int(argv[2]), int(argv[3]))
+        print(f"{len(rs)} aralık, {sum(b - a for a, b in rs)}B / {idx.end}B okunacak")
+        for a, b in rs:
+            print(f"  [{a}, {b})")
+        return 0
+    print(__doc__.strip().split("Kullanım:")[1].rstrip(), file=sys.stderr)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arşivlenmiş NDJSON'u (logs/, ARCHIVE_DIR, *.ndjson[.gz|.zst]) yeniden Influx'a (veya LP dosyasına) oynatır.
+- Zaman aralığı (--start/--end) ve hedef süzgeci (--target, fnmatch desenleri) uygulanır; sıkıştırılmamış
+  dosyalarda zaman aralığı ndjson_index yan indeksiyle seçilir (yalnızca ilgili bloklar okunur)
+- Dönüşüm lp_convert ile (consumer'ın ürettiği LP'nin aynısı) süreç havuzundaki okuyucularda paralel yapılır
+- Dosyalar job etiketine göre (TM_CFS_DEBUG.<ts>-0001.ndjson -> TM_CFS_DEBUG) gruplanır; grup içinde iş
+  birimlerinin (dosya parçaları) sıralı çıktıları, sonra gruplar zaman damgasına göre birleştirilerek yazılır.
+  Bir grubun tüm birimleri aynı anda okunur: bellek grubun süzülmüş point sayısıyla orantılıdır
+  (büyük arşivlerde --start/--end / --target ile daraltın)
+- Seri (kind, target, packet) başına çıktı zaman sıralıdır: hwm'den eski point'ler (üst üste binen dump
+  pencerelerinin tekrarları) atlanır (--unordered ile kapatılır)
+- --speed: 1 gerçek zaman, 10 on kat hızlı, max beklemeden (Influx'a yük testi ya da bucket'ı yeniden kurma)
+- Influx yazımı consumer'ın write yolundan geçer (INFLUX_WRITER: adaptive yazıcı ya da batching write_api);
+  spool kullanılmaz: spool'daki LP hedef taşımaz, canlı consumer'ın spool'u başka bir Influx'a gidecek veriyi
+  üretim Influx'una gönderirdi. Yazılamayan batch'ler sayılır, çıkış kodu 1 olur (aralık yeniden oynatılabilir)
+
+Kullanım:
+    python3 ndjson_replay.py --dir logs/archive --start 2025-01-01T00:00:00Z --end 2025-01-02T00:00:00Z \\
+        --target 'SIM_42_*' --speed max
+    python3 ndjson_replay.py --dir logs --speed 10 --url http://localhost:8086 --bucket test
+    python3 ndjson_replay.py --dir logs --sink lp --output - | influx write -b my-bucket
+"""
+
+import os, sys, time, heapq, fnmatch, argparse, multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from lp_convert import HwmGate, LP_BATCH_SIZE, chunk_ranges, complete_end, is_compressed, range_to_lp
+from ndjson_index import open_index
+
+NDJSON_SUFFIXES = (".ndjson", ".ndjson.gz", ".ndjson.zst")
+REPLAY_CHUNK_BYTES = int(os.getenv("REPLAY_CHUNK_BYTES", str(8 * 1024 * 1024)))  # okuyucu başına iş birimi
+REPLAY_DEDUPE_MAX = int(os.getenv("REPLAY_DEDUPE_MAX", "64"))  # aynı timestamp'li farklı satırlar için imza
+
+# (t_ns, kind, target, packet, LP satırı)
+Row = Tuple[int, str, str, str, str]
+# (dosya, başlangıç, bitiş) — sıkıştırılmış dosyada tüm dosya
+Unit = Tuple[str, int, int]
+
+def parse_time(s: Optional[str]) -> Optional[int]:
+    """ns (tamsayı) ya da ISO 8601 ("2025-01-01T12:00:00Z"; saat dilimi yoksa UTC) -> ns."""
+    if not s:
+        return None
+    if s.lstrip("-").isdigit():
+        return int(s)
+    dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) * 10**9 + dt.microsecond * 1000
+
+def job_of(path: str) -> str:
+    return os.path.basename(path).split(".", 1)[0]
+
+def find_files(root: str) -> Dict[str, List[str]]:
+    """job etiketi -> ad sırasıyla NDJSON dosyaları (yazılmakta olan .part'lar hariç)."""
+    groups: Dict[str, List[str]] = {}
+    for d, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(NDJSON_SUFFIXES):
+                groups.setdefault(job_of(name), []).append(os.path.join(d, name))
+    for files in groups.values():
+        files.sort(key=os.path.basename)
+    return groups
+
+# ===================== Okuyucular (worker süreçleri) =====================
+class ReplayFilter:
+    """lp_convert gate arayüzü: zaman/hedef süzgecinden geçen point'leri (t, kind, target, packet, satır) toplar."""
+    __slots__ = ("t0", "t1", "targets", "rows")
+
+    def __init__(self, t0: Optional[int], t1: Optional[int], targets: Sequence[str]):
+        self.t0, self.t1, self.targets = t0, t1, tuple(targets)
+        self.rows: List[Row] = []
+
+    def admit(self, tgt: str, pkt: str, kind: str, t_ns: int, row: str) -> bool:
+        if (self.t0 is not None and t_ns < self.t0) or (self.t1 is not None and t_ns > self.t1):
+            return False
+        if self.targets and not any(fnmatch.fnmatchcase(tgt, p) for p in self.targets):
+            return False
+        self.rows.append((t_ns, kind, tgt, pkt, row))
+        return True
+
+def plan_file(path: str, t0: Optional[int], t1: Optional[int], chunk_bytes: int) -> List[Unit]:
+    """Dosyanın okunacak, satır hizalı iş birimleri; zaman aralığı verildiyse yan indeksle daraltılır."""
+    if is_compressed(path):
+        return [(path, 0, os.path.getsize(path))]
+    end = complete_end(path, 0)
+    spans = [(0, end)]
+    if t0 is not None or t1 is not None:
+        idx = open_index(path)
+        if idx is not None:
+            spans = [(a, min(b, end)) for a, b in idx.ranges(t0, t1) if a < end]
+    return [(path, a, b) for s, e in spans for a, b in chunk_ranges(path, s, e, chunk_bytes)]
+
+def read_unit(path: str, start: int, end: int, t0: Optional[int], t1: Optional[int],
+              targets: Sequence[str]) -> List[Row]:
+    """Bir iş biriminin süzülmüş point'leri, zamana göre (kararlı) sıralı."""
+    flt = ReplayFilter(t0, t1, targets)
+    range_to_lp(path, start, end, flt)
+    flt.rows.sort(key=itemgetter(0))
+    return flt.rows
+
+class _InlineExecutor(Executor):
+    """--readers 0: okuyucular ana süreçte (hata ayıklama / küçük arşivler)."""
+    def submit(self, fn, *args, **kwargs):
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+def _unit_rows(fut: Future) -> Iterator[Row]:
+    yield from fut.result()
+
+def group_rows(pool: Executor, units: List[Unit], t0: Optional[int], t1: Optional[int],
+               targets: Sequence[str]) -> Iterator[Row]:
+    """
+    Grubun point'leri zaman sırasıyla: birimler tek tek sıralıdır ama aralıkları örtüşebilir (üst üste binen
+    dump pencereleri, parça sınırında sıra dışı kayıtlar), bu yüzden ard arda eklenmez, birleştirilir.
+    """
+    futs = [pool.submit(read_unit, *u, t0, t1, targets) for u in units]
+    return heapq.merge(*(_unit_rows(f) for f in futs), key=itemgetter(0))
+
+# ===================== Yazıcılar =====================
+class InfluxSink:
+    """consumer'ın write yolu (write_points: INFLUX_WRITER'a göre yazıcı; spool kapalı)."""
+    def __init__(self, args):
+        import influx_consumer_simple as consumer
+        for name in ("url", "org", "bucket", "token"):
+            if getattr(args, name):
+                setattr(consumer, f"INFLUX_{name.upper()}", getattr(args, name))
+        consumer.SPOOL_ENABLED = False
+        consumer.init_influx()
+        self._c = consumer
+        self.failed = 0  # yazılamayan batch (retry'ları tükenen ya da Influx'un reddettiği)
+
+    def write(self, rows: List[str]):
+        try:
+            self._c.write_points(rows, source="replay")
+        except Exception as e:
+            self.failed += 1
+            print(f"Influx yazım hatası: {e}", file=sys.stderr)
+
+    def close(self):
+        w = self._c._adaptive()
+        self._c.close_influx()
+        if w is not None:
+            self.failed += w.stats["errors"] + (1 if w.stats["dropped"] else 0)
+
+class LPSink:
+    failed = 0
+
+    def __init__(self, args):
+        self._f = sys.stdout if args.output in (None, "-") else open(args.output, "w", encoding="utf-8")
+
+    def write(self, rows: List[str]):
+        self._f.write("\n".join(rows) + "\n")
+
+    def close(self):
+        if self._f is not sys.stdout:
+            self._f.close()
+        else:
+            self._f.flush()
+
+# ===================== Replay =====================
+def replay(groups: Dict[str, List[str]], sink, t0: Optional[int] = None, t1: Optional[int] = None,
+           targets: Sequence[str] = (), speed: float = 0.0, readers: int = 4, ordered: bool = True,
+           batch_size: int = LP_BATCH_SIZE, chunk_bytes: int = REPLAY_CHUNK_BYTES,
+           progress_sec: float = 5.0) -> Dict[str, Any]:
+    """
+    groups: find_files() çıktısı. speed: veri zamanının duvar saatine oranı (0: beklemeden).
+    Dönüş: istatistikler (written, skipped, files, units, sec, data_span_ns).
+    """
+    stats: Dict[str, Any] = {"files": sum(len(f) for f in groups.values()), "units": 0,
+                             "written": 0, "skipped": 0, "sec": 0.0, "data_span_ns": 0}
+    # Influx istemcisinin thread'leri varken fork güvenli değil; okuyucular yalnızca lp_convert'i kullanır
+    pool: Executor = (ProcessPoolExecutor(max_workers=readers, mp_context=multiprocessing.get_context("spawn"))
+                      if readers > 0 else _InlineExecutor())
+    try:
+        # 1) planlama (ilk seferde indeks kurulumu dahil) dosya başına paralel
+        plans = {g: [pool.submit(plan_file, p, t0, t1, chunk_bytes) for p in files] for g, files in groups.items()}
+        units = {g: [u for fut in futs for u in fut.result()] for g, futs in plans.items()}
+        stats["units"] = sum(len(u) for u in units.values())
+
+        # 2) gruplar zaman damgasına göre birleştirilir
+        streams = [group_rows(pool, u, t0, t1, targets) for u in units.values() if u]
+        merged = heapq.merge(*streams, key=itemgetter(0))
+        gate = HwmGate(dedupe_max=REPLAY_DEDUPE_MAX) if ordered else None
+
+        wall0 = time.time()
+        first_t: Optional[int] = None
+        last_t = 0
+        batch: List[str] = []
+        next_progress = wall0 + progress_sec
+
+        def flush():
+            if batch:
+                sink.write(batch)
+                stats["written"] += len(batch)
+                batch.clear()
+
+        for t, kind, tgt, pkt, row in merged:
+            if gate is not None and not gate.admit(tgt, pkt, kind, t, row):
+                stats["skipped"] += 1
+                continue
+            if first_t is None:
+                first_t = t
+            last_t = max(last_t, t)
+            if speed > 0:
+                due = wall0 + (t - first_t) / 1e9 / speed
+                wait = due - time.time()
+                if wait > 0.05:  # öndeyiz: birikeni gönder, point'in zamanına kadar bekle
+                    flush()
+                    time.sleep(wait)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+            now = time.time()
+            if progress_sec and now >= next_progress:
+                next_progress = now + progress_sec
+                pos = datetime.fromtimestamp(t / 1e9, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                print(f"[{time.strftime('%X')}] replay {pos} | {stats['written']:,} point yazıldı, "
+                      f"{stats['skipped']:,} atlandı | {stats['written'] / (now - wall0):,.0f} point/s",
+                      file=sys.stderr, flush=True)
+        flush()
+        stats["sec"] = time.time() - wall0
+        stats["data_span_ns"] = (last_t - first_t) if first_t is not None else 0
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", required=True, help="NDJSON kök dizini (alt dizinler dahil)")
+    ap.add_argument("--start", help="başlangıç (ns ya da ISO 8601, dahil)")
+    ap.add_argument("--end", help="bitiş (ns ya da ISO 8601, dahil)")
+    ap.add_argument("--target", action="append", default=[], help="hedef (fnmatch deseni; tekrarlanabilir)")
+    ap.add_argument("--speed", default="max", help="1 gerçek zaman, 10 on kat, max beklemeden")
+    ap.add_argument("--readers", type=int, default=min(4, os.cpu_count() or 1), help="okuyucu süreç (0: ana süreç)")
+    ap.add_argument("--batch", type=int, default=LP_BATCH_SIZE, help="yazım başına point")
+    ap.add_argument("--unordered", action="store_true", help="seri başına sıralama/tekrar ayıklama yapma")
+    ap.add_argument("--sink", choices=["influx", "lp"], default="influx")
+    ap.add_argument("--output", help="--sink lp: çıktı dosyası (varsayılan stdout)")
+    ap.add_argument("--url"); ap.add_argument("--org"); ap.add_argument("--bucket"); ap.add_argument("--token")
+    ap.add_argument("--progress-sec", type=float, default=5.0)
+    args = ap.parse_args()
+
+    speed = 0.0 if args.speed.lower() in ("max", "0", "inf") else float(args.speed)
+    groups = find_files(args.dir)
+    if not groups:
+        print(f"{args.dir}: NDJSON dosyası yok", file=sys.stderr)
+        sys.exit(1)
+    sink = InfluxSink(args) if args.sink == "influx" else LPSink(args)
+    try:
+        st = replay(groups, sink, parse_time(args.start), parse_time(args.end), args.target, speed=speed,
+                    readers=args.readers, ordered=not args.unordered, batch_size=args.batch,
+                    progress_sec=args.progress_sec)
+    finally:
+        sink.close()
+    rate = st["written"] / st["sec"] if st["sec"] > 0 else 0
+    accel = st["data_span_ns"] / 1e9 / st["sec"] if st["sec"] > 0 else 0
+    print(f"replay bitti: {st['files']} dosya / {st['units']} birim, {st['written']:,} point yazıldı, "
+          f"{st['skipped']:,} atlandı | {st['sec']:.1f}s, {rate:,.0f} point/s, {accel:,.1f}x veri zamanı",
+          file=sys.stderr)
+    if sink.failed:
+        print(f"UYARI: {sink.failed} batch Influx'a yazılamadı (spool yok); aralığı yeniden oynatın", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import json, time, threading, urllib.request, urllib.error
+import os, re, sys, gzip, json, time, zlib, queue, random, asyncio, itertools, threading, http.client
 import websocket
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Optional, Set, Union
 
 AUTH   = "123"
 HOST   = "localhost:2900"
@@ -10,6 +11,58 @@ SCOPE  = "DEFAULT"
 
 IDLE_TIMEOUT_SEC = 3.0  # pencere dump’ı bitince ws'in susma süresi
 
+BASE_DIR   = os.path.dirname(os.path.abspath(__file__))
+NDJSON_DIR = os.getenv("NDJSON_DIR", "dbprocesses/logs")
+
+sys.path.insert(0, os.path.join(BASE_DIR, "dbprocesses"))
+import ndjson_codec as codec  # consumer ile ortak JSON codec (orjson > simdjson > json)
+import metrics                # consumer ile ortak /metrics kayıt defteri
+
+# Pipeline modu: kayıtlar diske yazılmadan doğrudan Influx'a (consumer'ın LP yolu) gider.
+# NDJSON çıktısı isteğe bağlı bir kopya (tee) olarak kalır.
+PIPELINE_MODE       = os.getenv("PIPELINE_MODE", "0") == "1"
+PIPELINE_TEE_NDJSON = os.getenv("PIPELINE_TEE_NDJSON", "0") == "1"
+PIPELINE_QUEUE_MAX  = int(os.getenv("PIPELINE_QUEUE_MAX", "1000"))   # mesaj (payload) sayısı
+PIPELINE_BATCH      = int(os.getenv("PIPELINE_BATCH", "5000"))       # write_api çağrısı başına point
+
+# Mux modu: tüm job'lar tek, uzun ömürlü ws bağlantısını ve tek StreamingChannel aboneliğini paylaşır.
+# (thread motoru ve canlı mod içindir; DOWNLOADER_ENGINE=asyncio ile yok sayılır)
+WS_MUX = os.getenv("WS_MUX", "0") == "1"
+
+# Canlı mod: her job bir kez (end_time'sız) abone olur, kayıtlar geldikçe akar.
+# Paket başına son görülen __time (high-water mark) diske yazılır; yeniden bağlanınca oradan devam edilir.
+LIVE_MODE           = os.getenv("DOWNLOAD_MODE", "periodic") == "live"
+LIVE_STATE_PATH     = os.getenv("LIVE_STATE_PATH", os.path.join(NDJSON_DIR, ".live_hwm.json"))
+LIVE_CHECKPOINT_SEC = float(os.getenv("LIVE_CHECKPOINT_SEC", "2.0"))
+RECONNECT_MAX_SEC   = float(os.getenv("RECONNECT_MAX_SEC", "30.0"))
+
+# Segment modu: her dump dosyayı ezmek yerine dönen segment dosyalarına ekler.
+# Segment ".part" adıyla yazılır, kapanınca atomik olarak ".ndjson[.gz|.zst]" adına taşınır.
+NDJSON_ROTATE    = os.getenv("NDJSON_ROTATE", "0") == "1"
+ROTATE_MAX_BYTES = int(os.getenv("ROTATE_MAX_BYTES", str(64 * 1024 * 1024)))  # sıkıştırma öncesi
+ROTATE_MAX_SEC   = float(os.getenv("ROTATE_MAX_SEC", "60"))
+NDJSON_COMPRESS  = os.getenv("NDJSON_COMPRESS", "none")   # none | gzip | zstd
+
+# NDJSON yazım tamponu: mesaj başına flush yerine zaman/boyut bütçesi.
+# Passthrough modunda payload yeniden JSON'a çevrilmeden ham metniyle tek satır (JSON dizisi) yazılır.
+NDJSON_FLUSH_SEC   = float(os.getenv("NDJSON_FLUSH_SEC", "0.5"))
+NDJSON_FLUSH_BYTES = int(os.getenv("NDJSON_FLUSH_BYTES", str(1024 * 1024)))
+NDJSON_PASSTHROUGH = os.getenv("NDJSON_PASSTHROUGH", "0") == "1"
+
+# asyncio motoru: job başına thread yerine tek event loop (websockets paketi gerekir)
+ASYNC_ENGINE          = os.getenv("DOWNLOADER_ENGINE", "thread") == "asyncio"
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "32"))  # aynı anda açık dump sayısı
+
+# Metrics: >0 ise http://METRICS_ADDR:port/metrics (Prometheus metin formatı)
+METRICS_PORT = int(os.getenv("DL_METRICS_PORT", "0"))
+
+M_DUMP_RECORDS = metrics.counter("nos3_dump_records_total", "Websocket'ten alınan kayıt sayısı", ["job"])
+M_DUMP_SEC     = metrics.histogram("nos3_dump_duration_seconds", "Pencere dump süresi (bağlantıdan kapanışa)", ["job"],
+                                   buckets=(1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 300))
+M_IDLE_WASTE   = metrics.counter("nos3_dump_idle_wait_seconds_total",
+                                 "Son veriden sonra IDLE_TIMEOUT dolana kadar boşa beklenen süre", ["job"])
+M_PARSE_ERR    = metrics.counter("nos3_ws_parse_errors_total", "JSON olarak parse edilemeyen ws mesajı", ["job"])
+
 # ---------------- Jobs (dinamik yapı) ----------------
 JOBS = [
     {
@@ -204,54 +257,277 @@ JOBS = [
 ]
 
 # ------- Packet list cache (API çağrılarını azalt) -------
-_packet_cache: Dict[Tuple[str,str], Tuple[float, List[str]]] = {}
-CACHE_TTL_SEC = 300  # 5 dk
+CACHE_TTL_SEC       = 300  # 5 dk
+CACHE_NEG_TTL_SEC   = float(os.getenv("CACHE_NEG_TTL_SEC", "60"))    # boş liste (paketi olmayan hedef) ömrü
+CACHE_REFRESH_AHEAD = float(os.getenv("CACHE_REFRESH_AHEAD", "0.8")) # TTL'in bu oranında arka planda yenile
+PACKET_CACHE_PATH   = os.getenv("PACKET_CACHE_PATH", os.path.join(NDJSON_DIR, ".packet_cache.json"))
 
-def _rpc_call(method: str, params: List[Any]) -> Any:
-    url = f"http://{HOST}/openc3-api/api"
-    payload = {
-        "jsonrpc": "2.0",
-        "method": method,
-        "params": params,
-        "id": 1,
-        "keyword_params": {"scope": SCOPE}
-    }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, method="POST")
-    req.add_header("Content-Type", "application/json-rpc")
-    req.add_header("Authorization", AUTH)
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        body = resp.read()
-        obj = json.loads(body.decode("utf-8", errors="ignore"))
+class PacketNameCache:
+    """
+    (kind, target) -> paket adları. Thread-safe, diske kalıcı, stale-while-revalidate:
+    - taze kayıt: doğrudan döner; TTL'in CACHE_REFRESH_AHEAD oranı geçtiyse arka planda yenilenir
+    - bayat kayıt: beklemeden bayat değer döner, yenileme arka planda yapılır
+    - kayıt yok: tek seferlik senkron yükleme (yalnızca ilk görüşte / hiç kalıcı kayıt yoksa)
+    Boş listeler CACHE_NEG_TTL_SEC kadar tutulur (negatif cache).
+    """
+    def __init__(self, path: Optional[str] = PACKET_CACHE_PATH, ttl_sec: float = CACHE_TTL_SEC,
+                 neg_ttl_sec: float = CACHE_NEG_TTL_SEC, refresh_ahead: float = CACHE_REFRESH_AHEAD):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.neg_ttl_sec = neg_ttl_sec
+        self.refresh_ahead = refresh_ahead
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        self._refreshing: set = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        # bozuk / beklenmeyen biçimli dosya boş cache sayılır (sonraki _save üzerine yazar)
+        entries: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for k, (ts, names) in data.items():
+                kind, _, target = k.partition("|")
+                entries[(kind, target)] = (float(ts), [str(n) for n in names])
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[cache] {self.path} okunamadı, boş cache ile başlanıyor: {e}")
+            return
+        self._entries = entries
+
+    def _save(self):
+        # çağıran self._lock'u tutar
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({f"{k[0]}|{k[1]}": v for k, v in self._entries.items()}, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[cache] {self.path} yazılamadı: {e}")
+
+    def _ttl(self, names: List[str]) -> float:
+        return self.ttl_sec if names else self.neg_ttl_sec
+
+    def peek(self, key: Tuple[str, str]) -> Tuple[Optional[List[str]], bool]:
+        """(adlar veya None, yenileme gerekli mi). Sayaçları günceller, yükleme yapmaz."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None, True
+            ts, names = entry
+            age, ttl = now - ts, self._ttl(names)
+            if age < ttl:
+                self.stats["hits"] += 1
+                return names, age >= ttl * self.refresh_ahead
+            self.stats["stale_hits"] += 1
+            return names, True
+
+    def put(self, key: Tuple[str, str], names: List[str]):
+        with self._lock:
+            self._entries[key] = (time.time(), list(names))
+            self._save()
+
+    def _claim_refresh(self, key: Tuple[str, str]) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _refresh(self, key: Tuple[str, str], loader):
+        try:
+            result = loader()
+            self.put(key, result if isinstance(result, list) else [])
+            with self._lock:
+                self.stats["refreshes"] += 1
+        except Exception as e:
+            with self._lock:
+                self.stats["refresh_errors"] += 1
+            print(f"[cache] {key[1]} paket listesi yenilenemedi (eski değer kullanılıyor): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: Tuple[str, str], loader) -> List[str]:
+        names, needs_refresh = self.peek(key)
+        if names is None:
+            result = loader()
+            names = result if isinstance(result, list) else []
+            self.put(key, names)
+            return names
+        if needs_refresh and self._claim_refresh(key):
+            threading.Thread(target=self._refresh, args=(key, loader), name="cache-refresh", daemon=True).start()
+        return names
+
+_packet_cache = PacketNameCache()
+metrics.counter("nos3_packet_cache_events_total", "Paket adı cache olayları (hits/stale_hits/misses/...)",
+                ["event"]).set_function(lambda: dict(_packet_cache.stats))
+
+RPC_POOL_SIZE   = int(os.getenv("RPC_POOL_SIZE", "4"))
+RPC_RETRIES     = int(os.getenv("RPC_RETRIES", "3"))
+RPC_BACKOFF_SEC = float(os.getenv("RPC_BACKOFF_SEC", "0.5"))
+
+class RpcError(RuntimeError):
+    """Sunucunun JSON-RPC "error" yanıtı (tekrar denenmez)."""
+
+def _rpc_body_or_none(data: bytes) -> Any:
+    """4xx gövdesi JSON-RPC yanıt(lar)ıysa onu, değilse (HTML/metin hata sayfası) None döner."""
+    try:
+        obj = json.loads(data.decode("utf-8", errors="ignore"))
+    except ValueError:
+        return None
+    if isinstance(obj, list) or (isinstance(obj, dict) and "error" in obj):
+        return obj
+    return None
+
+class OpenC3RpcClient:
+    """
+    /openc3-api/api için keep-alive bağlantı havuzlu JSON-RPC 2.0 istemcisi.
+    - call(): tek çağrı; batch(): tek round-trip'te çoklu çağrı
+    - Ağ hatalarında, 5xx ve 429'da jitter'lı üstel geri çekilme ile tekrar dener; diğer 4xx'ler
+      (yetki, hatalı istek) tekrar denenmez: gövde JSON-RPC yanıtı değilse hemen RpcError
+    """
+    def __init__(self, host: str = HOST, pool_size: int = RPC_POOL_SIZE, timeout: float = 10.0,
+                 retries: int = RPC_RETRIES, backoff_sec: float = RPC_BACKOFF_SEC):
+        self.host = host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_sec = backoff_sec
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+        self._ids = itertools.count(1)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _post(self, payload: Any) -> Any:
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json-rpc", "Authorization": AUTH}
+        for attempt in range(self.retries + 1):
+            conn = self._acquire()
+            try:
+                conn.request("POST", "/openc3-api/api", body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                if resp.status >= 500 or resp.status == 429:
+                    raise http.client.HTTPException(f"HTTP {resp.status}")
+                if resp.status >= 400:
+                    obj = _rpc_body_or_none(data)
+                    if obj is None:
+                        conn.close()
+                        raise RpcError(f"HTTP {resp.status}: {data[:200].decode('utf-8', errors='replace')}")
+                else:
+                    obj = json.loads(data.decode("utf-8", errors="ignore"))
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                conn.close()
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff_sec * (2 ** attempt) * (0.5 + random.random())
+                print(f"[rpc] hata: {e} — {delay:.2f}s sonra tekrar ({attempt + 1}/{self.retries})")
+                time.sleep(delay)
+                continue
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return obj
+
+    def _request(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "method": method, "params": params,
+                "id": next(self._ids), "keyword_params": {"scope": SCOPE}}
+
+    def call(self, method: str, params: List[Any]) -> Any:
+        obj = self._post(self._request(method, params))
         if "error" in obj:
-            raise RuntimeError(obj["error"])
+            raise RpcError(obj["error"])
         return obj.get("result")
 
+    def batch(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """
+        Çağrıları tek JSON-RPC batch isteğinde gönderir; sonuçlar çağrı sırasıyla döner
+        (hatalı çağrının yerinde RpcError nesnesi). Sunucu batch desteklemiyorsa
+        çağrılar aynı keep-alive bağlantı üzerinden tek tek yapılır.
+        """
+        if not calls:
+            return []
+        reqs = [self._request(m, p) for m, p in calls]
+        try:
+            obj = self._post(reqs)
+        except RpcError:
+            obj = None  # batch'i reddeden (4xx) sunucu: tek tek denenir
+        if isinstance(obj, list):
+            by_id = {r.get("id"): r for r in obj if isinstance(r, dict)}
+            out: List[Any] = []
+            for req in reqs:
+                r = by_id.get(req["id"])
+                if r is None:
+                    out.append(RpcError(f"batch yanıtında id={req['id']} yok"))
+                elif "error" in r:
+                    out.append(RpcError(r["error"]))
+                else:
+                    out.append(r.get("result"))
+            return out
+        out = []
+        for m, p in calls:
+            try:
+                out.append(self.call(m, p))
+            except RpcError as e:
+                out.append(e)
+        return out
+
+_rpc = OpenC3RpcClient()
+
+def _rpc_call(method: str, params: List[Any]) -> Any:
+    return _rpc.call(method, params)
+
 def get_all_telemetry_names(target: str) -> List[str]:
-    key = ("TM", target)
-    now = time.time()
-    if key in _packet_cache:
-        ts, names = _packet_cache[key]
-        if now - ts < CACHE_TTL_SEC:
-            return names
-    result = _rpc_call("get_all_telemetry_names", [target])
-    if not isinstance(result, list):
-        result = []
-    _packet_cache[key] = (now, result)
-    return result
+    return _packet_cache.get(("TM", target), lambda: _rpc_call("get_all_telemetry_names", [target]))
 
 def get_all_command_names(target: str) -> List[str]:
-    key = ("CMD", target)
-    now = time.time()
-    if key in _packet_cache:
-        ts, names = _packet_cache[key]
-        if now - ts < CACHE_TTL_SEC:
-            return names
-    result = _rpc_call("get_all_command_names", [target])
-    if not isinstance(result, list):
-        result = []
-    _packet_cache[key] = (now, result)
-    return result
+    return _packet_cache.get(("CMD", target), lambda: _rpc_call("get_all_command_names", [target]))
+
+def prefetch_packet_names(jobs: List[Dict[str, Any]]):
+    """packet_mode="all" olan tüm job'ların paket listelerini tek batch round-trip'te cache'e yükler."""
+    wanted: List[Tuple[str, str]] = []
+    for job in jobs:
+        if job["packet_mode"] != "all":
+            continue
+        key = ("TM", job["target"]) if job["kind"] == "TM" else ("CMD", job["target"])
+        if key not in wanted and _packet_cache.peek(key)[1]:
+            wanted.append(key)
+    if not wanted:
+        return
+    calls = [("get_all_telemetry_names" if k == "TM" else "get_all_command_names", [t]) for k, t in wanted]
+    t0 = time.time()
+    try:
+        results = _rpc.batch(calls)
+    except Exception as e:
+        print(f"[rpc] paket listeleri önceden alınamadı: {e} (job'lar ilk tick'te kendisi deneyecek)")
+        return
+    for key, result in zip(wanted, results):
+        if isinstance(result, Exception):
+            print(f"[rpc] {key[1]} paket listesi alınamadı: {result}")
+            continue
+        _packet_cache.put(key, result if isinstance(result, list) else [])
+    print(f"[rpc] {len(wanted)} hedefin paket listesi {time.time() - t0:.2f}s'de alındı")
 
 def build_packet_keys(kind: str, target: str, packet_names: List[str]) -> List[str]:
     # kind: "TM" (telemetry) -> "TLM"  |  "TC" (command) -> "CMD"
@@ -259,76 +535,632 @@ def build_packet_keys(kind: str, target: str, packet_names: List[str]) -> List[s
     prefix = f"DECOM__{mode}__{target}__"
     return [prefix + p for p in packet_names]
 
+# --------------- In-process pipeline (ws -> LP -> Influx) ---------------
+class InfluxPipeline:
+    """
+    Websocket kayıtlarını sınırlı bir kuyruk üzerinden consumer'ın
+    extract_meta -> (DOWNSAMPLE) -> to_line_protocol -> write_api yoluna besler.
+    Kuyruk doluysa put() bloklar; böylece Influx yavaşladığında ws okuması da yavaşlar.
+    """
+    def __init__(self, maxsize: int = PIPELINE_QUEUE_MAX, batch_size: int = PIPELINE_BATCH):
+        import influx_consumer_simple as consumer
+        consumer.init_influx()
+        if consumer.HWM_ENABLED: consumer.load_hwm()   # yeniden dump edilen pencerelerdeki eski point'ler atlanır
+        self._c = consumer
+        self._agg = consumer.init_downsample()
+        # akış durunca açık toplama pencereleri idle süresinden sonra yazılsın
+        self._idle = consumer.DOWNSAMPLE_IDLE_SEC if self._agg else None
+        self._batch_size = batch_size
+        self._q: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="influx-pipeline", daemon=True)
+        self._thread.start()
+        metrics.gauge("nos3_pipeline_queue_depth", "Pipeline kuyruğunda bekleyen mesaj").set_function(self._q.qsize)
+
+    def put(self, recs: List[Dict[str, Any]]):
+        self._q.put(recs)
+
+    def _write(self, rows: List[str]):
+        try:
+            self._c.write_points(rows, source="pipeline")   # Influx kapalıysa consumer'ın spool'una düşer
+        except Exception as e:
+            print(f"[pipeline] Influx yazım hatası: {e}")
+
+    def _run(self):
+        extract_meta, to_line_protocol, emit_lp = self._c.extract_meta, self._c.to_line_protocol, self._c.emit_lp
+        agg = self._agg
+        stop = False
+        last_flush = time.monotonic()
+        while not stop:
+            # idle pencereler duvar saatine göre kapanır; sürekli veri gelse de (queue.Empty hiç olmasa da) yazılır
+            if agg is not None and time.monotonic() - last_flush >= self._idle:
+                self._c.flush_downsample()
+                last_flush = time.monotonic()
+            try:
+                batch = [self._q.get(timeout=self._idle)]
+            except queue.Empty:
+                continue
+            # kuyrukta bekleyenleri de al (tek write çağrısında birleşsin)
+            while len(batch) < 64:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            rows: List[str] = []
+            gate = self._c.hwm_gate()
+            for recs in batch:
+                if recs is None:
+                    stop = True
+                    continue
+                for rec in recs:
+                    t_ns, tgt, pkt, kind, fields = extract_meta(rec)
+                    if (t_ns is None) or (tgt is None) or (pkt is None) or not fields:
+                        continue
+                    if agg is not None:
+                        closed = agg.feed(t_ns, tgt, pkt, kind, fields)
+                        if closed is not None:
+                            if closed: emit_lp(closed, rows, gate)
+                            continue
+                    row = to_line_protocol(tgt, pkt, kind, fields, t_ns)
+                    if row and (gate is None or gate.admit(tgt, pkt, kind, t_ns, row)): rows.append(row)
+                if len(rows) >= self._batch_size:
+                    self._write(rows); rows = []
+            if rows:
+                self._write(rows)
+            self._c.commit_hwm(gate)
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join()
+        self._c.flush_downsample(final=True)
+        self._c.close_influx()
+
+_pipeline: Optional[InfluxPipeline] = None
+
+# --------------- Segment dosyaları (dönen, sıkıştırılmış NDJSON) ---------------
+class SegmentWriter:
+    """
+    outfile (ör. logs/TM_CFS_DEBUG.ndjson) için zaman/boyut sınırlı segmentler yazar:
+    logs/TM_CFS_DEBUG.20250101T120000-0001.ndjson[.gz|.zst]
+    Açık segment ".part" uzantılıdır (consumer görmez); kapanınca os.replace ile yayınlanır.
+    Açılışta önceki bir çökmeden kalan .part'lar kurtarılır (recover_parts).
+    """
+    def __init__(self, outfile: str, max_bytes: int = ROTATE_MAX_BYTES, max_sec: float = ROTATE_MAX_SEC,
+                 compress: str = NDJSON_COMPRESS):
+        self.dir, base = os.path.split(outfile)
+        self.stem = base[:-len(".ndjson")] if base.endswith(".ndjson") else base
+        self.max_bytes = max_bytes
+        self.max_sec = max_sec
+        self.compress = compress
+        self.ext = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}.get(compress, ".ndjson")
+        self._lock = threading.Lock()
+        self._raw = None
+        self._f = None
+        self._seq = 0
+        self._opened = 0.0
+        self._bytes = 0
+        self.recover_parts()
+
+    def recover_parts(self) -> int:
+        """
+        Süreç çöktüğü için kapanmamış .part segmentlerini tam satırlarıyla yayınlar (sıkıştırılmışsa okunabilen
+        kısım yeniden sıkıştırılır); yarım kalan son satır atılır, boş kalanlar silinir. Yayınlanan sayısı döner.
+        """
+        pat = re.compile(re.escape(self.stem) + r"\.\d{8}T\d{6}-\d{4}(\.ndjson(?:\.gz|\.zst)?)(\.recover)?\.part$")
+        matches = [m for m in map(pat.match, sorted(os.listdir(self.dir or "."))) if m]
+        for m in matches:  # önceki bir kurtarmanın yarım kalan geçici dosyası (asıl .part hâlâ duruyor)
+            if m.group(2):
+                os.remove(os.path.join(self.dir, m.group(0)))
+        recovered = 0
+        for m in matches:
+            if m.group(2):
+                continue
+            name = m.group(0)
+            part = os.path.join(self.dir, name)
+            final = part[:-len(".part")]
+            try:
+                data = _read_part(part, m.group(1))
+                data = data[:data.rfind(b"\n") + 1]
+                if not data:
+                    os.remove(part)
+                    continue
+                if os.path.exists(final):
+                    print(f"[segment] {name} kurtarılamadı: {os.path.basename(final)} zaten var")
+                    continue
+                tmp = final + ".recover.part"
+                with open(tmp, "wb") as f:
+                    if m.group(1) == ".ndjson.gz":
+                        with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as z:
+                            z.write(data)
+                    elif m.group(1) == ".ndjson.zst":
+                        import zstandard
+                        f.write(zstandard.ZstdCompressor(level=3).compress(data))
+                    else:
+                        f.write(data)
+                os.replace(tmp, final)
+                os.remove(part)
+                recovered += 1
+                print(f"[segment] yarım kalan segment kurtarıldı → {final} ({len(data)}B)")
+            except Exception as e:
+                print(f"[segment] {name} kurtarılamadı: {e}")
+        return recovered
+
+    def _open_segment(self):
+        self._seq += 1
+        name = f"{self.stem}.{time.strftime('%Y%m%dT%H%M%S')}-{self._seq:04d}{self.ext}"
+        self._final = os.path.join(self.dir, name)
+        self._part = self._final + ".part"
+        self._raw = open(self._part, "wb")
+        if self.compress == "gzip":
+            self._f = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+        elif self.compress == "zstd":
+            import zstandard
+            self._f = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._f = self._raw
+        self._opened = time.time()
+        self._bytes = 0
+
+    def _close_segment(self):
+        # çağıran self._lock'u tutar
+        if self._f is None:
+            return
+        if self._f is not self._raw:
+            self._f.close()
+        self._raw.close()
+        self._f = self._raw = None
+        if self._bytes:
+            os.replace(self._part, self._final)
+            print(f"[{time.strftime('%X')}] segment kapandı → {self._final} ({self._bytes}B)")
+        else:
+            os.remove(self._part)
+
+    def write(self, b: bytes):
+        with self._lock:
+            if self._f is None:
+                self._open_segment()
+            self._f.write(b)
+            self._bytes += len(b)
+            if self._bytes >= self.max_bytes:
+                self._close_segment()
+
+    def flush(self):
+        # .part dosyası kimse tarafından okunmaz; sıkıştırıcıyı her mesajda flush'lamak oranı bozar
+        with self._lock:
+            if self._f is not None and self._f is self._raw:
+                self._raw.flush()
+
+    def maybe_rotate(self):
+        with self._lock:
+            if self._f is not None and time.time() - self._opened >= self.max_sec:
+                self._close_segment()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+def _read_part(path: str, ext: str) -> bytes:
+    """.part segmentinin açılabilen içeriği; sıkıştırılmış akış yarıda kesilmişse o ana kadarki kısım."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if ext == ".ndjson.gz":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(raw)
+    if ext == ".ndjson.zst":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return raw
+
+_segment_writers: Dict[str, SegmentWriter] = {}
+_segment_lock = threading.Lock()
+
+def _rotate_ticker():
+    # yazı gelmese de süresi dolan segmentler kapanıp consumer'a teslim edilsin
+    while True:
+        time.sleep(1.0)
+        with _segment_lock:
+            writers = list(_segment_writers.values())
+        for w in writers:
+            try:
+                w.maybe_rotate()
+            except Exception as e:
+                print(f"[segment] döndürme hatası ({w.stem}): {e}")
+
+def segment_writer(outfile: str) -> SegmentWriter:
+    with _segment_lock:
+        w = _segment_writers.get(outfile)
+        if w is None:
+            if not _segment_writers:
+                threading.Thread(target=_rotate_ticker, name="segment-rotate", daemon=True).start()
+            w = _segment_writers[outfile] = SegmentWriter(outfile)
+        return w
+
+def close_segment_writers():
+    with _segment_lock:
+        writers = list(_segment_writers.values())
+    for w in writers:
+        w.close()
+
+# --------------- Dump çıktısı (NDJSON dosyası ve/veya pipeline) ---------------
+def raw_payload(msg: str) -> Optional[str]:
+    """
+    Action Cable mesajındaki "message" değerinin ham JSON metni (yeniden encode etmeden).
+    Yalnızca "message" son anahtarsa (identifier önce) güvenlidir; değilse None.
+    """
+    i = msg.find('"message":')
+    if i < 0 or msg.find('"identifier"', i) >= 0:
+        return None
+    j = msg.rfind("}")
+    raw = msg[i + 10:j].strip()
+    return raw if raw[:1] in ("[", "{") else None
+
+class _DumpSink:
+    """
+    Bir dump'ın kayıtlarını NDJSON dosyasına (veya segmentine) ve/veya pipeline'a yazar.
+    Bir payload'ın tüm kayıtları tek write ile yazılır; flush NDJSON_FLUSH_SEC/NDJSON_FLUSH_BYTES
+    bütçesiyle yapılır (consumer yalnızca tam satırları okur, yarım flush güvenlidir).
+    """
+    def __init__(self, outfile: Optional[str], pipeline: Optional[InfluxPipeline], mode: str = "w"):
+        self._owns_f = not NDJSON_ROTATE
+        if outfile and NDJSON_ROTATE:
+            self.f = segment_writer(outfile)   # job'un dump'ları arasında paylaşılır
+        else:
+            self.f = open(outfile, mode + "b", buffering=NDJSON_FLUSH_BYTES) if outfile else None
+        self.pipeline = pipeline
+        self.count = 0
+        self._last_flush = time.time()
+
+    def _emit(self, data: bytes):
+        self.f.write(data)
+        now = time.time()
+        if now - self._last_flush >= NDJSON_FLUSH_SEC:
+            self.f.flush()
+            self._last_flush = now
+
+    def write_raw(self, msg: Union[str, bytes]):
+        if self.f:
+            self._emit((msg.encode("utf-8") if isinstance(msg, str) else msg)+b"\n")
+        self.count += 1
+
+    def write(self, recs: List[Dict[str, Any]], raw: Optional[str] = None):
+        """raw verilirse (passthrough) dosyaya kayıtlar yerine payload'ın ham metni yazılır."""
+        if self.f:
+            if raw is not None:
+                self._emit(raw.encode("utf-8")+b"\n")
+            elif recs:
+                self._emit(codec.dumps_lines(recs))
+        if self.pipeline and recs:
+            self.pipeline.put(recs)
+        self.count += len(recs)
+
+    def flush(self):
+        if self.f:
+            self.f.flush()
+            self._last_flush = time.time()
+
+    def close(self):
+        if not self.f: return
+        if self._owns_f: self.f.close()
+        else: self.f.flush()
+
+def _describe_dest(outfile: Optional[str], pipeline: Optional[InfluxPipeline]) -> str:
+    if outfile and pipeline: return f"pipeline + {outfile}"
+    return outfile or "pipeline"
+
+def _subscribe_msg(identifier: str, action: str, keys: List[str], **extra) -> str:
+    data = {"action": action, "scope": SCOPE, "token": AUTH, "packets": keys}
+    data.update(extra)
+    return json.dumps({"command":"message","identifier":identifier,"data":json.dumps(data)})
+
 # --------------- Dump (mevcut yapıyı bozma) ---------------
-def dump_decom_ndjson(decom_packet_keys: List[str], window_sec: int, outfile: str, label: str):
+def _observe_dump(label: str, started: float, last_data_time: float, count: int):
+    end = time.time()
+    M_DUMP_RECORDS.inc(count, job=label)
+    M_DUMP_SEC.observe(end - started, job=label)
+    M_IDLE_WASTE.inc(max(0.0, end - last_data_time), job=label)
+
+def dump_decom_ndjson(decom_packet_keys: List[str], window_sec: int, outfile: Optional[str], label: str,
+                      pipeline: Optional[InfluxPipeline] = None):
     end_ns   = int(time.time() * 1e9)
     start_ns = int((time.time() - window_sec) * 1e9)
 
+    started = time.time()
     ws_url = f"ws://{HOST}/openc3-api/cable?scope={SCOPE}&authorization={AUTH}"
     ws = websocket.WebSocket()
     ws.connect(ws_url)
 
     identifier = json.dumps({"channel":"StreamingChannel"})
     ws.send(json.dumps({"command":"subscribe","identifier":identifier}))
+    ws.send(_subscribe_msg(identifier, "add", decom_packet_keys, start_time=start_ns, end_time=end_ns))
 
-    data = {
-      "action":"add","scope":SCOPE,"token":AUTH,
-      "packets": decom_packet_keys,
-      "start_time": start_ns,
-      "end_time": end_ns
-    }
-    ws.send(json.dumps({"command":"message","identifier":identifier,"data":json.dumps(data)}))
-
-    print(f"[{time.strftime('%X')}] {label} → pencere {window_sec}s, dosya: {outfile}")
+    dest = _describe_dest(outfile, pipeline)
+    print(f"[{time.strftime('%X')}] {label} → pencere {window_sec}s, hedef: {dest}")
 
     last_data_time = time.time()
-    count = 0
-    with open(outfile,"w") as f:
+    sink = _DumpSink(outfile, pipeline)
+    try:
+        while True:
+            now = time.time()
+            if now - last_data_time > IDLE_TIMEOUT_SEC:
+                break
+            try:
+                ws.settimeout(1.0)
+                msg = ws.recv()
+            except websocket._exceptions.WebSocketTimeoutException:
+                continue
+
+            try:
+                obj = codec.loads(msg)
+            except Exception:
+                M_PARSE_ERR.inc(job=label)
+                sink.write_raw(msg)
+                last_data_time = now
+                continue
+
+            if isinstance(obj, dict):
+                if obj.get("type") in ("welcome","ping","confirm_subscription"):
+                    continue
+                payload = obj.get("message")
+                if not payload:
+                    continue
+
+                recs = payload if isinstance(payload, list) else [payload]
+                raw = raw_payload(msg) if NDJSON_PASSTHROUGH else None
+                sink.write([rec for rec in recs if isinstance(rec, dict)], raw=raw)
+                last_data_time = now
+    finally:
+        ws.close()
+        sink.close()
+        _observe_dump(label, started, last_data_time, sink.count)
+
+    print(f"[{time.strftime('%X')}] {label} → bütün paketler yazdırıldı → {dest} ({sink.count} satır)")
+
+# --------------- Mux: tek ws oturumu, job başına paket seti ---------------
+def record_packet_key(rec: Dict[str, Any], mode: str = "TLM") -> Optional[str]:
+    """
+    Kaydın ait olduğu paket anahtarı ("DECOM__TLM__TGT__PKT"). items formu tür taşımaz: anahtar
+    target/packet'tan, çağıranın bildiği moda (TLM | CMD) göre kurulur.
+    """
+    key = rec.get("__packet")
+    if key:
+        return str(key)
+    if "target" in rec and "packet" in rec:
+        return f"DECOM__{mode}__{rec['target']}__{rec['packet']}"
+    return None
+
+def record_time_ns(rec: Dict[str, Any]) -> int:
+    t = rec.get("__time") or rec.get("time")
+    try:
+        return int(t) if t is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+class _Route:
+    """Oturum içinde bir job'a ait paket seti ve çıktısı."""
+    def __init__(self, label: str, keys: List[str], sink: _DumpSink, live: bool = False,
+                 hwm: Optional[Dict[str, int]] = None):
+        self.label = label
+        self.keys = keys
+        self.mode = "CMD" if any(k.startswith("DECOM__CMD__") for k in keys) else "TLM"  # items formu için
+        self.sink = sink
+        self.live = live
+        self.hwm: Dict[str, int] = dict(hwm or {})  # canlı modda paket anahtarı -> teslim edilen en büyük __time (ns)
+        self._replay: Set[str] = set()  # (yeniden) abonelik sonrası sınır kayıtları henüz geçilmemiş paketler
+        self.lock = threading.Lock()
+        self.closed = False
+        self.last_data_time = time.time()
+
+    def _replayed(self, rec: Dict[str, Any]) -> bool:
+        # çağıran self.lock'u tutar; yalnızca abonelikten hemen sonra, paketin kendi hwm'ine kadar olanlar atılır
+        key = record_packet_key(rec, self.mode) or ""
+        if key not in self._replay:
+            return False
+        t = record_time_ns(rec)
+        if not t:
+            return False
+        if t <= self.hwm.get(key, 0):
+            return True
+        self._replay.discard(key)  # sınır geçildi: bu paketin akışı artık süzülmez
+        return False
+
+    def deliver(self, recs: List[Dict[str, Any]]):
+        with self.lock:
+            if self.closed:
+                return
+            if self.live:
+                # yeniden bağlanınca sunucu start_time'dan itibaren tekrar gönderir: zaten teslim edilenleri at
+                if self._replay:
+                    recs = [rec for rec in recs if not self._replayed(rec)]
+                    if not recs:
+                        return
+                hwm = self.hwm
+                for rec in recs:
+                    t = record_time_ns(rec)
+                    key = record_packet_key(rec, self.mode) or ""
+                    if t > hwm.get(key, 0):
+                        hwm[key] = t
+                M_DUMP_RECORDS.inc(len(recs), job=self.label)  # canlı route'un dump sonu yok
+            self.sink.write(recs)
+            self.last_data_time = time.time()
+
+    def resume_window(self) -> Dict[str, int]:
+        """
+        Canlı abonelik penceresi (end_time yok): paketlerin en küçük hwm'inin hemen sonrasından (yoksa şimdiden).
+        Paketlerin hwm'leri farklı olabildiğinden her paket kendi hwm'ini geçene kadar süzülür. Çağıran self.lock'u tutar.
+        """
+        known = [self.hwm[k] for k in self.keys if self.hwm.get(k)]
+        self._replay = {k for k in self.keys if self.hwm.get(k)}
+        return {"start_time": min(known) + 1 if known else int(time.time() * 1e9)}
+
+class StreamSession:
+    """
+    Tek uzun ömürlü websocket + tek StreamingChannel aboneliği.
+    Job'lar add()/remove() ile kendi paket setlerini ekleyip çıkarır; gelen kayıtlar
+    __packet alanına göre ilgili job'un çıktısına dağıtılır (demux).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()       # bağlantı ve yönlendirme tablosu
+        self._send_lock = threading.Lock()
+        self._ws: Optional[websocket.WebSocket] = None
+        self._reader: Optional[threading.Thread] = None
+        self._routes: Dict[str, _Route] = {}  # paket anahtarı -> route
+        self.identifier = json.dumps({"channel":"StreamingChannel"})
+
+    def _send(self, msg: str):
+        with self._send_lock:
+            self._ws.send(msg)
+
+    def _ensure_connected(self):
+        # çağıran self._lock'u tutar
+        if self._ws is not None:
+            return
+        ws_url = f"ws://{HOST}/openc3-api/cable?scope={SCOPE}&authorization={AUTH}"
+        ws = websocket.WebSocket(enable_multithread=True)
+        ws.connect(ws_url)
+        ws.settimeout(1.0)
+        self._ws = ws
+        self._send(json.dumps({"command":"subscribe","identifier":self.identifier}))
+        self._reader = threading.Thread(target=self._read_loop, args=(ws,), name="ws-mux-reader", daemon=True)
+        self._reader.start()
+        print(f"[{time.strftime('%X')}] ws oturumu açıldı (mux)")
+
+    def add(self, label: str, keys: List[str], sink: _DumpSink, **window) -> _Route:
+        return self._add(_Route(label, keys, sink), **window)
+
+    def add_live(self, label: str, keys: List[str], sink: _DumpSink,
+                 hwm: Optional[Dict[str, int]] = None) -> _Route:
+        route = _Route(label, keys, sink, live=True, hwm=hwm)
+        with route.lock:
+            window = route.resume_window()
+        return self._add(route, **window)
+
+    def live_routes(self) -> List[_Route]:
+        with self._lock:
+            return list({id(r): r for r in self._routes.values() if r.live and not r.closed}.values())
+
+    def _add(self, route: _Route, **window) -> _Route:
+        label, keys = route.label, route.keys
+        with self._lock:
+            self._ensure_connected()
+            for k in keys:
+                if k in self._routes and not self._routes[k].closed:
+                    print(f"[mux] {k} zaten {self._routes[k].label} tarafından dinleniyor; {label} devralıyor")
+                self._routes[k] = route
+            self._send(_subscribe_msg(self.identifier, "add", keys, **window))
+        return route
+
+    def remove(self, route: _Route):
+        with route.lock:
+            route.closed = True
+        with self._lock:
+            mine = [k for k in route.keys if self._routes.get(k) is route]
+            for k in mine:
+                del self._routes[k]
+            if mine and self._ws is not None:
+                try:
+                    self._send(_subscribe_msg(self.identifier, "remove", mine))
+                except Exception as e:
+                    print(f"[mux] remove gönderilemedi: {e}")
+
+    def _dispatch(self, recs: List[Dict[str, Any]]):
+        by_route: Dict[int, Tuple[_Route, List[Dict[str, Any]]]] = {}
+        with self._lock:
+            for rec in recs:
+                if not isinstance(rec, dict):
+                    continue
+                route = self._routes.get(record_packet_key(rec) or "")
+                if route is None and not rec.get("__packet"):
+                    route = self._routes.get(record_packet_key(rec, "CMD") or "")  # items formunda komut paketi
+                if route is None:
+                    continue
+                by_route.setdefault(id(route), (route, []))[1].append(rec)
+        for route, rr in by_route.values():
+            route.deliver(rr)
+
+    def _read_loop(self, ws: websocket.WebSocket):
         try:
             while True:
-                now = time.time()
-                if now - last_data_time > IDLE_TIMEOUT_SEC:
-                    break
                 try:
-                    ws.settimeout(1.0)
                     msg = ws.recv()
                 except websocket._exceptions.WebSocketTimeoutException:
                     continue
-
                 try:
-                    obj = json.loads(msg)
+                    obj = codec.loads(msg)
                 except Exception:
-                    f.write(msg+"\n"); f.flush()
-                    count += 1
-                    last_data_time = now
+                    M_PARSE_ERR.inc(job="mux")
+                    continue  # ham mesaj hiçbir job'a yönlendirilemez
+                if not isinstance(obj, dict) or obj.get("type") in ("welcome","ping","confirm_subscription"):
+                    continue
+                payload = obj.get("message")
+                if not payload:
                     continue
+                self._dispatch(payload if isinstance(payload, list) else [payload])
+        except Exception as e:
+            print(f"[mux] ws bağlantısı koptu: {e}")
+        finally:
+            with self._lock:
+                lost = self._ws is ws
+                if lost:
+                    self._ws = None   # sonraki add() yeniden bağlanır
+            try: ws.close()
+            except Exception: pass
+        if lost:
+            self._resume_live()
 
-                if isinstance(obj, dict):
-                    if obj.get("type") in ("welcome","ping","confirm_subscription"):
-                        continue
-                    payload = obj.get("message")
-                    if not payload:
-                        continue
+    def _resume_live(self):
+        """Bağlantı koptuysa canlı abonelikleri hwm'den devam edecek şekilde yeniden kurar."""
+        delay = 1.0
+        while self.live_routes():
+            time.sleep(delay)
+            try:
+                with self._lock:
+                    if self._ws is not None:
+                        return
+                    self._ensure_connected()
+                    for route in {id(r): r for r in self._routes.values() if r.live and not r.closed}.values():
+                        with route.lock:
+                            window = route.resume_window()
+                        self._send(_subscribe_msg(self.identifier, "add", route.keys, **window))
+                        print(f"[mux] {route.label} yeniden abone oldu (start_time={window['start_time']})")
+                return
+            except Exception as e:
+                print(f"[mux] yeniden bağlanılamadı: {e} — {delay:.0f}s sonra tekrar")
+                with self._lock:
+                    if self._ws is not None:
+                        try: self._ws.close()
+                        except Exception: pass
+                        self._ws = None
+                delay = min(delay * 2, RECONNECT_MAX_SEC)
 
-                    def write_rec(rec):
-                        nonlocal count
-                        if not isinstance(rec, dict):
-                            return
-                        f.write(json.dumps(rec)+"\n")
-                        count += 1
+    def close(self):
+        with self._lock:
+            ws, self._ws = self._ws, None
+            for route in self._routes.values():
+                route.closed = True
+        if ws is not None:
+            ws.close()
 
-                    if isinstance(payload, list):
-                        for rec in payload:
-                            write_rec(rec)
-                    else:
-                        write_rec(payload)
+_session: Optional[StreamSession] = None
 
-                    f.flush()
-                    last_data_time = now
-        finally:
-            ws.close()
+def dump_decom_mux(session: StreamSession, decom_packet_keys: List[str], window_sec: int,
+                   outfile: Optional[str], label: str, pipeline: Optional[InfluxPipeline] = None):
+    """dump_decom_ndjson'ın paylaşılan oturum üzerinden çalışan karşılığı."""
+    end_ns   = int(time.time() * 1e9)
+    start_ns = int((time.time() - window_sec) * 1e9)
+
+    dest = _describe_dest(outfile, pipeline)
+    print(f"[{time.strftime('%X')}] {label} → pencere {window_sec}s, hedef: {dest} (mux)")
+
+    started = time.time()
+    sink = _DumpSink(outfile, pipeline)
+    route = session.add(label, decom_packet_keys, sink, start_time=start_ns, end_time=end_ns)
+    try:
+        while time.time() - route.last_data_time <= IDLE_TIMEOUT_SEC:
+            time.sleep(0.2)
+    finally:
+        session.remove(route)
+        sink.close()
+        _observe_dump(label, started, route.last_data_time, sink.count)
 
-    print(f"[{time.strftime('%X')}] {label} → bütün paketler yazdırıldı → {outfile} ({count} satır)")
+    print(f"[{time.strftime('%X')}] {label} → bütün paketler yazdırıldı → {dest} ({sink.count} satır)")
 
 # --------------- Periodik tetik (mevcut) ---------------
 def _align_start(period_sec: int) -> int:
@@ -347,43 +1179,293 @@ def _loop(period_sec: int, fn):
         next_tick += period_sec
 
 # --------------- Job runner ---------------
-def run_job(job: Dict[str, Any]):
+def job_packet_keys(job: Dict[str, Any]) -> List[str]:
     target = job["target"]
     kind   = job["kind"]
+    if job["packet_mode"] == "all":
+        names = get_all_telemetry_names(target) if kind == "TM" else get_all_command_names(target)
+    else:
+        names = job["packets"]
+    return build_packet_keys(kind, target, names) if names else []
+
+def job_outfile(job: Dict[str, Any]) -> Optional[str]:
+    # TC_/TM_ prefix
+    if _pipeline and not PIPELINE_TEE_NDJSON:
+        return None
+    prefix = "TC" if job["kind"] == "TC" else "TM"
+    return f"{NDJSON_DIR}/{prefix}_{job['target']}.ndjson"
+
+def run_job(job: Dict[str, Any]):
     label  = job["label"]
     window = job["window_sec"]
 
     # 1) Paket listesi (dinamik)
+    keys = job_packet_keys(job)
+    if not keys:
+        print(f"[{time.strftime('%X')}] {label} → paket listesi boş, atlandı.")
+        return
+
+    # 2) Dosya
+    outfile = job_outfile(job)
+
+    # 3) Dump
+    if _session:
+        dump_decom_mux(_session, keys, window, outfile, label, pipeline=_pipeline)
+    else:
+        dump_decom_ndjson(keys, window, outfile, label, pipeline=_pipeline)
+
+# --------------- Canlı mod ---------------
+class HwmStore:
+    """
+    Job etiketi -> {paket anahtarı -> son teslim edilen __time (ns)}; JSON dosyasında kalıcı.
+    Eski biçimdeki (job başına tek sayı) kayıt, job'un tüm paketleri için o değer olarak okunur (for_job).
+    """
+    def __init__(self, path: str = LIVE_STATE_PATH):
+        self.path = path
+        self.hwm: Dict[str, Any] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.hwm = {label: (int(v) if not isinstance(v, dict) else {k: int(t) for k, t in v.items()})
+                            for label, v in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[live] hwm dosyası okunamadı ({path}): {e}")
+
+    def for_job(self, label: str, keys: List[str]) -> Dict[str, int]:
+        v = self.hwm.get(label)
+        if v is None:
+            return {}
+        if isinstance(v, dict):
+            return dict(v)
+        return {k: v for k in keys}
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.hwm, f)
+        os.replace(tmp, self.path)
+
+def start_live_job(session: StreamSession, store: HwmStore, job: Dict[str, Any]) -> Optional[_Route]:
+    label = job["label"]
+    keys = job_packet_keys(job)
+    if not keys:
+        print(f"[{time.strftime('%X')}] {label} → paket listesi boş, sonra tekrar denenecek.")
+        return None
+    outfile = job_outfile(job)
+    sink = _DumpSink(outfile, _pipeline, mode="a")
+    hwm = store.for_job(label, keys)
+    route = session.add_live(label, keys, sink, hwm=hwm)
+    resume = f"{len(hwm)} paketin hwm'inden devam" if hwm else "şimdiden başlıyor"
+    print(f"[{time.strftime('%X')}] {label} → canlı akış ({resume}), hedef: {_describe_dest(outfile, _pipeline)}")
+    return route
+
+def run_live(jobs: List[Dict[str, Any]]):
+    """Tüm job'ları tek oturumda canlı başlatır; hwm'leri periyodik olarak diske yazar."""
+    store = HwmStore()
+    routes: List[_Route] = []
+    pending = list(jobs)
+    next_retry = 0.0
+    try:
+        while True:
+            now = time.time()
+            if pending and now >= next_retry:
+                for job in list(pending):
+                    try:
+                        route = start_live_job(_session, store, job)
+                    except Exception as e:
+                        print(f"[job error] {job['label']}: {e}")
+                        continue
+                    if route:
+                        routes.append(route)
+                        pending.remove(job)
+                next_retry = now + min(j["period_sec"] for j in pending) if pending else 0.0
+            time.sleep(LIVE_CHECKPOINT_SEC)
+            changed = False
+            for route in routes:
+                with route.lock:
+                    hwm = dict(route.hwm)
+                    route.sink.flush()
+                if hwm and store.hwm.get(route.label) != hwm:
+                    store.hwm[route.label] = hwm
+                    changed = True
+            if changed:
+                store.save()
+    finally:
+        for route in routes:
+            with route.lock:
+                if route.hwm: store.hwm[route.label] = dict(route.hwm)
+            _session.remove(route)
+            route.sink.close()
+        store.save()
+
+
+# --------------- asyncio motoru ---------------
+async def _rpc_call_async(method: str, params: List[Any]) -> Any:
+    """_rpc_call'ın event loop'u bloklamayan karşılığı: havuzlu, retry'lı OpenC3RpcClient bir worker thread'inde."""
+    return await asyncio.to_thread(_rpc_call, method, params)
+
+_sink_exec: Optional[ThreadPoolExecutor] = None
+
+async def _in_sink_thread(fn, *args):
+    """
+    Bloklayabilen sink çağrısı (_DumpSink). Açık dump başına en fazla bir çağrı beklediğinden havuz
+    ASYNC_MAX_CONCURRENCY thread'lidir: backpressure'da bir akışın beklemesi diğerlerinin thread'ini tüketmez.
+    """
+    global _sink_exec
+    if _sink_exec is None:
+        _sink_exec = ThreadPoolExecutor(max_workers=ASYNC_MAX_CONCURRENCY, thread_name_prefix="dump-sink")
+    return await asyncio.get_running_loop().run_in_executor(_sink_exec, fn, *args)
+
+_async_refreshes: Dict[Tuple[str, str], "asyncio.Task"] = {}
+
+async def _load_packet_names_async(key: Tuple[str, str]) -> List[str]:
+    method = "get_all_telemetry_names" if key[0] == "TM" else "get_all_command_names"
+    result = await _rpc_call_async(method, [key[1]])
+    names = result if isinstance(result, list) else []
+    _packet_cache.put(key, names)
+    return names
+
+async def _packet_names_async(kind: str, target: str) -> List[str]:
+    # thread motoruyla aynı _packet_cache; bayat değer hemen döner, yenileme ayrı task'ta
+    key = ("TM", target) if kind == "TM" else ("CMD", target)
+    names, needs_refresh = _packet_cache.peek(key)
+    if names is None:
+        return await _load_packet_names_async(key)
+    if needs_refresh and key not in _async_refreshes:
+        task = asyncio.ensure_future(_load_packet_names_async(key))
+        _async_refreshes[key] = task
+        task.add_done_callback(lambda t, k=key: _async_refresh_done(k, t))
+    return names
+
+def _async_refresh_done(key: Tuple[str, str], task: "asyncio.Task"):
+    _async_refreshes.pop(key, None)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[cache] {key[1]} paket listesi yenilenemedi (eski değer kullanılıyor): {task.exception()}")
+
+async def dump_decom_async(decom_packet_keys: List[str], window_sec: int, outfile: Optional[str], label: str,
+                           pipeline: Optional[InfluxPipeline] = None):
+    """
+    dump_decom_ndjson'ın asyncio karşılığı.
+    Sink işleri (dosya/sıkıştırma yazımı, pipeline kuyruğuna put) bloklayabildiğinden worker thread'inde
+    yapılır; beklenirken yalnızca bu akışın okuması durur, diğer akışlar event loop'ta sürer.
+    """
+    import websockets
+
+    end_ns   = int(time.time() * 1e9)
+    start_ns = int((time.time() - window_sec) * 1e9)
+
+    started = time.time()
+    ws_url = f"ws://{HOST}/openc3-api/cable?scope={SCOPE}&authorization={AUTH}"
+    dest = _describe_dest(outfile, pipeline)
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        identifier = json.dumps({"channel":"StreamingChannel"})
+        await ws.send(json.dumps({"command":"subscribe","identifier":identifier}))
+        await ws.send(_subscribe_msg(identifier, "add", decom_packet_keys, start_time=start_ns, end_time=end_ns))
+        print(f"[{time.strftime('%X')}] {label} → pencere {window_sec}s, hedef: {dest}")
+
+        last_data_time = time.time()
+        sink = await _in_sink_thread(_DumpSink, outfile, pipeline)
+        try:
+            while True:
+                remaining = IDLE_TIMEOUT_SEC - (time.time() - last_data_time)
+                if remaining <= 0:
+                    break
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                try:
+                    obj = codec.loads(msg)
+                except Exception:
+                    M_PARSE_ERR.inc(job=label)
+                    await _in_sink_thread(sink.write_raw, msg)
+                    last_data_time = time.time()
+                    continue
+                if isinstance(obj, dict):
+                    if obj.get("type") in ("welcome","ping","confirm_subscription"):
+                        continue
+                    payload = obj.get("message")
+                    if not payload:
+                        continue
+                    recs = payload if isinstance(payload, list) else [payload]
+                    raw = raw_payload(msg) if NDJSON_PASSTHROUGH else None
+                    await _in_sink_thread(sink.write, [rec for rec in recs if isinstance(rec, dict)], raw)
+                    last_data_time = time.time()
+        finally:
+            await _in_sink_thread(sink.close)
+            _observe_dump(label, started, last_data_time, sink.count)
+
+    print(f"[{time.strftime('%X')}] {label} → bütün paketler yazdırıldı → {dest} ({sink.count} satır)")
+
+async def run_job_async(job: Dict[str, Any]):
+    label = job["label"]
     if job["packet_mode"] == "all":
-        names = get_all_telemetry_names(target) if kind == "TM" else get_all_command_names(target)
+        names = await _packet_names_async(job["kind"], job["target"])
     else:
         names = job["packets"]
-
     if not names:
         print(f"[{time.strftime('%X')}] {label} → paket listesi boş, atlandı.")
         return
+    keys = build_packet_keys(job["kind"], job["target"], names)
+    await dump_decom_async(keys, job["window_sec"], job_outfile(job), label, pipeline=_pipeline)
 
-    keys = build_packet_keys(kind, target, names)
-
-    # 2) Dosya: TC_/TM_ prefix
-    prefix = "TM"
-    if kind == "TC":
-        prefix = "TC"
-    outfile = f"dbprocesses/logs/{prefix}_{target}.ndjson"
+async def _loop_async(job: Dict[str, Any], sem: asyncio.Semaphore):
+    period_sec = job["period_sec"]
+    next_tick = _align_start(period_sec)
+    while True:
+        await asyncio.sleep(max(0.0, next_tick - time.time()))
+        async with sem:
+            try:
+                await run_job_async(job)
+            except Exception as e:
+                print(f"[job error] {job['label']}: {e}")
+        next_tick += period_sec
+        if next_tick < time.time():
+            # eşzamanlılık sınırı yüzünden kaçırılan tick'ler üst üste binmesin
+            next_tick = _align_start(period_sec)
 
-    # 3) Dump
-    dump_decom_ndjson(keys, window, outfile, label)
+async def run_async(jobs: List[Dict[str, Any]], max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+    """Tüm job'ları tek event loop'ta, en fazla max_concurrency eşzamanlı dump ile koşturur."""
+    sem = asyncio.Semaphore(max_concurrency)
+    await asyncio.gather(*(_loop_async(j, sem) for j in jobs))
 
 
 if __name__ == "__main__":
-    # Her job için kendi periodunda sürekli koştur
-    for j in JOBS:
-        t = threading.Thread(target=_loop, args=(j["period_sec"], lambda jj=j: run_job(jj)), daemon=True)
-        t.start()
+    if PIPELINE_MODE:
+        _pipeline = InfluxPipeline()
+        print(f"Pipeline modu: kayıtlar doğrudan Influx'a yazılıyor (NDJSON tee: {'açık' if PIPELINE_TEE_NDJSON else 'kapalı'})")
+    if WS_MUX and ASYNC_ENGINE and not LIVE_MODE:
+        # asyncio motoru her dump için kendi bağlantısını açar; paylaşılan oturum thread'li okuyucu kullanır
+        print("UYARI: WS_MUX=1, DOWNLOADER_ENGINE=asyncio ile desteklenmiyor; job başına bağlantı kullanılacak",
+              file=sys.stderr)
+    elif WS_MUX or LIVE_MODE:
+        _session = StreamSession()
+        print(f"{'Canlı' if LIVE_MODE else 'Mux'} mod: tüm job'lar tek ws oturumunu paylaşıyor")
+
+    if metrics.start_http_server(METRICS_PORT):
+        print(f"Metrics: http://{metrics.METRICS_ADDR}:{METRICS_PORT}/metrics")
+
+    prefetch_packet_names(JOBS)
 
     try:
-        while True:
-            time.sleep(3600)
+        if LIVE_MODE:
+            os.makedirs(NDJSON_DIR, exist_ok=True)
+            run_live(JOBS)
+        elif ASYNC_ENGINE:
+            print(f"asyncio motoru: {len(JOBS)} job, en fazla {ASYNC_MAX_CONCURRENCY} eşzamanlı dump")
+            asyncio.run(run_async(JOBS))
+        else:
+            # Her job için kendi periodunda sürekli koştur
+            for j in JOBS:
+                t = threading.Thread(target=_loop, args=(j["period_sec"], lambda jj=j: run_job(jj)), daemon=True)
+                t.start()
+            while True:
+                time.sleep(3600)
     except KeyboardInterrupt:
         print("Kapanıyor…")
+    finally:
+        if _session: _session.close()
+        close_segment_writers()
+        if _pipeline: _pipeline.close()
 
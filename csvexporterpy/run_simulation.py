@@ -7,6 +7,7 @@ Basit orkestratör:
     1) influx_consumer_simple.py (dbprocesses dizininde)
     2) download_all_cfs_debug.py (bu dosyanın bulunduğu dizin)
 - Hata varsa hangi dosyada ve mesajı yazdırır.
+- PIPELINE_MODE=1 ise downloader kayıtları doğrudan Influx'a yazar; consumer terminali açılmaz.
 - "Çıkmak için CTRL+C" yazar; CTRL+C ile her iki terminali kapatır.
 
 Not: Bir terminal öykünücüsü bulunmalı (gnome-terminal, konsole, xfce4-terminal, xterm). 
@@ -18,6 +19,7 @@ CONSUMER_PATH = os.path.join(BASE_DIR, "dbprocesses", "influx_consumer_simple.py
 DOWNLOADER_PATH = os.path.join(BASE_DIR, "download_all_cfs_debug.py")
 
 GRACE_SEC = 5  # hızlı hata kontrolü için bekleme süresi
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "0") == "1"
 
 def which(cmd):
     from shutil import which as _which
@@ -88,17 +90,19 @@ def main():
         print("Hata: Uygun terminal bulunamadı. Yüklü bir terminal emülatörü (gnome-terminal/konsole/xfce4-terminal/xterm) gerekli.", file=sys.stderr)
         sys.exit(1)
 
-    # 1) Ön sağlık kontrolü: influx_consumer_simple.py
-    ok, err = quick_health_check(CONSUMER_PATH, os.path.join(BASE_DIR, "dbprocesses"))
-    if not ok:
-        print(f"HATA: influx_consumer_simple.py başlatılamadı.\nMesaj: {err}")
-        sys.exit(1)
+    terms = []
+    if not PIPELINE_MODE:
+        # 1) Ön sağlık kontrolü: influx_consumer_simple.py
+        ok, err = quick_health_check(CONSUMER_PATH, os.path.join(BASE_DIR, "dbprocesses"))
+        if not ok:
+            print(f"HATA: influx_consumer_simple.py başlatılamadı.\nMesaj: {err}")
+            sys.exit(1)
 
-    # 2) İki terminali başlat
-    t1 = launch_in_terminal(term_builder, "influx-consumer", CONSUMER_PATH, os.path.join(BASE_DIR, "dbprocesses"))
-    # kısa nefes ver, consumer logları başlasın
-    time.sleep(1.0)
-    t2 = launch_in_terminal(term_builder, "downloader", DOWNLOADER_PATH, BASE_DIR)
+        # 2) İki terminali başlat
+        terms.append(launch_in_terminal(term_builder, "influx-consumer", CONSUMER_PATH, os.path.join(BASE_DIR, "dbprocesses")))
+        # kısa nefes ver, consumer logları başlasın
+        time.sleep(1.0)
+    terms.append(launch_in_terminal(term_builder, "downloader", DOWNLOADER_PATH, BASE_DIR))
 
     print("Başarı: simülasyon başlatıldı.")
     print('Çıkmak için CTRL+C')
@@ -110,7 +114,7 @@ def main():
     except KeyboardInterrupt:
         print("\nKapanıyor… (terminalleri kapatacağım)")
         # Terminal gruplarına SIGINT gönder
-        for p in (t2, t1):
+        for p in reversed(terms):
             try:
                 os.killpg(p.pid, signal.SIGINT)
             except Exception:
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import asyncio, time
+import pytest
+
+pytest.importorskip("websockets")
+import download_all_cfs_debug as dl
+from openc3_sim import OpenC3Simulator, PacketSource
+
+@pytest.fixture
+def sim(monkeypatch):
+    s = OpenC3Simulator(PacketSource(fields=5), port=0, rate=200, burst=50).start()
+    monkeypatch.setattr(dl, "HOST", s.host)
+    monkeypatch.setattr(dl, "IDLE_TIMEOUT_SEC", 0.5)
+    monkeypatch.setattr(dl, "_rpc", dl.OpenC3RpcClient(s.host))
+    yield s
+    s.stop()
+
+class BlockingPipeline:
+    """InfluxPipeline.put gibi bloklayan sink (backpressure)."""
+    def __init__(self):
+        self.n = 0
+
+    def put(self, recs):
+        time.sleep(0.2)
+        self.n += len(recs)
+
+def test_rpc_async_uses_pooled_client(sim):
+    names = asyncio.run(dl._rpc_call_async("get_all_telemetry_names", ["CFS_DEBUG"]))
+    assert "SC_HKTLM" in names
+
+def test_blocking_sink_does_not_stall_other_streams(sim, tmp_path):
+    keys = dl.build_packet_keys("TM", "CFS_DEBUG", ["SC_HKTLM"])
+    slow = BlockingPipeline()
+    done = {}
+
+    async def timed(label, coro):
+        await coro
+        done[label] = time.monotonic()
+
+    async def main():
+        await asyncio.gather(
+            timed("slow", dl.dump_decom_async(keys, 2, None, "SLOW", pipeline=slow)),
+            timed("fast", dl.dump_decom_async(keys, 2, str(tmp_path / "FAST.ndjson"), "FAST")))
+
+    asyncio.run(main())
+    assert done["fast"] < done["slow"]
+    assert slow.n == sum(1 for _ in open(tmp_path / "FAST.ndjson"))
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import os
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from columnar_sink import ColumnarSink, HOUR_NS
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_partition_roundtrip(tmp_path, fmt):
+    sink = ColumnarSink(str(tmp_path), fmt=fmt)
+    t0 = 480_000 * HOUR_NS  # saat başı
+    for i in range(5):
+        sink.add(t0 + i, "SIM_42_TRUTH", "DATA", "TM", {"POSITION_X": float(i), "MODE": "A" if i % 2 else "B"})
+    sink.add(t0 + HOUR_NS, "SIM_42_TRUTH", "DATA", "TM", {"POSITION_X": 9.0})  # sonraki saat: önceki part yazılır
+    sink.close()
+    assert sink.stats["files"] == 2 and sink.stats["rows"] == 6 and not sink.stats["errors"]
+    assert not [f for _, _, fs in os.walk(tmp_path) for f in fs if f.endswith(".tmp")]
+
+    d = ds.dataset(str(tmp_path), format="parquet" if fmt == "parquet" else "ipc", partitioning="hive")
+    t = d.to_table(filter=(ds.field("target") == "SIM_42_TRUTH") & (ds.field("hour") == 0)).sort_by("time")
+    assert t.column("POSITION_X").to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert t.column("MODE").to_pylist() == ["B", "A", "B", "A", "B"]
+    assert t.column("time").type == pa.timestamp("ns", tz="UTC")
+    assert t.column("time").cast(pa.int64()).to_pylist()[0] == t0
+    assert set(t.column("packet").to_pylist()) == {"DATA"}
+    assert d.count_rows() == 6
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+import influx_consumer_simple as consumer
+from lp_convert import HwmGate
+
+@pytest.fixture(scope="module")
+def pool():
+    # spawn: worker'lar yalnızca lp_convert'i import eder, pytest'in __main__'i yeniden çalışmaz
+    saved = consumer.HWM_ENABLED
+    consumer.HWM_ENABLED = False
+    consumer.start_convert_pool(2)
+    consumer.HWM_ENABLED = saved
+    yield consumer._pool
+    consumer._pool.shutdown()
+    consumer._pool, consumer._pool_workers = None, 0
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(consumer, "CONVERT_CHUNK_BYTES", 512)
+    monkeypatch.setattr(consumer, "_downsampler", None)
+
+def write(path, times):
+    path.write_text("".join(json.dumps({"__packet": f"DECOM__TLM__T{t % 3}__HK", "PACKET_TIMESECONDS": t,
+                                        "X": t, "S": f"v {t}"}) + "\n" for t in times))
+    return str(path)
+
+def run(path, gate=None, pooled=True, monkeypatch=None):
+    if not pooled:
+        monkeypatch.setattr(consumer, "_pool", None)
+    rows, tapped, end = [], [], 0
+    for out, n, end in consumer.stream_tail(path, 0, gate, lambda *m: tapped.append(m)):
+        got = [l for b in out for l in b.decode().split("\n")] if out and isinstance(out[0], bytes) else list(out)
+        assert len(got) == n
+        rows += got
+    return rows, tapped, end
+
+def test_pool_matches_threaded(tmp_path, pool, small_chunks, monkeypatch):
+    path = write(tmp_path / "A.ndjson", range(1, 200))
+    pooled = run(path)
+    threaded = run(path, pooled=False, monkeypatch=monkeypatch)
+    assert pooled == threaded and len(pooled[0]) == 199
+
+def test_hwm_drops_duplicates_across_chunks(tmp_path, pool, small_chunks, monkeypatch):
+    # her point ~12 satır sonra yeniden dump edilmiş: tekrarlar henüz merge edilmemiş komşu parçalara düşer
+    path = write(tmp_path / "B.ndjson", [t for i in range(1, 100) for t in (i, i - 6) if t > 0])
+    rows, tapped, end = run(path, HwmGate())
+    assert len(rows) == len(tapped) == 99
+    assert (rows, tapped, end) == run(path, HwmGate(), pooled=False, monkeypatch=monkeypatch)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+from downsample import Downsampler, PolicyTable, parse_spec
+from lp_convert import HwmGate, emit_lp
+
+S = 10**9
+
+def make(spec="GENERIC_*=stats:10,GENERIC_EPS_DEBUG=raw"):
+    return Downsampler(PolicyTable(parse_spec(spec)), idle_sec=0)
+
+def test_policy_precedence():
+    t = PolicyTable(parse_spec("*=stats:10,GENERIC_*=last:1,GENERIC_EPS_DEBUG=raw"))
+    assert repr(t.lookup("GENERIC_IMU_DEBUG")) == "last:1"
+    assert repr(t.lookup("GENERIC_EPS_DEBUG")) == "raw"
+    assert repr(t.lookup("CFS_DEBUG")) == "stats:10"
+    with pytest.raises(ValueError):
+        parse_spec("X=stats")
+
+def test_window_closes_on_next_bucket():
+    ds = make()
+    assert ds.feed(1 * S, "GENERIC_EPS_DEBUG", "HK", "TM", {"v": 1}) is None  # raw
+    assert ds.feed(1 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 1.0, "mode": "A"}) == []
+    assert ds.feed(9 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 3.0, "mode": "B"}) == []
+    out = ds.feed(12 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 5.0})
+    assert out == [(0, "GENERIC_IMU_DEBUG", "IMU", "TM",
+                    {"mode": "B", "x_min": 1.0, "x_max": 3.0, "x_mean": 2.0})]
+    assert ds.open_windows() == 1
+
+def test_late_point_into_closed_window_is_dropped():
+    ds = make()
+    ds.feed(15 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 1.0})
+    assert ds.feed(5 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 9.0}) == []
+    assert ds.stats["late"] == 1
+    assert ds.flush()[0][4]["x_max"] == 1.0
+
+def test_idle_flush_closes_window_and_writes_each_timestamp_once():
+    ds = make()
+    gate = HwmGate()  # DEDUPE_MAX=0
+    ds.feed(1 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 1.0})
+    rows = []
+    emit_lp(ds.flush_idle(), rows, gate)
+    assert len(rows) == 1 and ds.open_windows() == 0
+    # aynı pencereye gecikmeli gelen point yeniden yazım yapmaz, geç sayılır
+    assert ds.feed(2 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 2.0}) == []
+    assert ds.stats["late"] == 1 and ds.open_windows() == 0
+    # sonraki pencere normal açılır ve hwm'yi geçer
+    ds.feed(11 * S, "GENERIC_IMU_DEBUG", "IMU", "TM", {"x": 3.0})
+    emit_lp(ds.flush(), rows, gate)
+    assert len(rows) == 2 and ds.stats["out"] == 2
+
+def test_tap_sees_raw_points_before_downsampling(tmp_path):
+    from lp_convert import iter_lp_batches
+    path = tmp_path / "TM_X.ndjson"
+    recs = [{"__packet": "DECOM__TLM__GENERIC_IMU_DEBUG__IMU", "PACKET_TIMESECONDS": t, "x": float(t)}
+            for t in (1, 2, 3, 12)]
+    recs.append({"__packet": "DECOM__TLM__GENERIC_EPS_DEBUG__HK", "PACKET_TIMESECONDS": 4, "v": 1})
+    path.write_text("".join(json.dumps(r) + "\n" for r in recs))
+    seen = []
+    rows = [r for batch, _ in iter_lp_batches(str(path), tap=lambda *m: seen.append(m), agg=make()) for r in batch]
+    # Influx'a tek toplanmış point (+ raw EPS) gider; arşiv (tap) her raw point'i tam çözünürlükte alır
+    assert len(rows) == 2 and any("x_mean=2" in r for r in rows)
+    assert [(m[0] // S, m[1]) for m in seen] == [(1, "GENERIC_IMU_DEBUG"), (2, "GENERIC_IMU_DEBUG"),
+                                                 (3, "GENERIC_IMU_DEBUG"), (12, "GENERIC_IMU_DEBUG"),
+                                                 (4, "GENERIC_EPS_DEBUG")]
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+import download_all_cfs_debug as dl
+
+IDENT = json.dumps({"channel": "StreamingChannel"})
+
+def frame(message, ident_first=True, **kw):
+    parts = [("identifier", IDENT), ("message", message)]
+    return json.dumps(dict(parts if ident_first else parts[::-1]), **kw)
+
+ARRAY = [{"__packet": "DECOM__TLM__T__A", "__time": 1, "S": "} ] { \"message\":"}, {"__packet": "DECOM__TLM__T__B", "V": 2.5}]
+OBJECT = {"__packet": "DECOM__TLM__T__A", "__time": 3, "ÜNİ": "kod"}
+
+@pytest.mark.parametrize("message", [ARRAY, OBJECT])
+@pytest.mark.parametrize("kw", [{}, {"separators": (",", ":")}, {"ensure_ascii": False}, {"indent": 1}])
+def test_raw_payload_slices_message_verbatim(message, kw):
+    msg = frame(message, **kw)
+    raw = dl.raw_payload(msg)
+    assert raw is not None and raw in msg
+    assert json.loads(raw) == message
+
+@pytest.mark.parametrize("msg", [
+    frame(ARRAY, ident_first=False),                          # identifier sonra: dilim güvenli değil
+    frame("metin mesaj"),                                     # dizi/nesne değil
+    frame(42),
+    json.dumps({"type": "ping", "message": 1700000000}),
+    json.dumps({"identifier": IDENT}),                        # message yok
+    json.dumps({"type": "welcome"}),
+])
+def test_raw_payload_falls_back(msg):
+    assert dl.raw_payload(msg) is None
+
+def test_passthrough_writes_raw_payload_line(tmp_path):
+    out = tmp_path / "J.ndjson"
+    sink = dl._DumpSink(str(out), None)
+    msg = frame(ARRAY, ensure_ascii=False)
+    sink.write(ARRAY, raw=dl.raw_payload(msg))
+    sink.write([OBJECT])  # passthrough dışı: kayıt başına satır
+    sink.close()
+    lines = out.read_bytes().split(b"\n")
+    assert lines[0].decode() == dl.raw_payload(msg) and json.loads(lines[0]) == ARRAY
+    assert json.loads(lines[1]) == OBJECT and lines[2] == b""
+    assert sink.count == 3
+
+def test_flush_waits_for_time_or_size_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(dl, "NDJSON_FLUSH_SEC", 3600.0)
+    monkeypatch.setattr(dl, "NDJSON_FLUSH_BYTES", 256)
+    out = tmp_path / "J.ndjson"
+    sink = dl._DumpSink(str(out), None)
+    sink.write_raw("x" * 10)
+    assert out.stat().st_size == 0  # bütçe dolmadı: tamponda
+    sink.write_raw("y" * 300)       # tampon boyunu aşan yazım diske iner
+    assert out.stat().st_size == 11 + 301
+    sink._last_flush -= 3600         # süre bütçesi doldu: sonraki yazım flush eder
+    sink.write_raw("z")
+    assert out.stat().st_size == 11 + 301 + 2
+    sink.close()
+
+def test_zero_flush_sec_flushes_every_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(dl, "NDJSON_FLUSH_SEC", 0.0)
+    out = tmp_path / "J.ndjson"
+    sink = dl._DumpSink(str(out), None)
+    sink.write([OBJECT])
+    assert json.loads(out.read_bytes()) == OBJECT
+    sink.close()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import json
+import pickle
+
+from lp_convert import HwmGate, iter_lp_batches
+
+def test_older_and_equal_timestamps_dropped_without_dedupe():
+    g = HwmGate()
+    assert g.admit("T", "P", "TM", 10, "a")
+    assert not g.admit("T", "P", "TM", 5, "b")
+    assert not g.admit("T", "P", "TM", 10, "c")
+    assert g.admit("T", "Q", "TM", 5, "d")  # seri başına
+    assert g.dropped == 2 and g.hwm == {"TM|T|P": 10, "TM|T|Q": 5}
+
+def test_dedupe_admits_distinct_rows_at_hwm():
+    g = HwmGate(dedupe_max=2)
+    assert g.admit("T", "P", "TM", 10, "a")
+    assert not g.admit("T", "P", "TM", 10, "a")  # aynı satır tekrar
+    assert g.admit("T", "P", "TM", 10, "b")
+    assert g.admit("T", "P", "TM", 10, "c")      # imza kümesi dolu: eklenmez ama geçer
+    assert g.admit("T", "P", "TM", 10, "c")
+    assert g.admit("T", "P", "TM", 11, "a")      # yeni timestamp kümeyi sıfırlar
+    assert not g.admit("T", "P", "TM", 11, "a")
+
+def test_merge_of_worker_snapshots():
+    base = HwmGate({"TM|T|P": 10}, dedupe_max=4)
+    w1 = pickle.loads(pickle.dumps(HwmGate(base.hwm, base.seen, base.dedupe_max)))
+    w1.admit("T", "P", "TM", 20, "a")
+    w1.admit("T", "P", "TM", 5, "old")
+    w2 = HwmGate(base.hwm, base.seen, base.dedupe_max)
+    w2.admit("T", "P", "TM", 20, "b")
+    base.merge(w1)
+    base.merge(w2)
+    assert base.hwm["TM|T|P"] == 20 and len(base.seen["TM|T|P"]) == 2 and base.dropped == 1
+
+def test_overlapping_redump_writes_only_new_points(tmp_path):
+    p = tmp_path / "a.ndjson"
+    rec = lambda t: json.dumps({"__packet": "DECOM__TLM__CFS_DEBUG__HK", "PACKET_TIMESECONDS": t, "X": 1})
+    p.write_text("".join(rec(t) + "\n" for t in (1, 2, 3)))
+    g = HwmGate()
+    assert sum(len(r) for r, _ in iter_lp_batches(str(p), gate=g)) == 3
+    p.write_text("".join(rec(t) + "\n" for t in (2, 3, 4, 5)))
+    assert sum(len(r) for r, _ in iter_lp_batches(str(p), gate=g)) == 2
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import time
+import pytest
+
+import influx_consumer_simple as consumer
+import download_all_cfs_debug as dl
+from test_influx_writer import StubWriter
+
+@pytest.fixture
+def writer(monkeypatch):
+    w = StubWriter(min_batch=1)
+    monkeypatch.setattr(consumer, "write_api", w)
+    monkeypatch.setattr(consumer, "spool", None)
+    monkeypatch.setattr(consumer, "HWM_ENABLED", False)
+    monkeypatch.setattr(consumer, "_downsampler", None)
+    monkeypatch.setattr(consumer, "DOWNSAMPLE", "")
+    yield w
+    w.close()
+
+def rec(target, t, v=1):
+    return {"__packet": f"DECOM__TLM__{target}__HK", "PACKET_TIMESECONDS": t, "X": v}
+
+def lines(w):
+    return [l for b in w.bodies for l in b.decode().split("\n")]
+
+def test_idle_window_flushes_while_queue_stays_busy(writer, monkeypatch):
+    monkeypatch.setattr(consumer, "DOWNSAMPLE", "SLOW=stats:1")
+    monkeypatch.setattr(consumer, "DOWNSAMPLE_IDLE_SEC", 0.2)
+    p = dl.InfluxPipeline(maxsize=16, batch_size=1)
+    try:
+        p.put([rec("SLOW", 1.0, 5)])
+        # kuyruk hiç boş kalmıyor (get timeout'u dolmuyor): idle pencere yine de duvar saatiyle yazılmalı
+        deadline = time.monotonic() + 5
+        t = 1.0
+        while time.monotonic() < deadline and not any("SLOW" in l for l in lines(writer)):
+            t += 0.01
+            p.put([rec("FAST", t)])
+            writer.flush(timeout=1)
+            time.sleep(0.02)
+        assert any("SLOW" in l and "X_mean=5" in l for l in lines(writer))
+    finally:
+        p.close()
+
+def test_records_reach_writer_and_close_drains_queue(writer):
+    p = dl.InfluxPipeline(maxsize=4, batch_size=7)
+    for i in range(50):  # kuyruk küçük: put() bloklayarak ilerler
+        p.put([rec("T", 1 + i * 0.1 + j * 0.01, i * 10 + j) for j in range(3)]
+              + [{"__packet": "DECOM__TLM__T__HK"}])  # zamansız kayıt atlanır
+    p.close()  # kuyrukta kalanlar yazılıp yazıcı boşaltılır
+    got = lines(writer)
+    assert len(got) == 150 and not p._thread.is_alive()
+    assert got[0] == consumer.to_line_protocol("T", "HK", "TM", {"PACKET_TIMESECONDS": 1.0, "X": 0}, 10**9)
+    assert sorted(int(l.split("X=")[1].split("i")[0]) for l in got) == [i * 10 + j for i in range(50) for j in range(3)]
+    assert consumer.write_api is None  # close_influx çağrıldı
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import os, threading
+import pytest
+
+from influx_spool import LPSpool, SpoolBusy, SpoolReplayer, is_retryable
+from influx_writer import WriteError
+
+def lines(prefix, n):
+    return [prefix + str(i).encode() for i in range(n)]
+
+def test_append_rotates_segments_and_enforces_limit(tmp_path):
+    sp = LPSpool(str(tmp_path), segment_bytes=20, max_bytes=80)
+    for i in range(10):
+        sp.append([b"m v=%d 1" % i, b"m v=%d 2" % i])  # 16B: iki append'te segment kapanır (32B)
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".lp")]) == 2
+    assert sp.depth() == (64, 2)
+    assert sp.stats["dropped_segments"] == 3
+    # yeniden açılınca sıra numarası kaldığı yerden devam eder
+    sp.close()
+    assert LPSpool(str(tmp_path))._seq == sp._seq
+
+def test_take_oldest_closes_active_segment(tmp_path):
+    sp = LPSpool(str(tmp_path))
+    sp.append("a v=1 1")
+    path = sp.take_oldest()
+    sp.append("a v=2 2")  # yeni segmente gider
+    assert sp.take_oldest() == path
+    sp.remove(path)
+    assert sp.take_oldest() != path
+
+@pytest.mark.parametrize("exc, retry", [
+    (WriteError("x", 0), True), (WriteError("x", 503), True), (WriteError("x", 429), True),
+    (WriteError("x", 401), True), (WriteError("x", 400), False), (WriteError("x", 422), False),
+    (TimeoutError(), True),
+])
+def test_is_retryable(exc, retry):
+    assert is_retryable(exc) is retry
+
+class StubWriter:
+    """'BAD' içeren gövdeyi 400 ile reddeder; ilk fail_first çağrıda 503 döner."""
+    def __init__(self, fail_first=0):
+        self.fail_first = fail_first
+        self.bodies = []
+
+    def __call__(self, body):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise WriteError("HTTP 503", 503)
+        if b"BAD" in body:
+            raise WriteError("HTTP 400: unable to parse", 400)
+        self.bodies.append(body)
+
+def replay_all(sp, writer):
+    r = SpoolReplayer(sp, writer, batch_lines=2, rate_pps=0, retry_sec=0.01, max_retry_sec=0.01)
+    while True:
+        path = sp.take_oldest()
+        if path is None:
+            return r
+        assert r._replay(path)
+        sp.remove(path)
+
+def test_poison_segment_is_quarantined_and_replay_continues(tmp_path):
+    sp = LPSpool(str(tmp_path), segment_bytes=1)  # her append ayrı segment
+    sp.append(lines(b"ok", 2))
+    sp.append([b"good1", b"BAD line", b"good2"])
+    sp.append(lines(b"later", 2))
+    w = StubWriter(fail_first=2)
+    r = replay_all(sp, w)
+    sent = b"\n".join(w.bodies).split(b"\n")
+    assert b"later1" in sent and b"good2" in sent
+    bad = [n for n in os.listdir(tmp_path) if n.endswith(".bad")]
+    assert len(bad) == 1
+    assert b"BAD line" in (tmp_path / bad[0]).read_bytes()
+    assert r.stats["quarantined_points"] == 2  # reddedilen batch (batch_lines=2)
+    assert r.stats["replayed_points"] == 5
+    assert sp.depth() == (0, 0)
+
+def test_replay_stops_without_losing_segment(tmp_path):
+    sp = LPSpool(str(tmp_path))
+    sp.append(lines(b"x", 3))
+    r = SpoolReplayer(sp, StubWriter(fail_first=10**6), rate_pps=0, retry_sec=0.01, max_retry_sec=0.01)
+    path = sp.take_oldest()
+    threading.Timer(0.05, r.stop).start()
+    assert not r._replay(path)
+    assert os.path.exists(path)
+
+def test_second_process_cannot_open_locked_dir(tmp_path):
+    sp = LPSpool(str(tmp_path))
+    with pytest.raises(SpoolBusy, match=str(os.getpid())):
+        LPSpool(str(tmp_path))
+    sp.close()
+    LPSpool(str(tmp_path)).close()  # kilit bırakıldı
+
+def test_size_tracking_matches_disk(tmp_path):
+    sp = LPSpool(str(tmp_path), segment_bytes=40, max_bytes=10_000)
+    for i in range(25):
+        sp.append(b"m v=%d %d" % (i, i))
+    on_disk = [n for n in os.listdir(tmp_path) if n.endswith(".lp")]
+    assert sp.depth() == (sum(os.path.getsize(tmp_path / n) for n in on_disk), len(on_disk))
+    sp.remove(sp.take_oldest())
+    assert sp.depth()[1] == len(on_disk) - 1
+    sp.close()
+    assert LPSpool(str(tmp_path)).depth() == sp.depth()
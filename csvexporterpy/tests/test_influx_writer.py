@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import threading
+import pytest
+
+from influx_writer import AdaptiveWriter, WriteError
+
+class StubWriter(AdaptiveWriter):
+    """HTTP yerine _post'u taklit eder: gövdeleri toplar, gate verilirse açılana kadar bekletir."""
+    def __init__(self, latency=0.0, max_body_points=None, gate=None, **kw):
+        self.bodies = []
+        self.stub_latency = latency
+        self.max_body_points = max_body_points
+        self.gate = gate
+        kw.setdefault("flush_interval", 0.05)
+        super().__init__("http://127.0.0.1:1", "t", "o", "b", gzip_mode="off", **kw)
+
+    def _post(self, conn, body, n):
+        if self.gate is not None:
+            self.gate.wait(10)
+        if self.max_body_points is not None and n > self.max_body_points:
+            raise WriteError("HTTP 413: request too large", 413)
+        self.bodies.append(body)
+        self._observe_ok(n, len(body), self.stub_latency)
+        return conn, self.stub_latency
+
+def rows(n, start=0):
+    return [f"m v={i} {i}" for i in range(start, start + n)]
+
+def test_acked_waits_for_delivery():
+    gate = threading.Event()
+    w = StubWriter(gate=gate, min_batch=1, max_batch=10, max_inflight=1)
+    p1 = w.write(rows(3))
+    p2 = w.write(rows(2, 3))
+    assert (p1, p2) == (3, 5)
+    assert not w.wait_acked(p1, timeout=0.2)
+    assert w.acked == 0
+    gate.set()
+    assert w.wait_acked(p2, timeout=5)
+    w.close()
+    assert b"\n".join(w.bodies).count(b"\n") + 1 == 5
+
+def test_failed_batch_is_acked_after_on_error():
+    seen = []
+
+    class Failing(StubWriter):
+        def _post(self, conn, body, n):
+            raise WriteError("HTTP 503", 503)
+
+    w = Failing(min_batch=1, max_retries=0, on_error=lambda body, e: seen.append(body))
+    pos = w.write(rows(4))
+    assert w.wait_acked(pos, timeout=5)
+    assert seen and seen[0].count(b"\n") == 3  # spool'a verildi, sonra onaylandı
+    w.close()
+
+def test_413_splits_batch_and_shrinks_batch_size():
+    w = StubWriter(max_body_points=100, min_batch=10, max_batch=1000, max_inflight=1)
+    w.write(rows(1000))
+    assert w.flush(timeout=5)
+    w.close()
+    sent = [b.count(b"\n") + 1 for b in w.bodies]
+    assert sum(sent) == 1000 and max(sent) <= 100
+    assert w.batch_points <= 100 and w.stats["dropped"] == 0
+    assert b"\n".join(w.bodies) == "\n".join(rows(1000)).encode()  # sıra korunur
+
+def test_batch_size_grows_when_fast_and_shrinks_when_slow():
+    w = StubWriter(min_batch=100, max_batch=50_000, target_latency=0.5)
+    b0 = w.batch_points
+    w._observe_ok(b0, 1000, 0.01)
+    assert w.batch_points > b0
+    b1 = w.batch_points
+    w._observe_ok(b1, 1000, 0.01 + 2 * w.target_latency)
+    assert w.batch_points < b1
+    w._observe_ok(10, 1000, 0.01)  # yarım batch: büyütmez
+    assert w.batch_points == int(b1 * 0.7)
+    w.close()
+
+def test_inflight_limit_additive_increase_multiplicative_decrease():
+    w = StubWriter(min_batch=100, max_inflight=8)
+    assert w.inflight_limit == 2
+    w._q_points = 10 * w.batch_points  # kuyrukta bekleyen iş (artış koşulu)
+    for _ in range(20):
+        w._observe_ok(10, 100, 0.01)
+    w._q_points = 0
+    raised = w._limit
+    assert 2 < raised <= 8
+    w._throttle(WriteError("HTTP 429", 429, retry_after=0.5))
+    assert w._limit == max(1.0, raised / 2)
+    assert w._backoff_until > 0 and w.stats["throttled"] == 1
+    w._throttle(WriteError("HTTP 400", 400))  # ret, kısıtlama değil
+    assert w.stats["throttled"] == 1
+    b = w.batch_points
+    w._throttle(WriteError("zaman aşımı", 0))
+    assert w.batch_points == max(w.min_batch, b // 2)
+    w._backoff_until = 0
+    w.close()
+
+def test_retries_then_hands_body_to_on_error():
+    failed = []
+
+    class Flaky(StubWriter):
+        calls = 0
+
+        def _post(self, conn, body, n):
+            Flaky.calls += 1
+            if Flaky.calls <= 2:
+                raise WriteError("HTTP 503", 503, retry_after=0.01)
+            return super()._post(conn, body, n)
+
+    w = Flaky(min_batch=1, max_retries=5, on_error=lambda body, e: failed.append(body))
+    pos = w.write(rows(5))
+    assert w.wait_acked(pos, timeout=5)
+    w.close()
+    assert failed == [] and w.stats["retries"] == 2 and len(w.bodies) == 1
+
+def test_write_blocked_on_backpressure_fails_when_closed():
+    gate = threading.Event()
+    w = StubWriter(gate=gate, min_batch=1, max_batch=5, max_inflight=1, max_buffer_bytes=10)
+    w.write(rows(5))
+    for _ in range(500):  # gönderici ilk batch'i alıp gate'te beklesin
+        with w._cv:
+            if not w._q: break
+        threading.Event().wait(0.01)
+    w.write(rows(5, 5))  # kuyrukta kalır
+    errors = []
+
+    def blocked():
+        try:
+            w.write(rows(5, 10))
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=blocked)
+    t.start()
+    t.join(0.2)
+    assert t.is_alive()  # tampon dolu: bekliyor
+    with w._cv:  # close()'un kapanış adımı (flush'sız)
+        w._closed = True
+        w._cv.notify_all()
+    t.join(5)
+    assert errors and w._enq == 10
+    gate.set()
+    w.close()
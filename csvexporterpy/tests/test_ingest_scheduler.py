@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import threading, time
+
+from influx_consumer_simple import IngestScheduler
+
+class Recorder:
+    def __init__(self, hold=0.0):
+        self.calls = []
+        self.active = set()
+        self.overlap = []
+        self.hold = hold
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            if path in self.active:
+                self.overlap.append(path)
+            self.active.add(path)
+            self.calls.append((path, time.monotonic()))
+        time.sleep(self.hold)
+        with self._lock:
+            self.active.discard(path)
+
+def wait_calls(rec, n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(rec.calls) < n and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return len(rec.calls) >= n
+
+def test_burst_is_coalesced_after_quiet_period():
+    rec = Recorder()
+    s = IngestScheduler(rec, min_latency=0.1, max_latency=5.0, workers=2)
+    t0 = time.monotonic()
+    for _ in range(20):
+        s.mark("a"); s.mark("b")
+        time.sleep(0.005)
+    assert wait_calls(rec, 2)
+    time.sleep(0.2)
+    s.close()
+    assert sorted(p for p, _ in rec.calls) == ["a", "b"]
+    assert all(t - t0 >= 0.1 for _, t in rec.calls)
+
+def test_continuous_writes_processed_by_max_latency():
+    rec = Recorder()
+    s = IngestScheduler(rec, min_latency=0.2, max_latency=0.3, workers=1)
+    end = time.monotonic() + 0.8
+    while time.monotonic() < end:
+        s.mark("a")  # hiç durulmayan dosya
+        time.sleep(0.02)
+    s.close()
+    assert len(rec.calls) >= 2
+
+def test_events_during_processing_requeue_without_overlap():
+    rec = Recorder(hold=0.3)
+    s = IngestScheduler(rec, min_latency=0.01, max_latency=0.05, workers=4)
+    s.mark("a")
+    assert wait_calls(rec, 1)
+    for _ in range(5):  # işlenirken gelen olaylar: dosya yeniden kirlenir ama ikinci kopya başlamaz
+        s.mark("a")
+        time.sleep(0.02)
+    assert wait_calls(rec, 2)
+    time.sleep(0.4)
+    s.close()
+    assert rec.overlap == [] and len(rec.calls) == 2
+    assert rec.calls[1][1] - rec.calls[0][1] >= 0.3
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import download_all_cfs_debug as dl
+
+A, B = "DECOM__TLM__T__A", "DECOM__TLM__T__B"
+
+class ListSink:
+    def __init__(self):
+        self.recs = []
+
+    def write(self, recs):
+        self.recs.extend(recs)
+
+def rec(key, t):
+    return {"__packet": key, "__time": t}
+
+def live_route(hwm=None):
+    sink = ListSink()
+    route = dl._Route("J", [A, B], sink, live=True, hwm=hwm)
+    return route, sink
+
+def test_interleaved_packets_are_not_dropped():
+    route, sink = live_route()
+    route.deliver([rec(A, 100), rec(B, 90), rec(A, 101), rec(B, 95)])
+    assert [r["__time"] for r in sink.recs] == [100, 90, 101, 95]
+    assert route.hwm == {A: 101, B: 95}
+
+def test_records_without_time_pass():
+    route, sink = live_route({A: 50})
+    route.resume_window()
+    route.deliver([{"__packet": A, "V": 1}])
+    assert len(sink.recs) == 1
+
+def test_resume_filters_only_boundary_records_per_packet():
+    route, sink = live_route({A: 100, B: 80})
+    assert route.resume_window() == {"start_time": 81}
+    # sunucu start_time'dan itibaren tekrar gönderir: her paket kendi hwm'ine kadar atılır
+    route.deliver([rec(B, 81), rec(A, 90), rec(A, 100), rec(B, 85), rec(A, 101)])
+    assert [(r["__packet"], r["__time"]) for r in sink.recs] == [(B, 81), (B, 85), (A, 101)]
+    # sınır geçildikten sonra sıra dışı (eski) kayıt artık süzülmez
+    route.deliver([rec(A, 99)])
+    assert sink.recs[-1]["__time"] == 99
+
+def test_resume_without_hwm_starts_now():
+    route, _ = live_route()
+    assert route.resume_window()["start_time"] > 10**18
+
+def test_store_reads_legacy_job_hwm(tmp_path):
+    path = tmp_path / "hwm.json"
+    path.write_text('{"J": 42, "K": {"%s": 7}}' % A)
+    store = dl.HwmStore(str(path))
+    assert store.for_job("J", [A, B]) == {A: 42, B: 42}
+    assert store.for_job("K", [A]) == {A: 7}
+    assert store.for_job("X", [A]) == {}
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import os, gzip, json, itertools
+import pytest
+
+import lp_convert
+from lp_convert import iter_lines, mmap_safe
+
+DATA = b"".join(b"line%d %s\n" % (i, b"x" * (i % 37)) for i in range(2000)) + b"yarim"
+
+@pytest.mark.parametrize("block", [7, 64, 1 << 20])
+@pytest.mark.parametrize("start, end, tail", [(0, None, False), (0, None, True), (13, len(DATA) - 3, True)])
+def test_buffered_scan_matches_mmap(tmp_path, block, start, end, tail):
+    live = tmp_path / "GENERIC_RW.ndjson"
+    seg = tmp_path / "GENERIC_RW.20250101T120000-0001.ndjson"
+    live.write_bytes(DATA)
+    seg.write_bytes(DATA)
+    assert not mmap_safe(str(live), os.stat(live)) and mmap_safe(str(seg), os.stat(seg))
+    assert list(iter_lines(str(live), start, end, tail, block)) == list(iter_lines(str(seg), start, end, tail, block))
+
+def test_live_file_truncated_while_scanning(tmp_path):
+    p = tmp_path / "GENERIC_RW.ndjson"
+    p.write_bytes(DATA)
+    it = iter_lines(str(p), block_bytes=64)
+    first = next(it)
+    with open(p, "wb"):  # downloader'ın "w" ile yeniden dump'ı
+        pass
+    rest = list(it)  # SIGBUS yok: okunabilen kısımla biter
+    assert first == (b"line0 ", 7) and len(rest) < 2000
+
+def test_stable_file_uses_mmap(tmp_path, monkeypatch):
+    p = tmp_path / "GENERIC_RW.ndjson"
+    p.write_bytes(DATA)
+    os.utime(p, (1, 1))
+    assert not mmap_safe(str(p), os.stat(p))
+    monkeypatch.setattr(lp_convert, "MMAP_STABLE_SEC", 60.0)
+    assert mmap_safe(str(p), os.stat(p))
+
+K = "DECOM__TLM__GENERIC_RW__HK"
+K2 = "DECOM__CMD__GENERIC_RW__SET"
+
+def items(t, *names, target="GENERIC_RW", packet="HK"):
+    return {"time": t, "target": target, "packet": packet,
+            "items": [{"name": n, "converted": None if n == "RAW" else i, "raw": i * 10} for i, n in enumerate(names)]}
+
+# aynı paket anahtarı altında şekli değişen kayıtlar: derlenmiş extractor uyar, reddeder ya da yeniden derlenir
+MIXED = [
+    {"__packet": K, "PACKET_TIMESECONDS": 1.5, "A": 1, "B": "x"},
+    {"__packet": K, "PACKET_TIMESECONDS": 2.5, "A": 2, "B": "y"},              # derlenmiş yol
+    {"__packet": K, "PACKET_TIMESECONDS": 3.0, "A": 3, "C": True},              # anahtar kümesi değişti
+    {"__packet": K, "PACKET_TIMESECONDS": "bozuk", "__time": 4, "A": 4, "C": False},
+    {"__packet": K, "PACKET_TIMESECONDS": None, "A": 5, "C": 1.0},             # zaman yok
+    {"__packet": K, "__time": 6, "A": 6, "C": 2.0, "__extra": 1},
+    {"__packet": K, "__time": 7, "A": 7, "C": 3.0, "__extra": 2, "target": "OTHER"},
+    {"__packet": K2, "time": 8, "V": 1},                                        # komut (TC)
+    {"__packet": K, "target": "GENERIC_RW", "packet": "HK", "time": 9, "items": [{"name": "Z", "raw": 1}]},
+    items(10, "A", "B"),
+    items(11, "A", "B"),                                                        # derlenmiş items yolu
+    items(12, "B", "A"),                                                        # öğe sırası değişti
+    items(13, "A", "B", "RAW"),                                                 # öğe sayısı değişti, converted yok
+    items(14, "A", None, "B"),                                                  # adsız öğe
+    items(None, "A", "B"),
+    dict(items(15, "A"), items=[]),
+    {"target": "GENERIC_RW", "packet": "HK", "items": [{"name": "A", "raw": 1}]},  # time yok: flat yoluna düşer
+    {"__packet": K, 1: "sayı anahtar", "__time": 16, "A": 1},
+    {"__packet": ["hash", "lenemez"], "__time": 17, "A": 1},
+]
+
+@pytest.mark.parametrize("order", [MIXED, MIXED[::-1], MIXED * 2])
+def test_compiled_extractors_match_generic_path(monkeypatch, order):
+    monkeypatch.setattr(lp_convert, "_extractors", {})
+    for rec in order:
+        assert lp_convert.extract_meta(rec) == lp_convert._extract_meta_generic(rec), rec
+    assert any(isinstance(e, lp_convert._FlatExtractor) for e in lp_convert._extractors.values())
+    assert any(isinstance(e, lp_convert._ItemsExtractor) for e in lp_convert._extractors.values())
+
+# önbelleksiz referans: Influx LP kaçış kuralları karakter karakter
+def ref_meas(s):
+    return s.replace(",", "\\,").replace(" ", "\\ ")
+
+def ref_tag(s):
+    return ref_meas(s).replace("=", "\\=")
+
+def ref_field_key(s):
+    return "".join(ch if (ch.isalnum() or ch in "_.-:") else "_" for ch in s)
+
+KEYS = ["plain", "with space", "a,b", "k=v", " ,= ", "ÇALIŞMA modu", "温度,传感器=1", "emoji 🚀=x",
+        "tab\there", "dot.dash-colon:ok", "quote\"back\\slash", "MİXED-ascii,ğ"]
+
+@pytest.mark.parametrize("key", KEYS)
+def test_cached_escaping_matches_uncached(key):
+    assert lp_convert.esc_measurement(key) == ref_meas(key)
+    assert lp_convert.esc_tag(key) == ref_tag(key)
+    for _ in range(2):  # ikinci çağrı önbellekten
+        assert lp_convert.norm_field_key(key) == ref_field_key(key)
+        assert lp_convert._field_key_eq(key) == ref_field_key(key) + "="
+        assert lp_convert.series_prefix(key, key, "TC") == \
+            f"{ref_meas(key)},packet={ref_tag(key)},kind=TC,host={lp_convert.HOST_TAG} "
+
+def test_to_line_protocol_with_awkward_keys():
+    fields = {k: i for i, k in enumerate(KEYS)}
+    row = lp_convert.to_line_protocol("T 1,x", "P=1", "TM", fields, 5)
+    expect = ",".join(f"{ref_field_key(k)}={i}i" for i, k in enumerate(KEYS))
+    assert row == f"T\\ 1\\,x,packet=P\\=1,kind=TM,host={lp_convert.HOST_TAG} {expect} 5"
+
+def ndjson_lines(n):
+    return [(json.dumps({"__packet": K, "__time": i + 1, "A": i}) + "\n").encode() for i in range(n)]
+
+@pytest.mark.parametrize("batch", [1, 3, 7, 100])
+def test_batch_offsets_end_on_complete_lines(tmp_path, batch):
+    lines = ndjson_lines(10)
+    lines.insert(4, b"\n")          # boş satır: point yok, offset ilerler
+    lines.insert(6, b"{bozuk\n")    # parse edilemeyen satır: atlanır, offset ilerler
+    p = tmp_path / "X.ndjson"
+    p.write_bytes(b"".join(lines) + b'{"__packet": "' + K.encode() + b'", "__ti')  # yarım son satır
+    ends = list(itertools.accumulate(len(l) for l in lines))
+    out = list(lp_convert.iter_lp_batches(str(p), 0, batch_size=batch))
+    assert all(0 < len(rows) <= batch for rows, _ in out[:-1])
+    assert sum(len(rows) for rows, _ in out) == 10
+    line_end = {int(json.loads(l)["__time"]): e for l, e in zip(lines, ends) if l.startswith(b'{"')}
+    for rows, off in out[:-1]:  # dolu batch, son point'inin satır sonunda biter
+        assert off == line_end[int(rows[-1].rsplit(" ", 1)[1])]
+    assert out[-1][1] == ends[-1] < p.stat().st_size  # son öğe: son tam satır, yarım satırdan önce
+    # son offset'ten devam: tekrar yok, yarım satır tamamlanınca yalnızca o gelir
+    with open(p, "ab") as f:
+        f.write(b'me": 99, "A": 1}\n')
+    rest = list(lp_convert.iter_lp_batches(str(p), out[-1][1], batch_size=batch))
+    assert [r for rows, _ in rest for r in rows] == [lp_convert.to_line_protocol("GENERIC_RW", "HK", "TM", {"A": 1}, 99)]
+    assert rest[-1][1] == p.stat().st_size
+
+def test_no_complete_line_returns_start_offset(tmp_path):
+    p = tmp_path / "X.ndjson"
+    p.write_bytes(b"".join(ndjson_lines(2)) + b"{yar")
+    start = len(b"".join(ndjson_lines(2)))
+    assert list(lp_convert.iter_lp_batches(str(p), start)) == [([], start)]
+
+def test_compressed_segment_offsets(tmp_path):
+    p = tmp_path / "X.20250101T120000-0001.ndjson.gz"
+    with gzip.open(p, "wb") as f:
+        f.write(b"".join(ndjson_lines(10)))
+    size = p.stat().st_size
+    out = list(lp_convert.iter_lp_batches(str(p), 0, batch_size=4))
+    assert [len(r) for r, _ in out] == [4, 4, 2]
+    assert [o for _, o in out] == [0, 0, size]  # ara batch'ler offset'i ilerletmez
+    assert list(lp_convert.iter_lp_batches(str(p), size)) == [([], size)]
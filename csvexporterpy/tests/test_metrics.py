@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import threading, urllib.error, urllib.request
+import pytest
+
+import metrics
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", {})
+
+def test_counter_and_gauge_exposition():
+    c = metrics.counter("t_requests_total", "İstek sayısı", ["job", "code"])
+    c.inc(job="a", code=200)
+    c.inc(2, job="a", code=200)
+    c.inc(0.5, job='q"b\\', code=500)
+    g = metrics.gauge("t_depth", "Kuyruk derinliği")
+    g.set(7)
+    g.inc(-2)
+    assert metrics.counter("t_requests_total", "başka") is c  # aynı ad: aynı nesne
+    assert metrics.render() == (
+        "# HELP t_requests_total İstek sayısı\n"
+        "# TYPE t_requests_total counter\n"
+        't_requests_total{job="a",code="200"} 3\n'
+        't_requests_total{job="q\\"b\\\\",code="500"} 0.5\n'
+        "# HELP t_depth Kuyruk derinliği\n"
+        "# TYPE t_depth gauge\n"
+        "t_depth 5\n")
+
+def test_histogram_buckets_are_cumulative_with_le_label():
+    h = metrics.histogram("t_sec", "Süre", ["job"], buckets=(1, 0.25, 2.5))
+    for v in (0.1, 0.25, 0.3, 2.0, 9.0):
+        h.observe(v, job="j")
+    assert metrics.render().splitlines()[2:] == [
+        't_sec_bucket{job="j",le="0.25"} 2',
+        't_sec_bucket{job="j",le="1"} 3',
+        't_sec_bucket{job="j",le="2.5"} 4',
+        't_sec_bucket{job="j",le="+Inf"} 5',
+        't_sec_sum{job="j"} 11.65',
+        't_sec_count{job="j"} 5',
+    ]
+
+def test_set_function_scalar_and_dict_labels():
+    metrics.gauge("t_fn", "Fonksiyon").set_function(lambda: 4.5)
+    metrics.gauge("t_by_src", "Kaynak başına", ["source"]).set_function(lambda: {"A": 1, "B": 2})
+    metrics.counter("t_by_pair", "Çift etiket", ["kind", "target"]).set_function(lambda: {("TM", "X"): 3})
+    lines = metrics.render().splitlines()
+    assert "t_fn 4.5" in lines
+    assert 't_by_src{source="A"} 1' in lines and 't_by_src{source="B"} 2' in lines
+    assert 't_by_pair{kind="TM",target="X"} 3' in lines
+
+def test_failing_function_does_not_break_render():
+    metrics.gauge("t_bad", "Bozuk").set_function(lambda: 1 / 0)
+    metrics.gauge("t_ok", "Sağlam").set(1)
+    text = metrics.render()
+    assert "t_bad" not in text  # yarım (örneksiz) HELP/TYPE bloğu da yazılmaz
+    assert text.endswith("t_ok 1\n")
+
+def test_http_endpoint_serves_render():
+    metrics.counter("t_http_total", "HTTP").inc()
+    srv = metrics.ThreadingHTTPServer(("127.0.0.1", 0), metrics._Handler)  # start_http_server'da port 0 kapalı
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{srv.server_address[1]}"
+        with urllib.request.urlopen(url + "/metrics") as r:
+            assert r.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert r.read().decode() == metrics.render()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other")
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert metrics.start_http_server(0) is None
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import json, math
+import pytest
+
+import ndjson_codec as codec
+
+def strict(s):
+    """NaN/Infinity tanımayan hızlı arka uç taklidi (orjson gibi ValueError alt sınıfı verir)."""
+    if b"NaN" in s or b"Infinity" in s:
+        raise json.JSONDecodeError("unexpected token", s.decode(), 0)
+    return {"fast": True}
+
+def test_fallback_parses_non_standard_tokens():
+    loads = codec._with_fallback(strict)
+    assert loads(b'{"a": 1}') == {"fast": True}
+    obj = loads(b'{"a": NaN, "b": -Infinity, "c": Infinity}')
+    assert math.isnan(obj["a"]) and obj["b"] == -math.inf and obj["c"] == math.inf
+
+def test_fallback_reraises_when_stdlib_also_fails():
+    with pytest.raises(ValueError):
+        codec._with_fallback(strict)(b'{"a": NaN')
+
+@pytest.mark.parametrize("name", codec.available_backends())
+def test_selected_backend_accepts_nan(monkeypatch, name):
+    monkeypatch.setenv("JSON_CODEC", name)
+    _, loads, _ = codec._select()
+    assert math.isnan(loads(b'{"x": NaN}')["x"])
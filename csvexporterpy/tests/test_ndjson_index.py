@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import json
+
+from lp_convert import extract_meta
+from ndjson_index import NDJSONIndex, index_path, iter_time_range, open_index
+
+S = 10**9
+
+def rec(t, v=1):
+    return json.dumps({"__packet": "DECOM__TLM__CFS_DEBUG__HK", "PACKET_TIMESECONDS": t, "X": v}) + "\n"
+
+def times(lines):
+    return [extract_meta(json.loads(s))[0] for s in lines]
+
+def test_ranges_bisect_selects_only_overlapping_blocks(tmp_path):
+    p = tmp_path / "a.ndjson"
+    p.write_text("".join(rec(t) for t in range(1000)))
+    idx = NDJSONIndex(str(p))
+    idx.extend(block_bytes=1024)
+    assert len(idx.blocks) > 10
+    rs = idx.ranges(400 * S, 420 * S)
+    assert len(rs) == 1 and rs[0][1] - rs[0][0] <= 4 * 1024  # yalnızca birkaç blok
+    got = [t for t in times(iter_time_range(str(p), 400 * S, 420 * S)) if 400 * S <= t <= 420 * S]
+    assert got == [t * S for t in range(400, 421)]
+    assert idx.ranges(5000 * S, 6000 * S) == []
+    assert idx.ranges() == [(0, idx.end)]
+
+def test_out_of_order_block_is_not_skipped(tmp_path):
+    # geç gelen eski kayıt dosyanın sonunda: kümülatif min/max onu kapsar
+    p = tmp_path / "a.ndjson"
+    p.write_text("".join(rec(t) for t in range(500)) + rec(10, 2))
+    idx = NDJSONIndex(str(p))
+    idx.extend(block_bytes=1024)
+    rs = idx.ranges(10 * S, 10 * S)
+    assert len(rs) == 2 and rs[-1][1] == idx.end
+
+def test_index_persists_extends_and_rebuilds(tmp_path):
+    p = tmp_path / "a.ndjson"
+    p.write_text("".join(rec(t) for t in range(100)))
+    idx = open_index(str(p))
+    assert (tmp_path / "a.ndjson.idx").exists() and idx.end == p.stat().st_size
+    with open(p, "a") as f:
+        f.write("".join(rec(t) for t in range(100, 200)) + '{"yarim')
+    idx2 = open_index(str(p))
+    assert idx2.end == p.stat().st_size - len('{"yarim') and idx2.time_span() == (0, 199 * S)
+    p.write_text("".join(rec(t) for t in range(1000, 1010)))  # truncate + yeniden yazım
+    idx3 = open_index(str(p))
+    assert idx3.time_span() == (1000 * S, 1009 * S)
+    assert NDJSONIndex.load(str(p)).end == idx3.end
+    assert index_path(str(p)).endswith(".idx")
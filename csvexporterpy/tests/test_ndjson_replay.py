@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from ndjson_replay import find_files, replay
+from synthetic import flat_records, to_lines
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+def ts(row):
+    return int(row.rsplit(" ", 1)[1])
+
+def write(path, recs):
+    path.write_bytes(b"\n".join(to_lines(recs)) + b"\n")
+
+def test_units_in_group_are_merged_by_time(tmp_path):
+    recs = flat_records(3000, fields=3, rate_hz=10)
+    # sonraki segment öncekiyle örtüşür ve ondan önce başlar; küçük parçalar birim sınırlarını çoğaltır
+    write(tmp_path / "TM_CFS_DEBUG.20250101T120000-0001.ndjson", recs[1000:3000])
+    write(tmp_path / "TM_CFS_DEBUG.20250101T121000-0002.ndjson", recs[:1500])
+    sink = ListSink()
+    st = replay(find_files(str(tmp_path)), sink, readers=0, chunk_bytes=4096, progress_sec=0)
+    times = [ts(r) for r in sink.rows]
+    assert st["units"] > 2
+    assert times == sorted(times)
+    assert st["written"] == 3000 and st["skipped"] == 500  # örtüşen kısım bir kez yazılır
+
+def test_time_range_uses_index(tmp_path):
+    recs = flat_records(2000, fields=3, rate_hz=10)
+    write(tmp_path / "TM_CFS_DEBUG.20250101T120000-0001.ndjson", recs)
+    sink = ListSink()
+    replay(find_files(str(tmp_path)), sink, readers=0, progress_sec=0)
+    all_t = sorted(ts(r) for r in sink.rows)
+    t0, t1 = all_t[500], all_t[799]
+    sink = ListSink()
+    replay(find_files(str(tmp_path)), sink, t0=t0, t1=t1, readers=0, chunk_bytes=4096, progress_sec=0)
+    assert [ts(r) for r in sink.rows] == all_t[500:800]
+
+def test_influx_sink_does_not_use_live_spool(tmp_path, monkeypatch):
+    import argparse
+    import influx_consumer_simple as consumer
+    from ndjson_replay import InfluxSink
+    from fake_servers import FakeInfluxServer
+    srv = FakeInfluxServer().start()
+    monkeypatch.setattr(consumer, "SPOOL_DIR", str(tmp_path / "spool"))
+    for name in ("INFLUX_WRITER", "INFLUX_URL", "INFLUX_ORG", "INFLUX_BUCKET", "INFLUX_TOKEN", "SPOOL_ENABLED"):
+        monkeypatch.setattr(consumer, name, getattr(consumer, name))
+    monkeypatch.setattr(consumer, "INFLUX_WRITER", "adaptive")
+    args = argparse.Namespace(url=srv.url, org="o", bucket="replay", token="t")
+    try:
+        sink = InfluxSink(args)
+        assert consumer.spool is None
+        sink.write(["m v=1 1", "m v=2 2"])
+        sink.close()
+        assert srv.wait_for(2, timeout=5) and sink.failed == 0
+    finally:
+        srv.stop()
+    assert not (tmp_path / "spool").exists()
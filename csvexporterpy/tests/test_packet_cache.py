@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+from download_all_cfs_debug import PacketNameCache
+
+@pytest.mark.parametrize("content", [
+    "{bozuk", "[1, 2]", '{"TM|CFS": 5}', '{"TM|CFS": [1]}', '{"TM|CFS": ["x", null]}',
+    '{"TM|A": [1, ["HK"]], "TM|B": "bozuk"}',
+])
+def test_malformed_cache_file_loads_empty(tmp_path, content):
+    p = tmp_path / "packets.json"
+    p.write_text(content)
+    c = PacketNameCache(str(p))
+    assert c._entries == {}
+    c.put(("TM", "CFS"), ["HK"])  # üzerine geçerli bir dosya yazılır
+    assert PacketNameCache(str(p))._entries[("TM", "CFS")][1] == ["HK"]
+
+def test_cache_roundtrip(tmp_path):
+    p = tmp_path / "packets.json"
+    c = PacketNameCache(str(p))
+    c.put(("TM", "CFS_DEBUG"), ["HK", "EVS"])
+    assert json.loads(p.read_text())["TM|CFS_DEBUG"][1] == ["HK", "EVS"]
+    names, refresh = PacketNameCache(str(p)).peek(("TM", "CFS_DEBUG"))
+    assert names == ["HK", "EVS"] and not refresh
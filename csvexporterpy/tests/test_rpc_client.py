@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+import download_all_cfs_debug as dl
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(payload)
+        status, body = self.server.respond(payload)
+        body = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.requests = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+def client(srv, retries=2):
+    return dl.OpenC3RpcClient(host=f"127.0.0.1:{srv.server_address[1]}", retries=retries, backoff_sec=0.01)
+
+def answer(req):
+    if req["method"] == "fail":
+        return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -1, "message": "olmadı"}}
+    return {"jsonrpc": "2.0", "id": req["id"], "result": [req["method"]] + req["params"]}
+
+def test_batch_maps_out_of_order_responses_to_requests(server):
+    # ters sırada, bir yanıt eksik, bir yabancı id ve bir hata
+    server.respond = lambda reqs: (200, [answer(r) for r in reversed(reqs) if r["method"] != "lost"]
+                                   + [{"jsonrpc": "2.0", "id": 999, "result": "yabancı"}])
+    out = client(server).batch([("a", [1]), ("fail", []), ("lost", []), ("b", [2])])
+    assert out[0] == ["a", 1] and out[3] == ["b", 2]
+    assert isinstance(out[1], dl.RpcError) and "olmadı" in str(out[1])
+    assert isinstance(out[2], dl.RpcError) and "yok" in str(out[2])
+    assert len(server.requests) == 1  # tek round-trip
+
+def test_batch_falls_back_to_single_calls_for_non_list_reply(server):
+    def respond(payload):
+        if isinstance(payload, list):  # batch desteklemeyen sunucu: tek hata nesnesi
+            return 200, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch yok"}}
+        return 200, answer(payload)
+    server.respond = respond
+    out = client(server).batch([("a", [1]), ("fail", [])])
+    assert out[0] == ["a", 1] and isinstance(out[1], dl.RpcError)
+    assert [isinstance(r, list) for r in server.requests] == [True, False, False]
+
+def test_batch_rejected_with_4xx_falls_back(server):
+    server.respond = lambda p: (400, b"<html>bad request</html>") if isinstance(p, list) else (200, answer(p))
+    assert client(server).batch([("a", [1])]) == [["a", 1]]
+
+def test_4xx_fails_fast_without_retry(server):
+    server.respond = lambda p: (401, b"Unauthorized")
+    with pytest.raises(dl.RpcError, match="HTTP 401"):
+        client(server, retries=3).call("a", [])
+    assert len(server.requests) == 1
+
+def test_4xx_with_rpc_error_body_raises_rpc_error(server):
+    server.respond = lambda p: (403, {"jsonrpc": "2.0", "id": p["id"], "error": {"message": "yetki yok"}})
+    with pytest.raises(dl.RpcError, match="yetki yok"):
+        client(server).call("a", [])
+    assert len(server.requests) == 1
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_5xx_and_429_are_retried(server, status):
+    server.respond = lambda p: (status, b"busy") if len(server.requests) == 1 else (200, answer(p))
+    assert client(server).call("a", [7]) == ["a", 7]
+    assert len(server.requests) == 2
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import gzip, os
+
+from download_all_cfs_debug import SegmentWriter
+
+LINES = b"".join(b'{"i": %d}\n' % i for i in range(2000))
+
+def test_stale_parts_are_recovered_on_open(tmp_path):
+    d = tmp_path
+    (d / "TM_A.20250101T120000-0001.ndjson.part").write_bytes(LINES + b'{"yar')
+    gz = gzip.compress(LINES)
+    (d / "TM_A.20250101T120000-0002.ndjson.gz.part").write_bytes(gz[:len(gz) // 2])  # kesik akış
+    (d / "TM_A.20250101T120000-0003.ndjson.part").write_bytes(b'{"yar')
+    (d / "TM_A.20250101T120000-0004.ndjson.recover.part").write_bytes(b"x")
+    (d / "TM_B.20250101T120000-0001.ndjson.part").write_bytes(LINES)  # başka hedef: dokunulmaz
+
+    w = SegmentWriter(str(d / "TM_A.ndjson"), compress="none")
+    names = sorted(os.listdir(d))
+    assert names == ["TM_A.20250101T120000-0001.ndjson", "TM_A.20250101T120000-0002.ndjson.gz",
+                     "TM_B.20250101T120000-0001.ndjson.part"]
+    assert (d / names[0]).read_bytes() == LINES
+    got = gzip.decompress((d / names[1]).read_bytes())
+    assert got and LINES.startswith(got) and got.endswith(b"\n")
+    w.close()
+
+def test_segments_rotate_and_publish(tmp_path):
+    w = SegmentWriter(str(tmp_path / "TM_A.ndjson"), max_bytes=5000, compress="gzip")
+    for i in range(0, len(LINES), 1000):
+        w.write(LINES[i:i + 1000])
+    w.close()
+    names = sorted(os.listdir(tmp_path))
+    assert names and all(n.endswith(".ndjson.gz") for n in names)
+    assert b"".join(gzip.decompress((tmp_path / n).read_bytes()) for n in names) == LINES
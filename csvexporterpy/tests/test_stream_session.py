@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import json, threading, time
+
+import download_all_cfs_debug as dl
+
+A, B = "DECOM__TLM__T__A", "DECOM__TLM__T__B"
+C = "DECOM__CMD__T__C"
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append(json.loads(json.loads(msg)["data"]))
+
+    def close(self):
+        pass
+
+class Session(dl.StreamSession):
+    """Ağ yerine gönderilen abonelik mesajlarını toplayan oturum; kayıtlar _dispatch ile elle verilir."""
+    def _ensure_connected(self):
+        if self._ws is None:
+            self._ws = FakeWS()
+
+class ListSink:
+    def __init__(self):
+        self.recs = []
+
+    def write(self, recs):
+        self.recs.extend(recs)
+
+def rec(key, t):
+    return {"__packet": key, "__time": t}
+
+def test_dispatch_routes_by_packet_key():
+    s = Session()
+    s1, s2 = ListSink(), ListSink()
+    s.add("J1", [A], s1, start_time=1, end_time=2)
+    s.add("J2", [B, C], s2, start_time=1, end_time=2)
+    s._dispatch([rec(A, 1), rec(B, 2), rec("DECOM__TLM__T__X", 3), "junk", rec(A, 4)])
+    assert [r["__time"] for r in s1.recs] == [1, 4]
+    assert [r["__time"] for r in s2.recs] == [2]
+    assert [(m["action"], m["packets"]) for m in s._ws.sent] == [("add", [A]), ("add", [B, C])]
+
+def test_items_form_command_goes_to_cmd_route():
+    s = Session()
+    tlm, cmd = ListSink(), ListSink()
+    s.add("TM", [A], tlm)
+    s.add("TC", [C], cmd)
+    s._dispatch([{"target": "T", "packet": "C", "time": 5, "items": []},
+                 {"target": "T", "packet": "A", "time": 6, "items": []}])
+    assert [r["packet"] for r in cmd.recs] == ["C"]
+    assert [r["packet"] for r in tlm.recs] == ["A"]
+    assert dl.record_packet_key(cmd.recs[0], "CMD") == C
+
+def test_remove_unsubscribes_only_owned_keys():
+    s = Session()
+    s1, s2 = ListSink(), ListSink()
+    r1 = s.add("J1", [A, B], s1)
+    s.add("J2", [B], s2)  # B'yi devralır
+    s.remove(r1)
+    assert r1.closed
+    assert s._ws.sent[-1] == {"action": "remove", "scope": dl.SCOPE, "token": dl.AUTH, "packets": [A]}
+    s._dispatch([rec(A, 1), rec(B, 2)])
+    assert s1.recs == [] and [r["__time"] for r in s2.recs] == [2]
+    r1.deliver([rec(A, 3)])  # kapanmış route'a geç gelen teslim yok sayılır
+    assert s1.recs == []
+
+def test_mux_dump_ends_after_idle_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(dl, "IDLE_TIMEOUT_SEC", 0.4)
+    s = Session()
+    out = tmp_path / "J.ndjson"
+
+    def feed():
+        for i in range(5):
+            time.sleep(0.05)
+            s._dispatch([rec(A, i)])
+
+    t = threading.Thread(target=feed)
+    t0 = time.time()
+    t.start()
+    dl.dump_decom_mux(s, [A], 60, str(out), "J")
+    t.join()
+    assert time.time() - t0 < 3
+    assert not s._routes  # route kaldırıldı, abonelikten çıkıldı
+    assert s._ws.sent[-1]["action"] == "remove"
+    assert [json.loads(l)["__time"] for l in out.read_text().splitlines()] == list(range(5))